@@ -0,0 +1,200 @@
+# cli.py
+"""
+Operational commands that run outside the API process.
+
+    python cli.py recs-worker --concurrency 8
+    python cli.py build-outfit-index --source outfits
+    python cli.py daily-suggestions --workers 4
+    python cli.py outfits-import curated.ndjson
+    python cli.py outfits-export - > outfits.ndjson
+"""
+import asyncio
+import logging
+import signal
+from pathlib import Path
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import connect_to_mongo, close_mongo_connection  # noqa: E402  (needs env loaded)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+app = typer.Typer(help="BeStyle.AI backend operational commands")
+
+
+@app.command("recs-worker")
+def recs_worker(
+    concurrency: Optional[int] = typer.Option(None, help="Concurrent jobs in this process (default: RECS_WORKER_CONCURRENCY)"),
+    lease_seconds: Optional[float] = typer.Option(None, help="Lease length; heartbeats renew it every third of this"),
+    max_attempts: Optional[int] = typer.Option(None, help="Attempts before a recommendation is dead-lettered"),
+):
+    """Claim and process pending recommendations until SIGINT/SIGTERM."""
+    from services.recs_worker import RecsWorker
+
+    opts = {
+        k: v for k, v in {
+            "concurrency": concurrency,
+            "lease_seconds": lease_seconds,
+            "max_attempts": max_attempts,
+        }.items() if v is not None
+    }
+
+    async def main():
+        await connect_to_mongo()
+        worker = RecsWorker(**opts)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        try:
+            await worker.run()
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(main())
+
+
+@app.command("build-outfit-index")
+def build_outfit_index(
+    source: str = typer.Option("outfits", help="Collection to index: outfits (catalog) or user_outfits (saved)"),
+    dim: Optional[int] = typer.Option(None, help="Vector dimension (default: OUTFIT_EMBED_DIM)"),
+    nlist: Optional[int] = typer.Option(None, help="IVF lists (default: sqrt of the outfit count)"),
+    batch_size: int = typer.Option(1000, help="Outfits read from Mongo per batch"),
+):
+    """Embed every outfit in SOURCE, batch by batch, and publish a new "more like this" index."""
+    from database import get_collection
+    from services.outfit_embeddings import OUTFIT_EMBED_DIM, build_index
+
+    if source not in ("outfits", "user_outfits"):
+        raise typer.BadParameter("source must be outfits or user_outfits")
+    query = {"is_active": {"$ne": False}} if source == "outfits" else {}
+    projection = {"title": 1, "description": 1, "items": 1, "outfit": 1}
+
+    async def main():
+        await connect_to_mongo()
+        try:
+            cursor = get_collection(source).find(query, projection, batch_size=batch_size)
+            loop = asyncio.get_running_loop()
+            count = 0
+
+            def docs():
+                # runs in the build thread: pull one batch at a time from the loop
+                nonlocal count
+                while batch := asyncio.run_coroutine_threadsafe(cursor.to_list(batch_size), loop).result():
+                    count += len(batch)
+                    yield from batch
+
+            try:
+                path = await asyncio.to_thread(build_index, source, docs(), dim or OUTFIT_EMBED_DIM, nlist)
+            except ValueError:
+                if count:
+                    raise
+                logger.warning(f"No documents in {source}; index left unchanged")
+                return
+        finally:
+            await close_mongo_connection()
+        logger.info(f"Indexed {count} {source} into {path}")
+
+    asyncio.run(main())
+
+
+@app.command("daily-suggestions")
+def daily_suggestions(
+    day: Optional[str] = typer.Option(None, help="UTC day to suggest for, YYYY-MM-DD (default: today)"),
+    workers: Optional[int] = typer.Option(None, help="Scoring processes (default: DAILY_SUGGESTIONS_WORKERS)"),
+    chunk_size: Optional[int] = typer.Option(None, help="Users per scoring task (default: DAILY_SUGGESTIONS_CHUNK)"),
+    per_user: Optional[int] = typer.Option(None, help="Suggestions per user (default: DAILY_SUGGESTIONS_PER_USER)"),
+    restart: bool = typer.Option(False, "--restart", help="Ignore the day's checkpoint and start over"),
+):
+    """Score every opted-in user against the catalog and save their daily suggestions."""
+    from services.daily_suggestions import run_daily_suggestions
+
+    opts = {
+        k: v for k, v in {
+            "day": day,
+            "workers": workers,
+            "chunk_size": chunk_size,
+            "per_user": per_user,
+        }.items() if v is not None
+    }
+
+    async def main():
+        await connect_to_mongo()
+        try:
+            stats = await run_daily_suggestions(restart=restart, **opts)
+        finally:
+            await close_mongo_connection()
+        typer.echo(
+            f"{stats['day']}: {stats['users']} users, {stats['written']} suggestions, "
+            f"{stats.get('users_per_sec', 0)} users/s"
+        )
+
+    asyncio.run(main())
+
+
+@app.command("outfits-import")
+def outfits_import(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="NDJSON file, one outfit per line"),
+    chunk_size: int = typer.Option(500, help="Rows per unordered bulk write"),
+    max_errors: int = typer.Option(100, help="Row errors to print"),
+):
+    """Bulk import outfits into the catalog (rows with an _id are upserted)."""
+    from services.catalog_io import import_ndjson
+
+    async def read(f):
+        while chunk := await asyncio.to_thread(f.read, 1 << 20):
+            yield chunk
+
+    async def main():
+        await connect_to_mongo()
+        try:
+            with path.open("rb") as f:
+                report = await import_ndjson(read(f), chunk_size=chunk_size, max_errors=max_errors)
+        finally:
+            await close_mongo_connection()
+        for err in report["errors"]:
+            typer.echo(f"line {err['line']}: {err['error']}", err=True)
+        typer.echo(
+            f"{report['received']} rows: {report['inserted']} inserted, "
+            f"{report['updated']} updated, {report['failed']} failed"
+        )
+        if report["failed"]:
+            raise typer.Exit(1)
+
+    asyncio.run(main())
+
+
+@app.command("outfits-export")
+def outfits_export(
+    path: str = typer.Argument("-", help="Output file, or - for stdout"),
+    batch_size: int = typer.Option(500, help="Documents per cursor round trip"),
+    include_inactive: bool = typer.Option(False, "--include-inactive", help="Also export is_active=false outfits"),
+):
+    """Stream the catalog out as NDJSON."""
+    import sys
+    from services.catalog_io import export_ndjson
+
+    async def main():
+        await connect_to_mongo()
+        out = sys.stdout.buffer if path == "-" else open(path, "wb")
+        try:
+            async for chunk in export_ndjson(batch_size=batch_size, include_inactive=include_inactive):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+            await close_mongo_connection()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    app()
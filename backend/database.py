@@ -55,6 +55,13 @@ async def create_indexes():
         await db.quiz_sessions.create_index("session_id", unique=True)
         await db.quiz_sessions.create_index("created_at")
         await db.quiz_sessions.create_index("is_completed")
+        # abandoned (incomplete) quiz sessions expire; completed ones are kept
+        await db.quiz_sessions.create_index(
+            "expires_at",
+            expireAfterSeconds=0,
+            partialFilterExpression={"is_completed": False},
+        )
+        await db.quiz_funnel.create_index([("day", 1), ("source", 1)])
         
         # Waitlist indexes
         await db.waitlist.create_index("email", unique=True)
@@ -66,6 +73,9 @@ async def create_indexes():
         await db.outfits.create_index("style_types")
         await db.outfits.create_index("is_active")
         await db.outfits.create_index("created_at")
+        # keyset pagination (GET /api/outfits/) sorts on (created_at, _id)
+        await db.outfits.create_index([("created_at", 1), ("_id", 1)])
+        await db.outfits.create_index("updated_at")
 
         # add:
         await db.sessions.create_index("session_id", unique=True)
@@ -79,12 +89,26 @@ async def create_indexes():
         await db.users.create_index("created_at")
         await db.users.create_index("style.current")
         await db.users.create_index("lifestyle.priority_occasions")
+        # daily suggestions job streams opted-in users in _id order
+        await db.users.create_index([("notifications.frequency", 1), ("_id", 1)])
 
-        # User outfits (history) indexes
-        await db.user_outfits.create_index([("user_id", 1), ("created_at", -1)])
-        await db.user_outfits.create_index([("session_id", 1), ("created_at", -1)])
+        # User outfits (history) indexes; _id completes the keyset pagination sort
+        await db.user_outfits.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+        await db.user_outfits.create_index([("session_id", 1), ("created_at", -1), ("_id", -1)])
         await db.user_outfits.create_index("favorite")
         await db.user_outfits.create_index("occasion")
+        # daily suggestions upsert per (user, day, outfit); unique so a re-run can't duplicate
+        await db.user_outfits.create_index(
+            [("user_id", 1), ("suggested_for", 1), ("outfit.id", 1)],
+            unique=True,
+            partialFilterExpression={"source": "daily"},
+        )
+
+        # Recommendations double as the recs worker queue
+        await db.recommendations.create_index([("user_id", 1), ("created_at", -1)])
+        await db.recommendations.create_index([("status", 1), ("next_attempt_at", 1), ("created_at", 1)])
+        await db.recommendations.create_index("lease_expires_at")
+        await db.recommendations_dead.create_index("rec_id")
 
         # database.create_indexes()
         await db.users.create_index("auth.oauth_id")
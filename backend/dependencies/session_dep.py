@@ -2,7 +2,9 @@ import logging
 import os
 from typing import Optional
 from fastapi import Depends, Cookie, Response, Request
-from services.session_service import find_by_sid, create_session, touch_session, COOKIE_NAME
+from services.session_service import (
+    find_by_sid, create_session, touch_session, new_anonymous_session, COOKIE_NAME, SESSION_STATELESS_ANON
+)
 
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 
@@ -15,13 +17,17 @@ async def get_or_create_session(
     if sid:
         sess = await find_by_sid(sid)
         if sess:
-            await touch_session(sid)
+            if sess.persisted:
+                await touch_session(sid)
             return sess
 
-    # Create new
+    # Create new (signed anonymous sessions are only stored once written to)
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
-    sess = await create_session(ua=ua, ip=ip)
+    if SESSION_STATELESS_ANON:
+        sess = new_anonymous_session(ua=ua, ip=ip)
+    else:
+        sess = await create_session(ua=ua, ip=ip)
 
     # set httpOnly cookie
     response.set_cookie(
@@ -51,6 +51,7 @@ class Outfit(BaseModel):
     seasons: List[str] = Field(default_factory=list)
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     model_config = ConfigDict(
         populate_by_name=True,        # lets you pass/emit `_id`
@@ -58,6 +59,34 @@ class Outfit(BaseModel):
         json_encoders={ObjectId: str},   # serialize ObjectId -> str in responses
     )
 
+class OutfitSummary(BaseModel):
+    """Catalog list row without items/description (GET /api/outfits/?fields=summary)."""
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(alias="_id")
+    # optional: one legacy doc missing a field mustn't fail the whole page
+    title: Optional[str] = None
+    occasion: Optional[str] = None
+    color: Optional[str] = None
+    confidence: Optional[int] = None
+    style_types: List[str] = Field(default_factory=list)
+    created_at: Optional[datetime] = None
+
+    @field_serializer("id")
+    def serialize_id(self, v: ObjectId):
+        return str(v)
+
+OUTFIT_FIELDSETS = {"summary": ("title", "occasion", "color", "confidence", "style_types", "created_at")}
+OUTFIT_FIELDS = tuple(f.alias or name for name, f in Outfit.model_fields.items())
+
+class OutfitPage(BaseModel):
+    items: List[Outfit]
+    next_cursor: Optional[str] = None
+
+class OutfitSummaryPage(BaseModel):
+    items: List[OutfitSummary]
+    next_cursor: Optional[str] = None
+
 class OutfitRecommendation(BaseModel):
     outfit: Outfit
     match_score: float
@@ -83,6 +112,7 @@ class OutfitMeta:
         {"keys": [("style_types", 1)]},
         {"keys": [("is_active", 1)]},
         {"keys": [("created_at", 1)]},
+        {"keys": [("updated_at", 1)]},   # incremental catalog snapshot refresh
         # If you’ll query by body_types or seasons, add them too:
         # {"keys": [("body_types", 1)]},
         # {"keys": [("seasons", 1)]},
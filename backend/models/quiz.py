@@ -74,10 +74,13 @@ class QuizSession(BaseModel):
     user_id: Optional[str] = None
     responses: QuizResponses = Field(default_factory=QuizResponses)
     current_step: int = 0
+    furthest_step: int = 0          # highest step reached; current_step can move back
+    source: Optional[str] = None    # acquisition source, for funnel counters
     is_completed: bool = False
     completed_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None   # incomplete sessions only (TTL)
     
     model_config = ConfigDict(
         populate_by_name=True,        # lets you pass/emit `_id`
@@ -94,6 +97,9 @@ class QuizStepSubmissionIn(BaseModel):
     step_number: int = Field(..., ge=0)
     answers: Dict[str, Any]
 
+class QuizStepsBatchIn(BaseModel):
+    steps: List[QuizStepSubmissionIn] = Field(..., min_length=1, max_length=6)
+
 class QuizStartResponse(BaseModel):
     session_id: str
     current_step: int
@@ -119,10 +125,31 @@ class QuizResultsResponse(BaseModel):
     recommendations: List[Dict[str, Any]]
     confidence_score: int
 
+class QuizFunnelDay(BaseModel):
+    day: str
+    source: str
+    started: int = 0
+    steps: Dict[str, int] = Field(default_factory=dict)
+    completed: int = 0
+
+class QuizFunnelTotals(BaseModel):
+    started: int = 0
+    steps: Dict[str, int] = Field(default_factory=dict)
+    completed: int = 0
+
+class QuizFunnelResponse(BaseModel):
+    start: str
+    end: str
+    source: Optional[str] = None
+    days: List[QuizFunnelDay]
+    totals: QuizFunnelTotals
+
 class QuizMeta:
     collection = "quiz_sessions"
     indexes = [
         {"keys": [("session_id", 1)], "unique": True},
         {"keys": [("created_at", 1)]},
         {"keys": [("is_completed", 1)]},
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0,
+         "partialFilterExpression": {"is_completed": False}},
     ]
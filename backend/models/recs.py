@@ -2,7 +2,7 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Any, List, Optional, Literal
-from pydantic import BaseModel, Field, AnyUrl, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, AnyUrl, EmailStr, ConfigDict, field_serializer
 from bson import ObjectId
 from typing_extensions import Annotated
 from pydantic import BeforeValidator
@@ -34,6 +34,8 @@ class ProductLink(BaseModel):
 
 class ItemWithLinks(SuggestionItem):
     links: List[ProductLink] = Field(default_factory=list)
+    status: Literal["pending","complete","error"] = "pending"  # per-item link search progress
+    error: Optional[str] = None
 
 class Recommendation(BaseModel):
     model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
@@ -44,7 +46,12 @@ class Recommendation(BaseModel):
     status: Literal["pending","complete","error"] = "pending"
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-    meta: dict[str, Any] = Field(default_factory=dict)
+    meta: dict[str, Any] = Field(default_factory=dict)   # items_done / items_failed while processing
+
+    # serialize _id and user_id as strings in JSON (API responses, SSE payloads)
+    @field_serializer("id", "user_id", when_used="json")
+    def _ser_oid(self, v: ObjectId):
+        return str(v)
 
 class CreateRecommendation(BaseModel):
     prompt: Optional[str] = None
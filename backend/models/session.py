@@ -37,6 +37,9 @@ class SessionDoc(BaseModel):
     ua: Optional[str] = None
     ip: Optional[str] = None
 
+    # False for signed anonymous sessions that have no `sessions` doc yet (never stored)
+    persisted: bool = Field(default=True, exclude=True)
+
     # serialize _id and user_id as strings in JSON
     @field_serializer("id", when_used="json")
     def _ser_id(self, v: ObjectId):
@@ -74,12 +74,31 @@ class Style(BaseModel):
     avoid_colors: List[str] = Field(default_factory=list)
     inspiration: Optional[str] = None
     goals: List[str] = Field(default_factory=list)
+    budget: Optional[str] = None      # budget | moderate | premium | no_limit
 
 class Lifestyle(BaseModel):
     occupation: Optional[str] = None
     typical_week: List[str] = Field(default_factory=list)
     priority_occasions: List[str] = Field(default_factory=list)
 
+class StyleVector(BaseModel):
+    """
+    Precomputed scoring features, kept on the user doc (`style_vector`) and
+    rebuilt whenever style/lifestyle or quiz answers change.
+    See services/style_vector.py.
+    """
+    version: int = 1
+    styles: List[str] = Field(default_factory=list)
+    interested: List[str] = Field(default_factory=list)
+    colors: List[str] = Field(default_factory=list)
+    avoid_colors: List[str] = Field(default_factory=list)
+    occasions: List[str] = Field(default_factory=list)   # catalog `occasion` values
+    body_type: Optional[str] = None
+    budget: Optional[str] = None
+    goals: List[str] = Field(default_factory=list)
+    completeness: float = 0.0
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
 class Notifications(BaseModel):
     channels: List[str] = Field(default_factory=lambda: ["in_app"])
     frequency: str = "weekly"         # daily | weekly | special
@@ -105,6 +124,7 @@ class User(BaseModel):
     style: Style = Field(default_factory=Style)
     lifestyle: Lifestyle = Field(default_factory=Lifestyle)
     notifications: Notifications = Field(default_factory=Notifications)
+    style_vector: Optional[StyleVector] = None
     last_login_at: Optional[datetime] = None   
 
     # --- Serialization: turn ObjectId into str ---
@@ -112,6 +132,21 @@ class User(BaseModel):
     def serialize_id(self, v: ObjectId):
         return str(v)
 
+class UserSummary(BaseModel):
+    """Just enough of a user to render the signed-in app shell (/api/auth/verify)."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(..., alias="_id")
+    email: str   # validated on write; no EmailStr re-check on the hot path
+    name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+# projection for reading a UserSummary straight from `users`
+USER_SUMMARY_FIELDS = {"_id": 1, "email": 1, "name": 1, "avatar_url": 1}
+# what GET /api/user/me?fields= may name; credentials (`auth`) are never selectable
+USER_FIELDSETS = {"summary": ("email", "name", "avatar_url")}
+USER_FIELDS = tuple(f.alias or name for name, f in User.model_fields.items() if name != "auth")
+
 class AuthResponse(BaseModel):
     """Response model for authentication endpoints"""
     success: bool
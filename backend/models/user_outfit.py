@@ -21,6 +21,7 @@ class UserOutfit(BaseModel):
     confidence: Optional[int] = None
     color: Optional[str] = None
     favorite: bool = False
+    suggested_for: Optional[str] = None   # YYYY-MM-DD, daily suggestions (source="daily") only
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -30,3 +31,20 @@ class UserOutfit(BaseModel):
         arbitrary_types_allowed=True,    # allow ObjectId in runtime
         json_encoders={ObjectId: str},   # serialize ObjectId -> str in responses
     )
+
+
+class UserOutfitSummary(BaseModel):
+    """History-grid card: no outfit snapshot (GET /api/user/outfits/?fields=summary)."""
+    id: PyObjectId = Field(alias="_id")
+    title: Optional[str] = None
+    occasion: Optional[str] = None
+    color: Optional[str] = None
+    confidence: Optional[int] = None
+    favorite: bool = False
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+# `fields=` presets and the fields a sparse request may name
+USER_OUTFIT_FIELDSETS = {"summary": ("title", "occasion", "color", "confidence", "favorite", "created_at")}
+USER_OUTFIT_FIELDS = tuple(f.alias or name for name, f in UserOutfit.model_fields.items())
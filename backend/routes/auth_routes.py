@@ -5,11 +5,11 @@ from pydantic import BaseModel, EmailStr
 from services.auth_service import signup_user, login_user
 from dependencies.session_dep import get_or_create_session
 from models.session import SessionDoc
-from models.user import User
+from models.user import User, UserSummary
 from services.session_service import COOKIE_NAME
 from fastapi.responses import JSONResponse
 from services.session_service import find_by_sid
-from services.user_service import get_user_by_id
+from services.user_service import get_user_by_id, get_user_summary
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -24,7 +24,7 @@ class LoginIn(BaseModel):
 
 class VerifyResponse(BaseModel):
     valid: bool
-    user: Optional[User] = None
+    user: Optional[UserSummary] = None
 
 
 @router.post("/signup", response_model=User)
@@ -47,30 +47,18 @@ async def logout(response: Response):
 async def me(session: SessionDoc = Depends(get_or_create_session)):
     if not session.user_id:
         raise HTTPException(401, "Not logged in")
-    # lazy import to avoid cycles
-    from services.user_service import get_user_by_id
     return await get_user_by_id(str(session.user_id))
 
 @router.get("/verify", response_model=VerifyResponse)
 async def verify_session_endpoint(request: Request):
-    # This single change will fix the issue
-    logging.info(f"Verifying session with sid: {request}")
-    sid = request.cookies.get("sid") 
+    # Fires on every app load: cached session lookup + projected user read, no full User
+    sid = request.cookies.get(COOKIE_NAME)
     if not sid:
         return VerifyResponse(valid=False, user=None)
-    
-    # Now, use `sid` to look up the user in your session store
-    logging.info(f"Session ID from cookie: {sid}")
-    session_data = await find_by_sid(sid.__str__())
-    logging.info(f"Session data found: {session_data}")
-    user_data = await get_user_by_id(str(session_data.user_id)) if session_data and session_data.user_id else None
-    logging.info(f"User data found: {user_data}")
-    if user_data:
-        user_model = User(
-            id=user_data.id,
-            name=user_data.name,
-            email=user_data.email
-        )
-        return VerifyResponse(valid=True, user=user_model)
-    else:
-        return VerifyResponse(valid=False, user=None)
\ No newline at end of file
+
+    session_data = await find_by_sid(sid)
+    if not session_data or not session_data.user_id:
+        return VerifyResponse(valid=False, user=None)
+
+    user = await get_user_summary(str(session_data.user_id))
+    return VerifyResponse(valid=user is not None, user=user)
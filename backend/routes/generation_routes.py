@@ -4,6 +4,7 @@ from typing import List
 from models.outfit_generation import GenerateOutfitsRequest, GenerateOutfitsResponse, OutfitCard
 from services.recommendation_engine import RecommendationEngine
 from services.user_outfit_service import UserOutfitService
+from services.session_service import persist_session
 from dependencies.session_dep import get_or_create_session
 from models.session import SessionDoc
 from database import get_database
@@ -29,6 +30,7 @@ async def generate_outfits(
     print("Generated outfits:", outfits)
     saved = False
     if body.save:
+        await persist_session(session)
         svc = UserOutfitService(get_database())
         await svc.save_generated_outfits(
             outfits=outfits,
@@ -59,6 +61,7 @@ async def generate_outfits_with_links(
 
     saved = False
     if body.save:
+        await persist_session(session)
         svc = UserOutfitService(get_database())
         await svc.save_generated_outfits(
             outfits=outfits,
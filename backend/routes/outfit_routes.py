@@ -1,16 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from services.outfit_service import (
     create_outfit,
     get_outfit,
-    get_all_outfits,
+    list_outfits,
+    list_outfit_docs,
+    stream_outfits,
     update_outfit,
     delete_outfit,
 )
-from models.outfit import Outfit
-from typing import List
+from models.outfit import OUTFIT_FIELDS, OUTFIT_FIELDSETS, Outfit, OutfitPage, OutfitSummaryPage
+from services.catalog_service import catalog
+from services.catalog_io import export_ndjson, import_ndjson
+from services.fieldsets import SUMMARY, InvalidFields, projection, sparse
+from services.pagination import InvalidCursor
+from services.user_service import get_user_summary
+from dependencies.session_dep import get_or_create_session
+from models.session import SessionDoc
+from typing import Optional, Union
+import os
 
 router = APIRouter(prefix="/api/outfits", tags=["Outfits"])
 
+# Comma-separated emails allowed to bulk import/export the catalog; empty: nobody
+CATALOG_ADMIN_EMAILS = {
+    e.strip().lower() for e in os.getenv("CATALOG_ADMIN_EMAILS", "").split(",") if e.strip()
+}
+
+async def require_catalog_admin(session: SessionDoc = Depends(get_or_create_session)) -> None:
+    if not session.user_id:
+        raise HTTPException(status_code=401, detail="Login required")
+    user = await get_user_summary(str(session.user_id))
+    if user is None or (user.email or "").lower() not in CATALOG_ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
 @router.post("/", response_model=Outfit)
 async def create_outfit_route(outfit: Outfit):
     result = await create_outfit(outfit.dict())
@@ -18,9 +41,67 @@ async def create_outfit_route(outfit: Outfit):
         raise HTTPException(status_code=400, detail="Failed to create outfit")
     return result
 
-@router.get("/", response_model=List[Outfit])
-async def get_all_outfits_route():
-    return await get_all_outfits()
+@router.get("/", response_model=Union[OutfitPage, OutfitSummaryPage])
+async def get_all_outfits_route(
+    limit: int = 50, cursor: Optional[str] = None, stream: bool = False, fields: Optional[str] = None
+):
+    """
+    Catalog page; pass next_cursor back as `cursor` for the next one (stream=true: encoded from the cursor as it's read).
+    fields=summary: OutfitSummary rows; fields=title,color,...: only those fields (read via a Mongo projection)
+    """
+    try:
+        # created_at and _id always come back: the keyset cursor is built from them
+        proj = projection(fields, OUTFIT_FIELDS, OUTFIT_FIELDSETS, always=("_id", "created_at"))
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if stream:
+            return StreamingResponse(stream_outfits(limit=limit, cursor=cursor, projection=proj), media_type="application/json")
+        if proj is None:
+            items, next_cursor = await list_outfits(limit=limit, cursor=cursor)
+            return OutfitPage(items=items, next_cursor=next_cursor)
+        docs, next_cursor = await list_outfit_docs(limit=limit, cursor=cursor, projection=proj)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if fields.strip() == SUMMARY:
+        return OutfitSummaryPage(items=docs, next_cursor=next_cursor)
+    # arbitrary field lists have no response model
+    return JSONResponse({"items": [sparse(d) for d in docs], "next_cursor": next_cursor})
+
+@router.get("/catalog/stats")
+async def catalog_stats_route():
+    """Size and memory footprint of the in-memory recommendation catalog"""
+    snapshot = catalog.current()
+    if snapshot is None:
+        return {"loaded": False, "outfits": 0}
+    # memory figures are measured on full loads (see catalog_service); the count is live
+    return {"loaded": True, "stamp": snapshot.stamp, "loaded_at": snapshot.loaded_at, **snapshot.memory,
+            "outfits": len(snapshot)}
+
+@router.post("/import")
+async def import_outfits_route(
+    request: Request,
+    chunk_size: int = 500,
+    max_errors: int = 100,
+    _: None = Depends(require_catalog_admin),
+):
+    """Bulk import from an NDJSON body (one outfit per line), written in unordered chunks"""
+    return await import_ndjson(
+        request.stream(), chunk_size=min(5000, max(1, chunk_size)), max_errors=max(0, max_errors)
+    )
+
+@router.get("/export")
+async def export_outfits_route(
+    batch_size: int = 500,
+    include_inactive: bool = False,
+    _: None = Depends(require_catalog_admin),
+):
+    """The catalog as streamed NDJSON (re-importable through /import)"""
+    return StreamingResponse(
+        export_ndjson(batch_size=min(5000, max(1, batch_size)), include_inactive=include_inactive),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="outfits.ndjson"'},
+    )
 
 @router.get("/{outfit_id}", response_model=Outfit)
 async def get_outfit_route(outfit_id: str):
@@ -1,29 +1,45 @@
 # routes/recs.py
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 import asyncio
 import os
 from models.recs import CreateRecommendation, Recommendation, ItemWithLinks, ProductLink
 from services.search_service import find_links_for_item
 from services.recs_processor import process_recommendation
-from db import get_collection
-from auth.dependencies import get_current_user  # returns your User model
+from services import recs_events
+from database import get_collection
+from dependencies.session_dep import get_or_create_session
+from models.session import SessionDoc
 from pymongo import ReturnDocument
 
 router = APIRouter(prefix="/api/recs", tags=["recommendations"])
 
 RECS = "recommendations"
+# "true" keeps the old behaviour of enriching inside the web worker (single-box/dev).
+# Otherwise pending docs are picked up by `python cli.py recs-worker`.
+RECS_PROCESS_INLINE = os.getenv("RECS_PROCESS_INLINE", "false").lower() == "true"
+RECS_LONG_POLL_MAX_SECONDS = 30
+RECS_SSE_KEEPALIVE_SECONDS = 15
+
+# --- Helper: require logged-in user via session.user_id ---
+def _require_user_id(session: SessionDoc) -> ObjectId:
+    if not session.user_id:
+        raise HTTPException(status_code=401, detail="Login required")
+    return session.user_id
 
 @router.post("", response_model=Recommendation)
 async def create_recommendation(
     body: CreateRecommendation,
     background: BackgroundTasks,
-    user = Depends(get_current_user)
+    session: SessionDoc = Depends(get_or_create_session)
 ):
+    user_id = _require_user_id(session)
     coll = get_collection(RECS)
     rec = Recommendation(
-        user_id=user.id,
+        user_id=user_id,
         prompt=body.prompt,
         items=[ItemWithLinks(**i.model_dump()) for i in body.items],
         status="pending"
@@ -31,26 +47,120 @@ async def create_recommendation(
     res = await coll.insert_one(rec.model_dump(by_alias=True))
     rec_id = res.inserted_id
 
-    background.add_task(process_recommendation, rec_id, user.id)
-    # immediate response so UI can poll
-    inserted = await coll.find_one({"_id": rec_id})
-    return Recommendation.model_validate(inserted)
+    if RECS_PROCESS_INLINE:
+        background.add_task(process_recommendation, rec_id, user_id)
+    # the pending doc is the job; respond immediately so UI can poll
+    return rec
 
 @router.get("/{rec_id}", response_model=Recommendation)
-async def get_recommendation(rec_id: str, user = Depends(get_current_user)):
+async def get_recommendation(rec_id: str, session: SessionDoc = Depends(get_or_create_session)):
+    user_id = _require_user_id(session)
     coll = get_collection(RECS)
-    doc = await coll.find_one({"_id": ObjectId(rec_id), "user_id": user.id})
+    doc = await coll.find_one({"_id": ObjectId(rec_id), "user_id": user_id})
     if not doc:
         raise HTTPException(404, "Not found")
     return Recommendation.model_validate(doc)
 
 @router.post("/{rec_id}/refresh", response_model=Recommendation)
-async def refresh_recommendation(rec_id: str, background: BackgroundTasks, user = Depends(get_current_user)):
+async def refresh_recommendation(rec_id: str, background: BackgroundTasks, session: SessionDoc = Depends(get_or_create_session)):
+    user_id = _require_user_id(session)
     coll = get_collection(RECS)
-    doc = await coll.find_one({"_id": ObjectId(rec_id), "user_id": user.id})
+    doc = await coll.find_one({"_id": ObjectId(rec_id), "user_id": user_id})
     if not doc:
         raise HTTPException(404, "Not found")
-    await coll.update_one({"_id": doc["_id"]}, {"$set": {"status": "pending", "updated_at": datetime.utcnow()}})
-    background.add_task(process_recommendation, doc["_id"], user.id)
+    await coll.update_one(
+        {"_id": doc["_id"]},
+        {"$set": {"status": "pending", "attempts": 0, "items.$[].status": "pending",
+                  "meta.items_done": 0, "meta.items_failed": 0, "updated_at": datetime.utcnow()},
+         "$unset": {"next_attempt_at": "", "meta.error": "", "meta.dead_lettered": ""}}
+    )
+    if RECS_PROCESS_INLINE:
+        background.add_task(process_recommendation, doc["_id"], user_id)
     refreshed = await coll.find_one({"_id": doc["_id"]})
     return Recommendation.model_validate(refreshed)
+
+def _is_newer(doc: dict, since: Optional[datetime]) -> bool:
+    if doc.get("status") != "pending":
+        return True
+    if since is None:
+        return False
+    if since.tzinfo is not None:
+        # stored timestamps are naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return doc.get("updated_at") is not None and doc["updated_at"] > since
+
+@router.get("/{rec_id}/wait", response_model=Recommendation)
+async def wait_for_recommendation(
+    rec_id: str,
+    since: Optional[datetime] = Query(None, description="updated_at of the copy the client already has"),
+    timeout: float = Query(25, ge=0, le=RECS_LONG_POLL_MAX_SECONDS),
+    session: SessionDoc = Depends(get_or_create_session),
+):
+    """
+    Long-poll: returns as soon as the rec is newer than `since` (or no longer
+    pending), otherwise holds the request until it changes or `timeout` passes.
+    """
+    user_id = _require_user_id(session)
+    coll = get_collection(RECS)
+    oid = ObjectId(rec_id)
+    # subscribe before reading so an update landing in between isn't missed
+    with recs_events.bus.subscribe(rec_id) as updates:
+        doc = await coll.find_one({"_id": oid, "user_id": user_id})
+        if not doc:
+            raise HTTPException(404, "Not found")
+        if not _is_newer(doc, since):
+            try:
+                doc = await recs_events.wait_for_change(
+                    updates, lambda: coll.find_one({"_id": oid}), doc.get("updated_at"), timeout
+                ) or doc
+            except asyncio.TimeoutError:
+                pass
+    return Recommendation.model_validate(doc)
+
+@router.get("/{rec_id}/events")
+async def stream_recommendation(rec_id: str, request: Request, session: SessionDoc = Depends(get_or_create_session)):
+    """
+    Server-Sent Events: one `update` event with the current rec, then one per
+    change (status, each item's links) until it leaves `pending`.
+    """
+    user_id = _require_user_id(session)
+    coll = get_collection(RECS)
+    oid = ObjectId(rec_id)
+    doc = await coll.find_one({"_id": oid, "user_id": user_id})
+    if not doc:
+        raise HTTPException(404, "Not found")
+
+    def _event(d: dict) -> str:
+        return f"event: update\ndata: {Recommendation.model_validate(d).model_dump_json(by_alias=True)}\n\n"
+
+    async def events():
+        current = doc
+        with recs_events.bus.subscribe(rec_id) as updates:
+            if current.get("status") == "pending":
+                # catch a write that landed between the first read and subscribing
+                current = await coll.find_one({"_id": oid}) or current
+            last_seen = current.get("updated_at")
+            yield _event(current)
+
+            while current.get("status") == "pending":
+                if await request.is_disconnected():
+                    return
+                try:
+                    current = await recs_events.wait_for_change(
+                        updates, lambda: coll.find_one({"_id": oid}), last_seen, RECS_SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if not current:
+                    return
+                if current.get("updated_at") == last_seen:
+                    continue  # same write reported by both feeds
+                last_seen = current.get("updated_at")
+                yield _event(current)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,15 @@
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dependencies.session_dep import get_or_create_session
 from models.session import SessionDoc
 from services.user_outfit_service import UserOutfitService
+from services.pagination import InvalidCursor
+from services.fieldsets import SUMMARY, InvalidFields, projection, sparse
+from models.user_outfit import USER_OUTFIT_FIELDS, USER_OUTFIT_FIELDSETS, UserOutfitSummary
+from services.session_service import persist_session
 from services.recommendation_engine import RecommendationEngine
 from database import get_database
 
@@ -22,23 +27,58 @@ async def list_outfits(
     favorite: Optional[bool] = None,
     limit: int = 50,
     skip: int = 0,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
     session: SessionDoc = Depends(get_or_create_session),
 ):
-
+    """
+    `fields=summary` returns slim cards without the outfit snapshot;
+    `fields=title,outfit.items,...` returns only the named fields.
+    Without `fields`, items are full UserOutfit documents.
+    """
     logging.info("we are here in list outfits  ")
     if not session.user_id and not session.session_id:
         raise HTTPException(400, "No active session")
+    try:
+        # created_at and _id always come back: the keyset cursor is built from them
+        proj = projection(fields, USER_OUTFIT_FIELDS, USER_OUTFIT_FIELDSETS, always=("_id", "created_at"))
+    except InvalidFields as e:
+        raise HTTPException(400, str(e))
 
     svc = UserOutfitService(get_database())
-    items = await svc.list_outfits(
+    owner = dict(
         user_id=str(session.user_id) if session.user_id else None,
         session_id=session.session_id if not session.user_id else None,
-        favorite=favorite,
-        limit=limit,
-        skip=skip,
     )
+    if stream:
+        # encoded from the Mongo cursor as it's read; larger pages stay cheap
+        try:
+            body = svc.stream_outfits(**owner, favorite=favorite, limit=limit, skip=skip, cursor=cursor, projection=proj)
+        except InvalidCursor:
+            raise HTTPException(400, "Invalid cursor")
+        return StreamingResponse(body, media_type="application/json")
+    try:
+        if proj is None:
+            items, next_cursor = await svc.list_outfits(
+                **owner,
+                favorite=favorite,
+                limit=limit,
+                skip=skip,
+                cursor=cursor,
+            )
+        else:
+            docs, next_cursor = await svc.list_outfit_docs(
+                **owner, favorite=favorite, limit=limit, skip=skip, cursor=cursor, projection=proj
+            )
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
+    if proj is not None:
+        if fields.strip() == SUMMARY:
+            return {"items": [UserOutfitSummary.model_validate(d).model_dump(by_alias=True) for d in docs], "next_cursor": next_cursor}
+        return {"items": [sparse(d) for d in docs], "next_cursor": next_cursor}
     logging.info(f"Listed {len(items)} outfits for user_id={session.user_id} session_id={session.session_id}")  
-    return {"items": [i.model_dump(by_alias=True) for i in items]}
+    return {"items": [i.model_dump(by_alias=True) for i in items], "next_cursor": next_cursor}
 
 @router.post("/generate")
 async def generate_and_save(
@@ -57,6 +97,7 @@ async def generate_and_save(
     outfits: List[Dict[str, Any]] = await engine.generate_outfits_for_session(ctx_session_id, overrides=body.overrides or {})
 
     # 2) save snapshots to history
+    await persist_session(session)
     svc = UserOutfitService(get_database())
     saved = await svc.save_generated_outfits(
         outfits=outfits,
@@ -98,11 +139,35 @@ async def delete_outfit(
         raise HTTPException(404, "Outfit not found")
     return {"ok": True}
 
+@router.get("/{outfit_id}/similar")
+async def similar_outfits(
+    outfit_id: str,
+    scope: Literal["catalog", "saved"] = "catalog",
+    limit: int = 10,
+    session: SessionDoc = Depends(get_or_create_session),
+):
+    """Outfits most like one of the caller's saved outfits (catalog or their own history)."""
+    svc = UserOutfitService(get_database())
+    try:
+        items = await svc.similar(
+            outfit_id=outfit_id,
+            user_id=str(session.user_id) if session.user_id else None,
+            session_id=session.session_id if not session.user_id else None,
+            scope=scope,
+            limit=limit,
+        )
+    except LookupError:
+        raise HTTPException(503, "Similarity index not built yet")
+    if items is None:
+        raise HTTPException(404, "Outfit not found")
+    return {"items": items}
+
 @router.post("/save-one")
 async def save_one(
     outfit: Dict[str, Any],
     session: SessionDoc = Depends(get_or_create_session),
 ):
+    await persist_session(session)
     svc = UserOutfitService(get_database())
     saved = await svc.save_generated_outfits(
         outfits=[outfit],
@@ -1,11 +1,15 @@
 # routes/user_routes.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse
 from database import get_database
-from models.user import User
+from models.user import User, UserSummary, USER_FIELDS, USER_FIELDSETS
+from services.fieldsets import SUMMARY, InvalidFields, projection, sparse
 from services.user_service import (
-    get_user_by_id, create_user, patch_section, set_avatar_url, update_user_fields
+    get_user_by_id, get_user_fields, get_user_summary, create_user, patch_section, set_avatar_url,
+    update_user_fields, get_style_features
 )
+from services.recommendation_engine import RecommendationEngine
 from models.session import SessionDoc
 from dependencies.session_dep import get_or_create_session
 
@@ -18,10 +22,37 @@ def _require_user_id(session: SessionDoc) -> str:
         raise HTTPException(status_code=401, detail="Login required")
     return str(session.user_id)
 
-@router.get("/me", response_model=User)
-async def me(session: SessionDoc = Depends(get_or_create_session)) -> User:
+@router.get("/me", response_model=Union[User, UserSummary])
+async def me(fields: Optional[str] = None, session: SessionDoc = Depends(get_or_create_session)):
+    """Full profile; fields=summary -> UserSummary, fields=name,style,... -> only those fields."""
     user_id = _require_user_id(session)
-    return await get_user_by_id(user_id)
+    try:
+        proj = projection(fields, USER_FIELDS, USER_FIELDSETS)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if proj is None:
+        return await get_user_by_id(user_id)
+    if fields.strip() == SUMMARY:
+        found = await get_user_summary(user_id)
+    else:
+        found = await get_user_fields(user_id, proj)
+        found = JSONResponse(sparse(found)) if found else None
+    if found is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return found
+
+@router.get("/me/recommendations")
+async def my_recommendations(
+    limit: int = 6,
+    session: SessionDoc = Depends(get_or_create_session),
+):
+    """Catalog picks scored from the user's stored style vector (no quiz re-parsing)"""
+    user_id = _require_user_id(session)
+    features = await get_style_features(user_id)
+    if features is None:
+        raise HTTPException(404, "No style profile yet; complete the quiz or your style settings")
+    items = await RecommendationEngine().recommend(features, k=min(24, max(1, limit)))
+    return {"items": items}
 
 @router.patch("/profile")
 async def patch_profile(
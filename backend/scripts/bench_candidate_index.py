@@ -0,0 +1,102 @@
+# scripts/bench_candidate_index.py
+"""
+Full scan vs. inverted-index candidate retrieval for catalog recommendations.
+
+Both paths return the same top 6 (checked on every query); "full" scores the
+whole catalog, "indexed" scores only the style/occasion candidates and falls
+back to a full scan when they can't decide the top k on their own.
+"fallback" is the share of queries that needed that full scan.
+
+    cd backend && python scripts/bench_candidate_index.py --sizes 10000 100000 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.quiz import QuizResponses  # noqa: E402
+from services.outfit_scoring import OutfitScorer  # noqa: E402
+from services.recommendation_engine import OCCASION_MAPPING, ProfileFeatures  # noqa: E402
+
+QUIZ_STYLES = ["Minimalist", "Casual", "Smart Casual", "Formal", "Streetwear", "Sporty", "Bohemian", "Trendy"]
+# a growing catalog carries many more style tags than the quiz offers
+CATALOG_STYLES = QUIZ_STYLES + [f"tag-{i}" for i in range(60)]
+CATALOG_OCCASIONS = sorted({o for occ in OCCASION_MAPPING.values() for o in occ}) + [f"occ-{i}" for i in range(30)]
+BODY_TYPES = ["All", "Slim", "Athletic", "Average", "Curvy", "Plus-size"]
+SEASONS = ["Spring", "Summer", "Fall", "Winter", "All"]
+GOALS = ["Look more confident", "Save time", "Discover my style", "Upgrade my wardrobe"]
+
+
+def _catalog(n: int, rng: random.Random):
+    return [
+        {
+            "id": i,
+            "title": f"Outfit {i}",
+            "occasion": rng.choice(CATALOG_OCCASIONS),
+            "description": rng.choice(["A versatile everyday look.", "Sharp and polished.", "Bold statement."]),
+            "confidence": rng.randint(75, 99),
+            "style_types": rng.sample(CATALOG_STYLES, rng.randint(1, 3)),
+            "body_types": ["All"] if rng.random() < 0.5 else rng.sample(BODY_TYPES[1:], rng.randint(1, 3)),
+            "seasons": rng.sample(SEASONS, rng.randint(1, 2)),
+        }
+        for i in range(n)
+    ]
+
+
+def _queries(count: int, rng: random.Random):
+    return [
+        ProfileFeatures.from_responses(QuizResponses(
+            current_style=rng.sample(QUIZ_STYLES, rng.randint(1, 2)),
+            help_occasions=rng.sample(list(OCCASION_MAPPING), rng.randint(1, 2)),
+            body_type=rng.choice(BODY_TYPES[1:]),
+            goals=rng.sample(GOALS, rng.randint(0, 2)),
+        ))
+        for _ in range(count)
+    ]
+
+
+def _median_ms(fn, queries, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        for f in queries:
+            t = time.perf_counter()
+            fn(f)
+            samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=11)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    queries = _queries(args.queries, rng)
+    print(f"{'outfits':>9} | {'candidates':>10} | {'fallback':>8} | {'full ms':>8} | {'indexed ms':>10} | speedup")
+    for n in args.sizes:
+        scorer = OutfitScorer(_catalog(n, rng))
+        fallbacks = 0
+        for f in queries:
+            assert scorer.top_k(f) == scorer.top_k(f, use_index=False), "indexed results differ"
+            cand = scorer.candidates(f)
+            score = scorer.scores(f, cand)
+            fallbacks += int((score > max(50, scorer._outsider_bound(f))).sum() < 6)
+        share = statistics.fmean(len(scorer.candidates(f)) / n for f in queries)
+
+        full = _median_ms(lambda f: scorer.top_k(f, use_index=False), queries, args.repeat)
+        indexed = _median_ms(lambda f: scorer.top_k(f), queries, args.repeat)
+        print(
+            f"{n:>9} | {share:>9.1%} | {fallbacks / len(queries):>7.0%} | "
+            f"{full:>8.3f} | {indexed:>10.3f} | {full / indexed:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# scripts/bench_complete_quiz.py
+"""
+Quiz completion latency: the previous serial call pattern of complete_quiz
+(generate_recommendations, analyze_style_profile, calculate_confidence_score,
+each re-deriving everything from QuizResponses) vs. the single
+analyze_profile pipeline.
+
+--catalog-ms simulates the catalog read (a Mongo round trip in production);
+--outfits grows the catalog by repeating the curated outfits.
+
+    cd backend && python scripts/bench_complete_quiz.py --runs 2000 --outfits 600 --catalog-ms 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.quiz import QuizResponses  # noqa: E402
+from services.recommendation_engine import RecommendationEngine  # noqa: E402
+
+ANSWERS = QuizResponses(
+    full_name="Sam",
+    gender_identity="Non-binary",
+    city="Berlin",
+    body_type="Athletic",
+    clothing_size="M",
+    current_style=["Minimalist", "Smart Casual"],
+    interested_styles=["Smart Casual", "Streetwear"],
+    favorite_colors=["Black", "Navy", "White"],
+    help_occasions=["Work/office", "Dates"],
+    goals=["Look more confident", "Save time"],
+)
+
+
+def _engine(outfits: int, catalog_ms: float) -> RecommendationEngine:
+    engine = RecommendationEngine()
+    base = asyncio.run(engine._get_outfit_database())
+    catalog = [dict(o, id=i) for i, o in enumerate((base * (outfits // len(base) + 1))[:outfits])]
+
+    async def get_outfit_database():
+        if catalog_ms:
+            await asyncio.sleep(catalog_ms / 1000)
+        return catalog
+
+    engine._get_outfit_database = get_outfit_database
+    return engine
+
+
+async def _serial(engine: RecommendationEngine) -> None:
+    await engine.generate_recommendations(ANSWERS)
+    await engine.analyze_style_profile(ANSWERS)
+    await engine.calculate_confidence_score(ANSWERS)
+
+
+async def _pipeline(engine: RecommendationEngine) -> None:
+    await engine.analyze_profile(ANSWERS)
+
+
+async def _run(name: str, fn, engine: RecommendationEngine, runs: int) -> None:
+    for _ in range(min(50, runs)):  # warm up
+        await fn(engine)
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        await fn(engine)
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:>9}: p50 {statistics.median(samples):7.3f} ms | p99 {p99:7.3f} ms | mean {statistics.fmean(samples):7.3f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=2000)
+    ap.add_argument("--outfits", type=int, default=6)
+    ap.add_argument("--catalog-ms", type=float, default=0.0)
+    args = ap.parse_args()
+
+    engine = _engine(args.outfits, args.catalog_ms)
+    print(f"outfits={args.outfits}, catalog latency={args.catalog_ms} ms, runs={args.runs}")
+    for name, fn in (("serial", _serial), ("pipeline", _pipeline)):
+        asyncio.run(_run(name, fn, engine, args.runs))
+
+
+if __name__ == "__main__":
+    main()
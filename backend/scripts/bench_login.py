@@ -0,0 +1,71 @@
+# scripts/bench_login.py
+"""
+Login throughput vs. event-loop responsiveness, inline bcrypt vs. offloaded.
+
+Fires CONCURRENCY password verifications (what login_user does per request)
+while a probe coroutine measures how late a 5 ms sleep wakes up, i.e. the
+latency an unrelated request on the same worker would see.
+
+    cd backend && python scripts/bench_login.py --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.auth_service import pwd, verify_password  # noqa: E402
+
+
+async def _probe(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append((time.perf_counter() - t - 0.005) * 1000)
+
+
+async def _run(mode: str, logins: int, concurrency: int, stored: str) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with sem:
+            if mode == "inline":
+                pwd.verify("correct horse", stored)   # old behaviour: blocks the loop
+                await asyncio.sleep(0)
+            else:
+                await verify_password("correct horse", stored)
+
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(_probe(stop, lags))
+    t0 = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else 0.0
+    print(
+        f"{mode:>9}: {logins / elapsed:7.1f} logins/s | "
+        f"loop lag p50 {statistics.median(lags) if lags else 0:7.1f} ms, "
+        f"p99 {p99:7.1f} ms, max {lags[-1] if lags else 0:7.1f} ms"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=64)
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+
+    stored = pwd.hash("correct horse")
+    print(f"bcrypt rounds={stored.split('$')[2]}, logins={args.logins}, concurrency={args.concurrency}")
+    for mode in ("inline", "offloaded"):
+        asyncio.run(_run(mode, args.logins, args.concurrency, stored))
+
+
+if __name__ == "__main__":
+    main()
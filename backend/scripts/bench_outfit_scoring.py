@@ -0,0 +1,96 @@
+# scripts/bench_outfit_scoring.py
+"""
+Scalar vs. vectorized outfit scoring on synthetic catalogs.
+
+"scalar" is the per-outfit loop (score_outfit for every outfit, stable sort,
+top 6); "vector" is OutfitScorer.recommend on a catalog encoded once (encode
+time reported separately). Every run checks both return identical results.
+
+    cd backend && python scripts/bench_outfit_scoring.py --sizes 1000 10000 100000 300000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.quiz import QuizResponses  # noqa: E402
+from services.outfit_scoring import OutfitScorer  # noqa: E402
+from services.recommendation_engine import ProfileFeatures, score_outfit  # noqa: E402
+
+STYLES = ["Minimalist", "Casual", "Smart Casual", "Formal", "Streetwear", "Sporty",
+          "Bohemian", "Trendy", "Vintage", "Preppy", "Athletic"]
+OCCASIONS = ["Work", "Casual", "Date", "Gym", "Travel", "Party", "Business", "Evening", "Weekend"]
+BODY_TYPES = ["All", "Slim", "Athletic", "Average", "Curvy", "Plus-size"]
+QUERIES = [
+    QuizResponses(current_style=["Minimalist", "Smart Casual"], help_occasions=["Work/office", "Dates"],
+                  body_type="Athletic", goals=["Look more confident", "Save time"]),
+    QuizResponses(current_style=["Streetwear"], help_occasions=["Casual daily wear"], body_type="Curvy",
+                  goals=["Discover my style"]),
+    QuizResponses(current_style=["Formal", "Trendy"], help_occasions=["Events/parties"], goals=["Save time"]),
+]
+
+
+def _catalog(n: int, rng: random.Random):
+    return [
+        {
+            "id": i,
+            "title": f"Outfit {i}",
+            "occasion": rng.choice(OCCASIONS),
+            "description": rng.choice(["A versatile everyday look.", "Sharp and polished.", "Bold statement."]),
+            "confidence": rng.randint(75, 99),
+            "style_types": rng.sample(STYLES, rng.randint(1, 3)),
+            "body_types": ["All"] if rng.random() < 0.6 else rng.sample(BODY_TYPES[1:], rng.randint(1, 3)),
+        }
+        for i in range(n)
+    ]
+
+
+def _scalar(outfits, features):
+    scored = []
+    for outfit in outfits:
+        score = score_outfit(outfit, features)
+        if score > 50:
+            scored.append({**outfit, "match_score": score})
+    scored.sort(key=lambda x: x["match_score"], reverse=True)
+    return scored[:6]
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    features = [ProfileFeatures.from_responses(q) for q in QUERIES]
+    print(f"{'outfits':>9} | {'encode ms':>9} | {'scalar ms':>9} | {'vector ms':>9} | speedup")
+    for n in args.sizes:
+        outfits = _catalog(n, rng)
+        t = time.perf_counter()
+        scorer = OutfitScorer(outfits)
+        encode_ms = (time.perf_counter() - t) * 1000
+
+        for f in features:
+            assert _scalar(outfits, f) == scorer.recommend(f), "vectorized results differ"
+
+        scalar = statistics.fmean(_time(lambda: _scalar(outfits, f), args.repeat) for f in features)
+        vector = statistics.fmean(_time(lambda: scorer.recommend(f), args.repeat) for f in features)
+        print(f"{n:>9} | {encode_ms:>9.1f} | {scalar:>9.2f} | {vector:>9.3f} | {scalar / vector:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# scripts/bench_outfit_similarity.py
+"""
+"More like this" query latency and recall on the memory-mapped IVF index.
+
+Embeds --embed synthetic outfits with OutfitEmbedder (throughput reported),
+then fills the rest up to each size with jittered copies of those vectors
+(embedding a million texts would only time the tokenizer). Each size is
+built into a temporary OUTFIT_INDEX_DIR and queried with held-out outfits;
+recall@k is measured against an exact scan of the same vectors.
+
+    cd backend && python scripts/bench_outfit_similarity.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.outfit_embeddings import OutfitEmbedder, VectorIndex, write_index  # noqa: E402
+
+ADJ = ["relaxed", "tailored", "oversized", "cropped", "linen", "wool", "denim", "leather", "pleated", "knit",
+       "striped", "neutral", "bold", "minimal", "vintage", "sporty", "classic", "summer", "winter", "evening"]
+PIECES = ["blazer", "trousers", "jeans", "shirt", "tee", "sneakers", "loafers", "boots", "dress", "skirt",
+          "jacket", "coat", "hoodie", "chinos", "sweater", "cardigan", "shorts", "heels", "scarf", "bag"]
+BRANDS = ["Uniqlo", "COS", "Zara", "Everlane", "Levi's", "Nike", "Adidas", "Mango", "H&M", "Arket",
+          "Massimo Dutti", "A.P.C.", "Acne Studios", "New Balance", "Madewell", "J.Crew"]
+OCCASIONS = ["office", "weekend", "date night", "travel", "gym", "party", "brunch", "wedding guest"]
+
+
+def _outfit(rng: random.Random):
+    items = [{"name": f"{rng.choice(ADJ)} {rng.choice(PIECES)}", "brand": rng.choice(BRANDS)}
+             for _ in range(rng.randint(3, 5))]
+    return {
+        "title": f"{rng.choice(ADJ).title()} {rng.choice(OCCASIONS)} look",
+        "description": f"{items[0]['name'].capitalize()} with {items[1]['name']}, "
+                       f"easy for {rng.choice(OCCASIONS)} and {rng.choice(OCCASIONS)}.",
+        "items": items,
+    }
+
+
+def _grow(base: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    out = np.empty((n, base.shape[1]), dtype=np.float32)
+    for s in range(0, n, 65536):
+        e = min(n, s + 65536)
+        block = base[rng.integers(0, len(base), e - s)] + rng.normal(0, 0.03, (e - s, base.shape[1])).astype(np.float32)
+        out[s:e] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--embed", type=int, default=20_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    nrng = np.random.default_rng(args.seed)
+    docs = [_outfit(rng) for _ in range(args.embed + args.queries)]
+    embedder = OutfitEmbedder()
+    t = time.perf_counter()
+    vectors = embedder.fit_transform(docs[:args.embed])
+    print(f"embedded {args.embed} outfits at {args.embed / (time.perf_counter() - t):,.0f}/s, dim {embedder.dim}")
+    queries = embedder.transform(docs[args.embed:])
+
+    print(f"{'vectors':>9} | {'build s':>7} | {'nprobe':>6} | {'recall':>6} | {'p50 ms':>7} | {'p99 ms':>7} | {'exact ms':>8}")
+    for n in args.sizes:
+        data = _grow(vectors, n, nrng)
+        ids = [str(i) for i in range(n)]
+        with tempfile.TemporaryDirectory() as root:
+            t = time.perf_counter()
+            path = write_index("bench", ids, data, embedder, root=Path(root))
+            build_s = time.perf_counter() - t
+            index = VectorIndex(path)
+            exact = []
+            t = time.perf_counter()
+            for q in queries:
+                sims = data @ q
+                exact.append({str(i) for i in np.argpartition(-sims, args.k - 1)[:args.k]})
+            exact_ms = (time.perf_counter() - t) * 1000 / len(queries)
+
+            for nprobe in args.nprobe:
+                index.search(queries[0], args.k, nprobe=nprobe)  # page the lists in
+                samples, hits = [], 0
+                for q, truth in zip(queries, exact):
+                    t = time.perf_counter()
+                    res = index.search(q, args.k, nprobe=nprobe)
+                    samples.append((time.perf_counter() - t) * 1000)
+                    hits += len(truth & {oid for oid, _ in res})
+                samples.sort()
+                p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+                print(
+                    f"{n:>9} | {build_s:>7.1f} | {nprobe:>6} | {hits / (args.k * len(queries)):>6.1%} | "
+                    f"{statistics.median(samples):>7.3f} | {p99:>7.3f} | {exact_ms:>8.2f}"
+                )
+            del index
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,18 @@ from routes.auth_routes import router as auth_router
 from routes.user_outfit_routes import router as user_outfit_router
 from routes.generation_routes import router as generation_router
 from routes.auth_google_routes import router as auth_google_router
-from database import connect_to_mongo, close_mongo_connection
+from routes.recs import router as recs_router
+from database import connect_to_mongo, close_mongo_connection, get_database
+from services.recs_events import change_stream as recs_change_stream
+from services.session_service import session_cache, touch_buffer as session_touch_buffer
+from services.user_service import user_cache
+from services.google_jwks import close_http_client as close_google_http_client
+from services.maintenance import scheduler as maintenance_scheduler
+from services.catalog_service import catalog
+from services.quiz_service import QuizService, QUIZ_CLEANUP_INTERVAL_SECONDS
+from services.daily_suggestions import (
+    DAILY_SUGGESTIONS_ENABLED, DAILY_SUGGESTIONS_INTERVAL_SECONDS, run_daily_suggestions
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,18 +38,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Periodic cleanup that TTL indexes can't express
+maintenance_scheduler.register(
+    "quiz_sessions_cleanup",
+    QUIZ_CLEANUP_INTERVAL_SECONDS,
+    lambda: QuizService(get_database()).cleanup_old_sessions(),
+)
+if DAILY_SUGGESTIONS_ENABLED:
+    # every API worker registers it; the day's lease lets only one of them run it at a time,
+    # and the checkpoint makes later runs resume an interrupted day or no-op once it's done
+    maintenance_scheduler.register(
+        "daily_suggestions", DAILY_SUGGESTIONS_INTERVAL_SECONDS, run_daily_suggestions
+    )
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting BeStyle.AI Backend...")
     await connect_to_mongo()
+    recs_change_stream.start()
+    session_touch_buffer.start()
+    session_cache.start()
+    user_cache.start()
+    maintenance_scheduler.start()
+    catalog.start()
     logger.info("Backend startup complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down BeStyle.AI Backend...")
+    await catalog.stop()
+    await maintenance_scheduler.stop()
+    await recs_change_stream.stop()
+    await session_touch_buffer.stop()
+    await session_cache.stop()
+    await user_cache.stop()
+    await close_google_http_client()
     await close_mongo_connection()
     logger.info("Backend shutdown complete")
 
@@ -80,6 +117,7 @@ app.include_router(user_router)
 app.include_router(user_outfit_router)
 app.include_router(generation_router)
 app.include_router(auth_google_router)
+app.include_router(recs_router)
 
 # CORS middleware
 app.add_middleware(
@@ -1,4 +1,8 @@
-from typing import Optional, Dict, Any
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, TypeVar
 from datetime import datetime
 from fastapi import HTTPException
 from passlib.context import CryptContext
@@ -7,9 +11,50 @@ from bson import ObjectId
 from database import get_collection
 from models.user import User
 from services.session_service import attach_user
+from services.user_service import change_password_hash
+
+logger = logging.getLogger(__name__)
 
 USERS = "users"
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt cost. Hashes with any other cost are transparently re-hashed on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop.
+# At most PASSWORD_HASH_MAX_PENDING calls may be queued/running; beyond that callers
+# wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds and then get a 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+
+T = TypeVar("T")
+
+async def _offload(fn: Callable[..., T], *args) -> T:
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(503, "Authentication is busy, please retry", headers={"Retry-After": "1"})
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def hash_password(password: str) -> str:
+    return await _offload(pwd.hash, password)
+
+async def verify_password(password: str, password_hash: str) -> "tuple[bool, Optional[str]]":
+    """(ok, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+    return await _offload(pwd.verify_and_update, password, password_hash)
 
 def _norm_email(email: str) -> str:
     return email.strip().lower()
@@ -39,7 +84,7 @@ async def signup_user(payload: Dict[str, Any], sid: Optional[str]) -> User:
         name=name,
     )
     doc = user.model_dump(by_alias=True)
-    doc["auth"]["password_hash"] = pwd.hash(password)
+    doc["auth"]["password_hash"] = await hash_password(password)
     await coll.insert_one(doc)
 
     # link session to this user
@@ -50,8 +95,15 @@ async def signup_user(payload: Dict[str, Any], sid: Optional[str]) -> User:
 
 async def login_user(email: str, password: str, sid: Optional[str]) -> User:
     user = await _find_by_email(email)
-    if not user or not user.auth.password_hash or not pwd.verify(password, user.auth.password_hash):
+    if not user or not user.auth.password_hash:
+        raise HTTPException(401, "Invalid email or password")
+    ok, new_hash = await verify_password(password, user.auth.password_hash)
+    if not ok:
         raise HTTPException(401, "Invalid email or password")
+    if new_hash:
+        # cost changed since this hash was made; upgrade it while we have the password
+        await change_password_hash(str(user.id), new_hash)
+        user.auth.password_hash = new_hash
 
     # link session to this user (upgrade anon -> logged in)
     if sid:
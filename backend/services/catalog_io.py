@@ -0,0 +1,140 @@
+# services/catalog_io.py
+"""
+Bulk NDJSON import/export of the `outfits` catalog.
+
+Import reads one outfit per line from a byte stream and validates it
+against `Outfit`. Valid rows are written in chunks of `chunk_size` with one
+unordered `bulk_write`:
+
+  * a row with an `_id` (e.g. from an export) is upserted by `_id`, so
+    re-importing an export is idempotent;
+  * any other row is inserted.
+
+Bad JSON, validation failures and per-row write errors (e.g. duplicate
+keys) are reported by line number, and the other rows in the chunk still
+land. Every written row gets a fresh `updated_at` so the catalog snapshot
+picks it up on its next refresh.
+
+Export streams the catalog from a cursor in `_id` order (`batch_size` docs per
+round trip) in the same NDJSON shape, so an export can be re-imported as is.
+"""
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from database import get_collection
+from models.outfit import Outfit
+from services import json_stream
+
+logger = logging.getLogger(__name__)
+
+COLL = "outfits"
+IMPORT_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+_Op = Union[InsertOne, ReplaceOne]
+
+
+def _error(line: int, message: str) -> Dict[str, Any]:
+    return {"line": line, "error": message}
+
+
+def _parse(raw: bytes, line: int) -> Tuple[Optional[_Op], Optional[Dict[str, Any]]]:
+    try:
+        data = json_stream.loads(raw)
+    except ValueError as e:
+        return None, _error(line, f"invalid JSON: {e}")
+    if not isinstance(data, dict):
+        return None, _error(line, "expected a JSON object")
+    has_id = data.get("_id", data.get("id")) is not None
+    try:
+        outfit = Outfit.model_validate(data)
+    except ValidationError as e:
+        first = e.errors()[0]
+        loc = ".".join(str(p) for p in first["loc"])
+        return None, _error(line, f"{loc}: {first['msg']}" if loc else first["msg"])
+    doc = outfit.model_dump(by_alias=True)
+    doc["updated_at"] = datetime.utcnow()
+    return (ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) if has_id else InsertOne(doc)), None
+
+
+class _Report:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.received = self.inserted = self.upserted = self.replaced = self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, err: Dict[str, Any]) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(err)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted + self.upserted,
+            "updated": self.replaced,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _flush(coll, ops: List[_Op], line_nos: List[int], report: _Report) -> None:
+    if not ops:
+        return
+    try:
+        res = await coll.bulk_write(ops, ordered=False)
+        result = res.bulk_api_result
+    except BulkWriteError as e:
+        result = e.details
+        for we in result.get("writeErrors", []):
+            report.fail(_error(line_nos[we["index"]], we.get("errmsg", "write failed")))
+    report.inserted += result.get("nInserted", 0)
+    report.upserted += result.get("nUpserted", 0)
+    report.replaced += result.get("nModified", 0)
+
+
+async def import_ndjson(
+    body: AsyncIterator[bytes],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    max_errors: int = 100,
+) -> Dict[str, Any]:
+    """Import outfits from an NDJSON byte stream; returns counts and the first `max_errors` row errors."""
+    coll = get_collection(COLL)
+    report = _Report(max_errors)
+    ops: List[_Op] = []
+    line_nos: List[int] = []
+    line = 0
+    async for raw in json_stream.lines(body):
+        line += 1
+        if not raw.strip():
+            continue
+        report.received += 1
+        op, err = _parse(raw, line)
+        if err:
+            report.fail(err)
+            continue
+        ops.append(op)
+        line_nos.append(line)
+        if len(ops) >= chunk_size:
+            await _flush(coll, ops, line_nos, report)
+            ops, line_nos = [], []
+    await _flush(coll, ops, line_nos, report)
+    summary = report.as_dict()
+    logger.info(
+        f"Outfit import: {summary['received']} rows, {summary['inserted']} inserted, "
+        f"{summary['updated']} updated, {summary['failed']} failed"
+    )
+    return summary
+
+
+def export_ndjson(batch_size: int = EXPORT_BATCH_SIZE, include_inactive: bool = False) -> AsyncIterator[bytes]:
+    """The catalog as NDJSON chunks, streamed from a cursor."""
+    query = {} if include_inactive else {"is_active": {"$ne": False}}
+    cursor = get_collection(COLL).find(query).sort("_id", 1).batch_size(max(1, batch_size))
+    return json_stream.ndjson(cursor)
@@ -0,0 +1,248 @@
+# services/catalog_service.py
+"""
+In-memory snapshot of the active `outfits` catalog for recommendations.
+
+Scoring never reads Mongo: `catalog.current()` returns an immutable
+`CatalogSnapshot` (a tuple of read-only outfit mappings plus its encoded
+`OutfitScorer`). A background task loads the catalog at startup and then
+refreshes it incrementally every CATALOG_REFRESH_SECONDS:
+
+  * changed docs are found by `updated_at` (falling back to `created_at` for
+    docs written before outfits carried an update stamp); deactivated ones
+    (`is_active: false`) are dropped. The query includes the snapshot's own
+    stamp (`$gte`), since a write in that same millisecond may have landed
+    after the snapshot read; re-read docs identical to the snapshot's are skipped;
+  * hard deletes can't be seen by stamp, so the active count is compared
+    after applying changes and a mismatch triggers a full reload.
+
+Memory stats walk every outfit, so they're measured on full loads only;
+incremental snapshots carry the last measurement.
+
+Each refresh builds a new snapshot off the event loop and swaps the module
+reference in one assignment; readers keep whatever snapshot they started with.
+"""
+import asyncio
+import logging
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from database import get_collection
+from services.outfit_scoring import OutfitScorer, scorer_for
+
+logger = logging.getLogger(__name__)
+
+COLL = "outfits"
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "30"))
+
+# fields recommendations use; everything else stays in Mongo
+_FIELDS = ("title", "occasion", "description", "confidence", "color", "items",
+           "style_types", "body_types", "seasons")
+_PROJECTION = {f: 1 for f in _FIELDS + ("is_active", "created_at", "updated_at")}
+# low-cardinality strings shared across outfits
+_INTERNED = ("occasion", "color")
+_INTERNED_LISTS = ("style_types", "body_types", "seasons")
+
+_ACTIVE = {"is_active": {"$ne": False}}
+
+
+def _compact(doc: Dict[str, Any]) -> Mapping[str, Any]:
+    """Read-only, slimmed outfit in the shape the scorer and API expect."""
+    out: Dict[str, Any] = {"id": str(doc["_id"])}
+    for f in _FIELDS:
+        if f not in doc:
+            continue  # keep "missing" distinct from empty (e.g. body_types defaults to All)
+        v = doc[f]
+        if f in _INTERNED and isinstance(v, str):
+            v = sys.intern(v)
+        elif f in _INTERNED_LISTS and isinstance(v, list):
+            v = tuple(sys.intern(x) if isinstance(x, str) else x for x in v)
+        elif f == "items" and isinstance(v, list):
+            v = tuple(
+                {k: iv for k, iv in item.items() if iv is not None} if isinstance(item, dict) else item
+                for item in v
+            )
+        out[f] = v
+    return MappingProxyType(out)
+
+
+def _deep_sizeof(obj: Any, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        if isinstance(obj, MappingProxyType):
+            obj = dict(obj)  # proxy itself is tiny; count the dict it wraps
+            size += sys.getsizeof(obj)
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(x, seen) for x in obj)
+    return size
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    outfits: Tuple[Mapping[str, Any], ...]
+    scorer: OutfitScorer
+    # catalog order/key bookkeeping for incremental refresh
+    keys: Dict[str, Tuple[datetime, str]] = field(repr=False)
+    stamp: Optional[datetime]
+    loaded_at: datetime
+    memory: Dict[str, Any]
+
+    def __len__(self) -> int:
+        return len(self.outfits)
+
+
+def _memory_stats(outfits: Tuple[Mapping[str, Any], ...], scorer: OutfitScorer) -> Dict[str, Any]:
+    n = len(outfits)
+    objects = _deep_sizeof(outfits, set())
+    arrays = sum(a.nbytes for a in (
+        scorer.style_bits, scorer.body_bits, scorer.body_all,
+        scorer.occasion_code, scorer.confident, scorer.versatile,
+    ))
+    return {
+        "outfits": n,
+        "object_bytes": objects,
+        "scoring_array_bytes": arrays,
+        "bytes_per_outfit": round((objects + arrays) / n, 1) if n else 0,
+        "scoring_bytes_per_outfit": round(arrays / n, 1) if n else 0,
+    }
+
+
+def _build(
+    by_id: Dict[str, Mapping[str, Any]],
+    keys: Dict[str, Tuple[datetime, str]],
+    stamp: Optional[datetime],
+    memory: Optional[Dict[str, Any]] = None,
+) -> CatalogSnapshot:
+    """Runs in a worker thread: sort, encode and (without `memory`) measure the new snapshot."""
+    # stable catalog order (created_at, _id): score ties resolve the same way every time
+    outfits = tuple(by_id[i] for i in sorted(by_id, key=keys.__getitem__))
+    scorer = scorer_for(outfits)
+    now = datetime.utcnow()
+    return CatalogSnapshot(
+        outfits=outfits,
+        scorer=scorer,
+        keys=keys,
+        stamp=stamp,
+        loaded_at=now,
+        memory=memory if memory is not None else {**_memory_stats(outfits, scorer), "measured_at": now},
+    )
+
+
+def _doc_stamp(doc: Dict[str, Any]) -> Optional[datetime]:
+    return doc.get("updated_at") or doc.get("created_at")
+
+
+class CatalogService:
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """Latest snapshot, or None before the first load (or if the catalog is empty)."""
+        snap = self._snapshot
+        return snap if snap else None
+
+    async def load(self) -> CatalogSnapshot:
+        """Full reload of active outfits."""
+        coll = get_collection(COLL)
+        docs = [d async for d in coll.find(_ACTIVE, _PROJECTION)]
+        by_id, keys, stamp = {}, {}, None
+        for d in docs:
+            oid = str(d["_id"])
+            by_id[oid] = _compact(d)
+            keys[oid] = (d.get("created_at") or datetime.min, oid)
+            s = _doc_stamp(d)
+            if s and (stamp is None or s > stamp):
+                stamp = s
+        snap = await asyncio.to_thread(_build, by_id, keys, stamp)
+        self._swap(snap, f"loaded {len(snap)} outfits")
+        return snap
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Apply outfits changed since the last snapshot; full reload when deletes are detected."""
+        snap = self._snapshot
+        if snap is None or snap.stamp is None:
+            return await self.load()
+
+        coll = get_collection(COLL)
+        changed = [
+            d async for d in coll.find(
+                {"$or": [
+                    {"updated_at": {"$gte": snap.stamp}},
+                    {"updated_at": None, "created_at": {"$gte": snap.stamp}},
+                ]},
+                _PROJECTION,
+            )
+        ]
+        by_id = {o["id"]: o for o in snap.outfits}
+        keys = dict(snap.keys)
+        stamp = snap.stamp
+        applied = 0
+        for d in changed:
+            oid = str(d["_id"])
+            if d.get("is_active", True) is False:
+                if by_id.pop(oid, None) is None:
+                    continue
+                keys.pop(oid, None)
+            else:
+                outfit = _compact(d)
+                if by_id.get(oid) == outfit:
+                    continue  # re-read at the snapshot's stamp, already applied
+                by_id[oid] = outfit
+                keys[oid] = (d.get("created_at") or datetime.min, oid)
+            applied += 1
+            s = _doc_stamp(d)
+            if s and s > stamp:
+                stamp = s
+
+        active = await coll.count_documents(_ACTIVE)
+        if active != len(by_id):
+            logger.info(f"Catalog has {active} active outfits, snapshot {len(by_id)}; reloading")
+            return await self.load()
+        if not applied:
+            return snap
+
+        new = await asyncio.to_thread(_build, by_id, keys, stamp, snap.memory)
+        self._swap(new, f"applied {applied} changes, {len(new)} outfits")
+        return new
+
+    def _swap(self, snap: CatalogSnapshot, what: str) -> None:
+        self._snapshot = snap  # single reference assignment: readers see old or new, never partial
+        stats = snap.memory
+        logger.info(
+            f"Catalog snapshot {what}; ~{stats['bytes_per_outfit']} B/outfit "
+            f"({stats['scoring_bytes_per_outfit']} B/outfit in scoring arrays, measured {stats['measured_at']:%H:%M:%S})"
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Catalog refresh failed, keeping previous snapshot: {e}")
+            await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+
+
+catalog = CatalogService()
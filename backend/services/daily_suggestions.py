@@ -0,0 +1,244 @@
+# services/daily_suggestions.py
+"""
+Batch job: daily outfit suggestions for every opted-in user.
+
+A user is opted in when `notifications.frequency` is "daily". Quiz
+completion sets it from the `daily_suggestions` answer. The user also needs
+a stored `style_vector` (see services/style_vector.py), so scoring never
+touches quiz answers.
+
+  * users are streamed from Mongo in `_id` order, `chunk_size` at a time;
+  * each chunk is scored against the catalog snapshot in a ProcessPoolExecutor.
+    Every worker encodes the catalog once (OutfitScorer) in its initializer,
+    and a chunk is then one vectorized `top_k` per user;
+  * results are bulk-upserted into `user_outfits` with source="daily", keyed
+    by (user, day, outfit), so re-running a day never duplicates suggestions;
+  * after each chunk is written, the last `_id` goes to `job_checkpoints`.
+    A crashed or interrupted run resumes after it, and a finished day is a no-op;
+  * the day's checkpoint doc doubles as a lease: a run atomically claims it
+    (`lease_owner` / `lease_expires_at`) and extends it with every chunk, so
+    only one API worker or CLI run processes a day at a time. A crashed run's
+    lease expires and the next run takes over from its checkpoint.
+
+Run it with `python cli.py daily-suggestions`, or let the API's maintenance
+scheduler run it (DAILY_SUGGESTIONS_ENABLED).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from database import get_collection
+from models.user import StyleVector
+
+logger = logging.getLogger(__name__)
+
+USERS = "users"
+USER_OUTFITS = "user_outfits"
+CHECKPOINTS = "job_checkpoints"
+JOB = "daily_suggestions"
+
+DAILY_SUGGESTIONS_ENABLED = os.getenv("DAILY_SUGGESTIONS_ENABLED", "false").lower() == "true"
+DAILY_SUGGESTIONS_INTERVAL_SECONDS = float(os.getenv("DAILY_SUGGESTIONS_INTERVAL_SECONDS", "3600"))
+DAILY_SUGGESTIONS_PER_USER = int(os.getenv("DAILY_SUGGESTIONS_PER_USER", "3"))
+DAILY_SUGGESTIONS_CHUNK = int(os.getenv("DAILY_SUGGESTIONS_CHUNK", "500"))
+DAILY_SUGGESTIONS_WORKERS = int(os.getenv("DAILY_SUGGESTIONS_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# must outlast scoring + writing one window of chunks; extended after every chunk
+DAILY_SUGGESTIONS_LEASE_SECONDS = float(os.getenv("DAILY_SUGGESTIONS_LEASE_SECONDS", "600"))
+
+LEASE_FIELDS = ("lease_owner", "lease_expires_at")
+
+OPTED_IN = {"notifications.frequency": "daily", "style_vector": {"$ne": None}}
+
+# ---- worker process side ----
+_scorer = None
+
+
+def _init_worker(outfits: Sequence[Dict[str, Any]]) -> None:
+    global _scorer
+    from services.outfit_scoring import OutfitScorer
+    _scorer = OutfitScorer(outfits)
+
+
+def _score_chunk(users: List[Tuple[str, Dict[str, Any]]], k: int) -> List[Tuple[str, List[Tuple[int, int]]]]:
+    from services.style_vector import features_for
+    return [(uid, _scorer.top_k(features_for(StyleVector(**vec)), k)) for uid, vec in users]
+
+
+# ---- coordinator ----
+def today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+async def _catalog_outfits() -> List[Dict[str, Any]]:
+    """Plain (picklable) copies of the catalog snapshot rows; curated list when Mongo has none."""
+    from services.catalog_service import catalog
+    from services.recommendation_engine import CURATED_OUTFITS
+
+    snap = catalog.current() or await catalog.load()
+    return [dict(o) for o in snap.outfits] if snap else list(CURATED_OUTFITS)
+
+
+async def _acquire(checkpoints, key: str, owner: str) -> Optional[Dict[str, Any]]:
+    """Lease the day's checkpoint doc (created on first use); None while another run holds it."""
+    now = datetime.utcnow()
+    try:
+        return await checkpoints.find_one_and_update(
+            {"_id": key, "$or": [
+                {"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}, {"lease_owner": owner},
+            ]},
+            {"$set": {
+                "lease_owner": owner,
+                "lease_expires_at": now + timedelta(seconds=DAILY_SUGGESTIONS_LEASE_SECONDS),
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return None  # the doc exists but is leased: the upsert's insert collided
+
+
+def _upserts(results, outfits: Sequence[Dict[str, Any]], day: str) -> List[UpdateOne]:
+    now = datetime.utcnow()
+    ops = []
+    for uid, picks in results:
+        for idx, score in picks:
+            outfit = {**outfits[idx], "match_score": score}
+            ops.append(UpdateOne(
+                # ids as strings, like UserOutfit dumps them, so history queries see these rows
+                {"user_id": uid, "source": "daily", "suggested_for": day, "outfit.id": outfit.get("id")},
+                {
+                    "$set": {
+                        "outfit": outfit,
+                        "occasion": outfit.get("occasion"),
+                        "title": outfit.get("title"),
+                        "confidence": outfit.get("confidence"),
+                        "color": outfit.get("color"),
+                        "updated_at": now,
+                    },
+                    # favorites etc. survive a re-run
+                    "$setOnInsert": {"_id": str(ObjectId()), "session_id": None, "favorite": False, "created_at": now},
+                },
+                upsert=True,
+            ))
+    return ops
+
+
+async def run_daily_suggestions(
+    *,
+    day: Optional[str] = None,
+    chunk_size: int = DAILY_SUGGESTIONS_CHUNK,
+    workers: int = DAILY_SUGGESTIONS_WORKERS,
+    per_user: int = DAILY_SUGGESTIONS_PER_USER,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Suggest `per_user` outfits to every opted-in user for `day` (UTC today by
+    default). Returns right away (with `skipped`) if another run holds the day's lease.
+    """
+    day = day or today()
+    checkpoints = get_collection(CHECKPOINTS)
+    key = f"{JOB}:{day}"
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    ckpt = await _acquire(checkpoints, key, owner)
+    if ckpt is None:
+        logger.info(f"Daily suggestions {day}: another run holds the lease")
+        return {"day": day, "users": 0, "written": 0, "resumed": False, "skipped": "running elsewhere"}
+    owned = {"_id": key, "lease_owner": owner}
+    try:
+        if restart:
+            await checkpoints.update_one(owned, {"$unset": {"last_user_id": "", "done": ""}, "$set": {"users": 0}})
+            ckpt = {}
+        elif ckpt.get("done"):
+            return {"day": day, "users": 0, "written": 0, "resumed": True, "skipped": "already done"}
+        return await _run(day, owned, ckpt, chunk_size, workers, per_user)
+    finally:
+        await checkpoints.update_one(owned, {"$unset": {f: "" for f in LEASE_FIELDS}})
+
+
+async def _run(
+    day: str,
+    owned: Dict[str, Any],
+    ckpt: Dict[str, Any],
+    chunk_size: int,
+    workers: int,
+    per_user: int,
+) -> Dict[str, Any]:
+    checkpoints = get_collection(CHECKPOINTS)
+    query: Dict[str, Any] = dict(OPTED_IN)
+    if ckpt.get("last_user_id"):
+        query["_id"] = {"$gt": ckpt["last_user_id"]}
+        logger.info(f"Daily suggestions {day}: resuming after user {ckpt['last_user_id']}")
+
+    outfits = await _catalog_outfits()
+    stats = {"day": day, "users": 0, "written": 0, "resumed": bool(ckpt.get("last_user_id"))}
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    users = get_collection(USERS)
+    user_outfits = get_collection(USER_OUTFITS)
+
+    async def finish(pending: Deque) -> None:
+        fut, last_id, n = pending.popleft()
+        results = await fut
+        ops = _upserts(results, outfits, day)
+        if ops:
+            res = await user_outfits.bulk_write(ops, ordered=False)
+            stats["written"] += res.upserted_count + res.modified_count
+        stats["users"] += n
+        now = datetime.utcnow()
+        res = await checkpoints.update_one(
+            owned,
+            {"$set": {
+                "last_user_id": last_id,
+                "updated_at": now,
+                "lease_expires_at": now + timedelta(seconds=DAILY_SUGGESTIONS_LEASE_SECONDS),
+            }, "$inc": {"users": n}},
+        )
+        if res.matched_count == 0:
+            raise RuntimeError(f"daily suggestions {day}: lease lost to another run")
+        elapsed = time.perf_counter() - started
+        logger.info(f"Daily suggestions {day}: {stats['users']} users, {stats['users'] / elapsed:.0f} users/s")
+
+    # spawn: workers don't inherit the event loop / Mongo client threads
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                               initializer=_init_worker, initargs=(outfits,))
+    try:
+        pending: Deque = deque()
+        chunk: List[Tuple[str, Dict[str, Any]]] = []
+        last_id = None
+        cursor = users.find(query, {"style_vector": 1}).sort("_id", 1).batch_size(chunk_size)
+        async for doc in cursor:
+            chunk.append((str(doc["_id"]), doc["style_vector"]))
+            last_id = doc["_id"]
+            if len(chunk) == chunk_size:
+                pending.append((loop.run_in_executor(pool, _score_chunk, chunk, per_user), last_id, len(chunk)))
+                chunk = []
+                # chunks finish in submission order, so the checkpoint only moves forward
+                if len(pending) >= 2 * workers:
+                    await finish(pending)
+        if chunk:
+            pending.append((loop.run_in_executor(pool, _score_chunk, chunk, per_user), last_id, len(chunk)))
+        while pending:
+            await finish(pending)
+    finally:
+        # joining the worker processes blocks, so not on the event loop
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    await checkpoints.update_one(owned, {"$set": {"done": True, "finished_at": datetime.utcnow()}})
+    stats["seconds"] = round(elapsed, 2)
+    stats["users_per_sec"] = round(stats["users"] / elapsed, 1) if elapsed else 0.0
+    logger.info(f"Daily suggestions {day} done: {stats}")
+    return stats
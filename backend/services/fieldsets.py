@@ -0,0 +1,51 @@
+# services/fieldsets.py
+"""
+Sparse fieldsets (`?fields=`) for list and profile reads.
+
+`fields` is either a named preset ("summary") or a comma-separated list of
+fields. A field is a top-level name or a dotted path under one, such as
+`outfit.items`. The list becomes a Mongo projection, so unrequested fields
+are never read, sent over the wire or validated. Without `fields`, endpoints
+keep returning full documents.
+"""
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+SUMMARY = "summary"
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def projection(
+    fields: Optional[str],
+    allowed: Iterable[str],
+    presets: Mapping[str, Sequence[str]],
+    always: Sequence[str] = ("_id",),
+) -> Optional[Dict[str, int]]:
+    """Mongo projection for a `fields` parameter; None means the full document."""
+    if fields is None or not fields.strip():
+        return None
+    name = fields.strip()
+    if name in presets:
+        wanted = list(presets[name])
+    else:
+        allowed = set(allowed)
+        wanted = [f.strip() for f in name.split(",") if f.strip()]
+        unknown = [f for f in wanted if f.split(".", 1)[0] not in allowed]
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    proj = {f: 1 for f in always}
+    for f in wanted:
+        # a parent and its child path can't both be projected; the parent wins
+        if not any(f.startswith(p + ".") for p in wanted):
+            proj[f] = 1
+    return proj
+
+
+def sparse(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready projected document (ObjectId -> str)."""
+    return jsonable_encoder(doc, custom_encoder={ObjectId: str})
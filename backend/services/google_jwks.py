@@ -0,0 +1,122 @@
+# services/google_jwks.py
+"""
+Local verification of Google OpenID Connect ID tokens.
+
+Google's signing keys (JWKS) are cached in-process and refreshed when they
+expire (per the response's Cache-Control max-age) or when a token arrives
+with a `kid` we don't know yet. With GOOGLE_JWKS_FILE set, keys are read from
+a local JWKS JSON file instead, e.g. a stand-in keyset for offline dev/tests.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+JWKS_DEFAULT_MAX_AGE = 3600
+# don't let unknown `kid`s trigger more than one refetch per this many seconds
+JWKS_MIN_REFRESH_SECONDS = 60
+ID_TOKEN_LEEWAY_SECONDS = 30
+
+_http: Optional[httpx.AsyncClient] = None
+
+
+def http_client() -> httpx.AsyncClient:
+    """Shared pooled client for Google OAuth calls (token exchange, JWKS, userinfo)."""
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(timeout=15)
+    return _http
+
+
+async def close_http_client() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+class JWKSUnavailable(Exception):
+    """Keys could not be fetched; callers may fall back to the userinfo endpoint."""
+
+
+def _max_age(cache_control: Optional[str]) -> int:
+    m = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(m.group(1)) if m else JWKS_DEFAULT_MAX_AGE
+
+
+class GoogleJWKS:
+    def __init__(self, url: str = GOOGLE_JWKS_URL, file: Optional[str] = None):
+        self.url = url
+        self.file = file
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> None:
+        if self.file:
+            with open(self.file) as f:
+                jwks = json.load(f)
+            max_age = JWKS_DEFAULT_MAX_AGE
+        else:
+            try:
+                r = await http_client().get(self.url)
+                r.raise_for_status()
+            except httpx.HTTPError as e:
+                raise JWKSUnavailable(str(e)) from e
+            jwks = r.json()
+            max_age = _max_age(r.headers.get("cache-control"))
+
+        keys = {}
+        for k in jwks.get("keys", []):
+            try:
+                keys[k["kid"]] = jwt.PyJWK(k).key
+            except (KeyError, jwt.PyJWKError) as e:
+                logger.warning(f"Skipping unusable JWK {k.get('kid')}: {e}")
+        now = time.monotonic()
+        self._keys, self._fetched_at, self._expires_at = keys, now, now + max_age
+        logger.info(f"Loaded {len(keys)} Google signing keys (max-age {max_age}s)")
+
+    async def get_key(self, kid: str):
+        now = time.monotonic()
+        if kid in self._keys and now < self._expires_at:
+            return self._keys[kid]
+        async with self._lock:
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            may_refresh = now - self._fetched_at >= JWKS_MIN_REFRESH_SECONDS
+            if expired or (kid not in self._keys and may_refresh):
+                await self._load()
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key id: {kid}")
+        return key
+
+    async def verify_id_token(self, id_token: str, *, audience: str) -> Dict[str, Any]:
+        """Verified claims of a Google ID token; raises jwt.InvalidTokenError if invalid."""
+        header = jwt.get_unverified_header(id_token)
+        key = await self.get_key(header.get("kid", ""))
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=audience,
+            leeway=ID_TOKEN_LEEWAY_SECONDS,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise jwt.InvalidIssuerError("Invalid issuer")
+        return claims
+
+
+google_jwks = GoogleJWKS(file=os.getenv("GOOGLE_JWKS_FILE") or None)
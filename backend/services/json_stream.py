@@ -0,0 +1,117 @@
+# services/json_stream.py
+"""
+Incremental JSON encoding for Mongo documents.
+
+`dumps` encodes one raw document (ObjectId -> str, datetime -> ISO 8601)
+without building a Pydantic model first. It uses `orjson` when that package
+is installed and falls back to the stdlib. `ndjson` and `json_page` turn a
+Motor cursor into an async byte stream (NDJSON, or a `{"items": [...],
+"next_cursor": ...}` page) flushed every ~64 KB. A response therefore never
+holds more than one cursor batch, and its first bytes go out as soon as the
+first batch arrives.
+"""
+import json
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from bson import ObjectId
+
+from services.pagination import encode_cursor
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+# bytes buffered before a chunk is handed to the response
+CHUNK_BYTES = 64 * 1024
+
+
+def _default(v: Any) -> Any:
+    if isinstance(v, ObjectId):
+        return str(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, MappingProxyType):
+        return dict(v)
+    if isinstance(v, (set, frozenset, tuple)):
+        return list(v)
+    raise TypeError(f"Type is not JSON serializable: {type(v).__name__}")
+
+
+if orjson is not None:
+    def dumps(doc: Any) -> bytes:
+        return orjson.dumps(doc, default=_default)
+
+    loads = orjson.loads
+else:
+    def dumps(doc: Any) -> bytes:
+        return json.dumps(doc, default=_default, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+
+async def ndjson(
+    cursor,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> AsyncIterator[bytes]:
+    """One JSON document per line, from an (async-iterable) Motor cursor."""
+    buf, size = [], 0
+    async for doc in cursor:
+        line = dumps(transform(doc) if transform else doc) + b"\n"
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+async def json_page(
+    cursor,
+    limit: int,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    A keyset page as one streamed JSON object. `cursor` must yield up to
+    `limit + 1` docs in keyset order; the extra doc only tells that another
+    page exists. next_cursor comes last, once it's known.
+    """
+    buf, size = [b'{"items":['], 0
+    last, n, more = None, 0, False
+    async for doc in cursor:
+        if n == limit:
+            more = True
+            break
+        piece = (b"," if n else b"") + dumps(transform(doc) if transform else doc)
+        buf.append(piece)
+        size += len(piece)
+        last, n = doc, n + 1
+        if size >= CHUNK_BYTES or n == 1:  # first item goes out right away
+            yield b"".join(buf)
+            buf, size = [], 0
+    buf.append(b'],"next_cursor":' + dumps(encode_cursor(last) if more and last else None) + b"}")
+    yield b"".join(buf)
+
+
+async def _nothing():
+    return
+    yield
+
+
+def empty_page() -> AsyncIterator[bytes]:
+    return json_page(_nothing(), 0)
+
+
+async def lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream (e.g. a request body) into lines without reading it whole."""
+    rest = b""
+    async for chunk in chunks:
+        rest += chunk
+        *complete, rest = rest.split(b"\n")
+        for line in complete:
+            yield line
+    if rest:
+        yield rest
@@ -0,0 +1,87 @@
+# services/maintenance.py
+"""
+Periodic maintenance for cleanup that a TTL index can't express.
+
+Jobs are plain async callables registered with an interval; the scheduler
+runs each on its own jittered timer inside the API process (started/stopped
+from the FastAPI lifespan). Deletes go through `batched_delete`, which removes
+at most `batch_size` docs per round trip and pauses between batches so
+cleanup never turns into one long, index-thrashing `delete_many`.
+"""
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+MAINTENANCE_BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+MAINTENANCE_BATCH_PAUSE_SECONDS = float(os.getenv("MAINTENANCE_BATCH_PAUSE_SECONDS", "0.2"))
+# upper bound per job run; the rest is picked up next time
+MAINTENANCE_MAX_BATCHES = int(os.getenv("MAINTENANCE_MAX_BATCHES", "100"))
+
+Job = Callable[[], Awaitable[Any]]
+
+
+async def batched_delete(
+    coll,
+    query: Dict[str, Any],
+    *,
+    batch_size: int = MAINTENANCE_BATCH_SIZE,
+    pause_seconds: float = MAINTENANCE_BATCH_PAUSE_SECONDS,
+    max_batches: int = MAINTENANCE_MAX_BATCHES,
+) -> int:
+    """Delete docs matching `query` in `_id` batches, rate limited. Returns the count deleted."""
+    deleted = 0
+    for _ in range(max_batches):
+        ids = [d["_id"] async for d in coll.find(query, {"_id": 1}).limit(batch_size)]
+        if not ids:
+            break
+        res = await coll.delete_many({"_id": {"$in": ids}})
+        deleted += res.deleted_count
+        if len(ids) < batch_size:
+            break
+        await asyncio.sleep(pause_seconds)
+    return deleted
+
+
+class MaintenanceScheduler:
+    def __init__(self):
+        self._jobs: List[Tuple[str, float, Job]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, interval_seconds: float, job: Job) -> None:
+        self._jobs.append((name, interval_seconds, job))
+
+    def start(self) -> None:
+        if not MAINTENANCE_ENABLED or self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(*j)) for j in self._jobs]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        for t in self._tasks:
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _run(self, name: str, interval: float, job: Job) -> None:
+        # jittered first run so several API workers don't all start at once
+        await asyncio.sleep(random.uniform(0.1, 1.0) * min(interval, 60))
+        while True:
+            try:
+                result = await job()
+                logger.info(f"Maintenance job {name} done: {result}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Maintenance job {name} failed: {e}")
+            await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+
+
+scheduler = MaintenanceScheduler()
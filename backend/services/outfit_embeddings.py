@@ -0,0 +1,334 @@
+# services/outfit_embeddings.py
+"""
+Local "more like this" search over outfit vectors.
+
+Embeddings need no external model:
+
+  * `OutfitEmbedder` is a hashing vectorizer. Words and word bigrams from the
+    title and description, item-name words, and brands (as whole-brand
+    features) are hashed with a signed CRC32 into `dim` buckets. Each bucket
+    gets sublinear TF, then an IDF fitted on the corpus being indexed. The
+    result is an L2-normalized float32 vector, so cosine similarity is a dot
+    product.
+  * `write_index` clusters the vectors with spherical k-means into `nlist`
+    inverted lists (IVF). It then writes them, grouped by list, to a raw
+    float32 file that is memory-mapped at query time. The ids, centroids,
+    list offsets and IDF go alongside it.
+  * `VectorIndex.search` compares the query to the centroids and scans only
+    the `nprobe` closest lists. Each list is one contiguous slice of the
+    memmap, so a query reads about nprobe/nlist of the vectors.
+
+Indexes live in OUTFIT_INDEX_DIR/<source>/<build>/. A build becomes live when
+OUTFIT_INDEX_DIR/<source>/CURRENT is atomically replaced with the build's
+name. `indexes.get(source)` notices the switch on the next query. Builds run
+offline (`python cli.py build-outfit-index`), so outfits saved after a build
+are searchable once the next build lands. Ranking one owner's saved outfits
+doesn't go through the IVF lists at all (`VectorIndex.vectors_for`): their
+stored vectors are scored exactly, and newer ones are embedded on the spot.
+"""
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OUTFIT_EMBED_DIM = int(os.getenv("OUTFIT_EMBED_DIM", "256"))
+OUTFIT_INDEX_DIR = Path(os.getenv("OUTFIT_INDEX_DIR", Path(__file__).parent.parent / "data" / "outfit_index"))
+OUTFIT_INDEX_NPROBE = int(os.getenv("OUTFIT_INDEX_NPROBE", "16"))
+# builds kept per source besides the live one (readers may still hold the previous)
+_KEEP_BUILDS = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# feature weights per field
+_TITLE, _DESCRIPTION, _ITEM, _BRAND = 2.0, 1.0, 1.5, 2.0
+
+
+def _source(doc: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Saved outfits keep the generated outfit under `outfit`; catalog docs are the outfit."""
+    inner = doc.get("outfit")
+    return inner if isinstance(inner, Mapping) else doc
+
+
+def outfit_features(doc: Mapping[str, Any]) -> List[Tuple[str, float]]:
+    """Weighted text features of a catalog outfit or saved user outfit."""
+    o = _source(doc)
+    feats: List[Tuple[str, float]] = []
+    for field, weight in (("title", _TITLE), ("description", _DESCRIPTION)):
+        words = _TOKEN.findall(str(o.get(field) or doc.get(field) or "").lower())
+        feats += [(w, weight) for w in words]
+        feats += [(f"{a} {b}", weight) for a, b in zip(words, words[1:])]
+    items = o.get("items")
+    for item in items if isinstance(items, (list, tuple)) else ():
+        if not isinstance(item, Mapping):
+            continue
+        feats += [(w, _ITEM) for w in _TOKEN.findall(str(item.get("name") or "").lower())]
+        brand = " ".join(_TOKEN.findall(str(item.get("brand") or "").lower()))
+        if brand:
+            feats.append((f"brand:{brand}", _BRAND))
+    return feats
+
+
+class OutfitEmbedder:
+    """Signed feature hashing + sublinear TF-IDF into `dim` float32 dimensions."""
+
+    def __init__(self, dim: int = OUTFIT_EMBED_DIM, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32) if idf is None else np.asarray(idf, dtype=np.float32)
+
+    def _sparse(self, doc: Mapping[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        acc: Dict[int, float] = {}
+        for token, weight in outfit_features(doc):
+            h = zlib.crc32(token.encode())
+            b = h % self.dim
+            acc[b] = acc.get(b, 0.0) + (weight if h & 0x80000000 else -weight)
+        buckets = np.fromiter(acc, dtype=np.int32, count=len(acc))
+        tf = np.fromiter(acc.values(), dtype=np.float32, count=len(acc))
+        return buckets, np.sign(tf) * np.log1p(np.abs(tf))
+
+    def _dense(self, sparse: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        out = np.zeros((len(sparse), self.dim), dtype=np.float32)
+        for row, (buckets, tf) in zip(out, sparse):
+            row[buckets] = tf
+        out *= self.idf
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def fit_transform(self, docs: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Fit the IDF on `docs` and return their vectors, shape (n, dim)."""
+        sparse = [self._sparse(d) for d in docs]
+        df = np.zeros(self.dim, dtype=np.int64)
+        for buckets, _ in sparse:
+            df[buckets] += 1
+        self.idf = (np.log((1 + len(sparse)) / (1 + df)) + 1).astype(np.float32)
+        return self._dense(sparse)
+
+    def transform(self, docs: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        return self._dense([self._sparse(d) for d in docs])
+
+    def embed(self, doc: Mapping[str, Any]) -> np.ndarray:
+        return self._dense([self._sparse(doc)])[0]
+
+
+# ---- IVF build ----
+def _assign(x: np.ndarray, centroids: np.ndarray, chunk: int = 32768) -> np.ndarray:
+    labels = np.empty(len(x), dtype=np.int32)
+    for s in range(0, len(x), chunk):
+        labels[s:s + chunk] = np.argmax(np.asarray(x[s:s + chunk]) @ centroids.T, axis=1)
+    return labels
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, iters: int = 10, sample_per_list: int = 64, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (nlist, dim) trained on a sample of `vectors`."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    nlist = max(1, min(nlist, n))
+    sample = np.sort(rng.choice(n, min(n, nlist * sample_per_list), replace=False))
+    x = np.asarray(vectors[sample], dtype=np.float32)
+    centroids = x[rng.choice(len(x), nlist, replace=False)].copy()
+    for _ in range(iters):
+        labels = _assign(x, centroids)
+        order = np.argsort(labels, kind="stable")
+        used, starts = np.unique(labels[order], return_index=True)
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[used] = sums
+        empty = np.setdiff1d(np.arange(nlist), used)
+        if len(empty):  # reseed dead lists from random sample points
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        np.divide(centroids, norms, out=centroids, where=norms > 0)
+    return centroids
+
+
+def default_nlist(n: int) -> int:
+    return max(1, min(65536, int(math.sqrt(n))))
+
+
+def write_index(
+    source: str,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    embedder: OutfitEmbedder,
+    nlist: Optional[int] = None,
+    root: Path = OUTFIT_INDEX_DIR,
+) -> Path:
+    """Cluster, write and publish a new build for `source`; returns its directory."""
+    n, dim = vectors.shape
+    if n != len(ids):
+        raise ValueError("ids and vectors differ in length")
+    if not n:
+        raise ValueError("nothing to index")
+    nlist = default_nlist(n) if nlist is None else nlist
+
+    centroids = train_ivf(vectors, nlist)
+    labels = _assign(vectors, centroids)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+
+    base = Path(root) / source
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    build = base / name
+    build.mkdir(parents=True)
+    out = np.lib.format.open_memmap(build / "vectors.npy", mode="w+", dtype=np.float32, shape=(n, dim))
+    for s in range(0, n, 65536):
+        out[s:s + 65536] = vectors[order[s:s + 65536]]
+    out.flush()
+    del out
+    id_arr = np.asarray(ids, dtype=str)
+    np.save(build / "ids.npy", id_arr[order])
+    np.save(build / "centroids.npy", centroids)
+    np.save(build / "offsets.npy", offsets)
+    np.save(build / "idf.npy", embedder.idf)
+    (build / "meta.json").write_text(json.dumps({
+        "source": source, "count": n, "dim": dim, "nlist": len(centroids),
+        "built_at": datetime.utcnow().isoformat(),
+    }))
+
+    tmp = base / "CURRENT.tmp"
+    tmp.write_text(name)
+    os.replace(tmp, base / "CURRENT")
+    for old in sorted(p for p in base.iterdir() if p.is_dir() and p.name != name)[:-_KEEP_BUILDS or None]:
+        shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"Outfit index {source}/{name}: {n} vectors, dim {dim}, {len(centroids)} lists")
+    return build
+
+
+def build_index(source: str, docs: Iterable[Mapping[str, Any]], dim: int = OUTFIT_EMBED_DIM,
+                nlist: Optional[int] = None, root: Path = OUTFIT_INDEX_DIR) -> Path:
+    """
+    Embed `docs` (each with `_id` or `id`) and publish them as the `source`
+    index. `docs` is consumed once, as it comes, so it can be a lazily
+    batched cursor: only the hashed features are kept, never the documents.
+    """
+    ids: List[str] = []
+
+    def tagged() -> Iterable[Mapping[str, Any]]:
+        for d in docs:
+            ids.append(str(d.get("_id", d.get("id"))))
+            yield d
+
+    embedder = OutfitEmbedder(dim)
+    vectors = embedder.fit_transform(tagged())
+    return write_index(source, ids, vectors, embedder, nlist=nlist, root=root)
+
+
+# ---- query ----
+class VectorIndex:
+    """Read-only IVF index over a memory-mapped vector file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        self.ids = np.load(self.path / "ids.npy", mmap_mode="r")
+        self.centroids = np.load(self.path / "centroids.npy")
+        self.offsets = np.load(self.path / "offsets.npy")
+        self.embedder = OutfitEmbedder(self.vectors.shape[1], np.load(self.path / "idf.npy"))
+        self._by_id: Optional[Tuple[np.ndarray, np.ndarray]] = None  # built on first rows()
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def rows(self, ids: Sequence[str]) -> np.ndarray:
+        """Row of each id in the memmap, -1 for ids this build doesn't hold."""
+        if self._by_id is None:
+            order = np.argsort(self.ids, kind="stable")
+            self._by_id = (order, np.asarray(self.ids)[order])
+        order, sorted_ids = self._by_id
+        want = np.asarray(ids, dtype=str)
+        at = np.searchsorted(sorted_ids, want)
+        at_ok = np.minimum(at, len(sorted_ids) - 1)
+        hit = (at < len(sorted_ids)) & (sorted_ids[at_ok] == want)
+        return np.where(hit, order[at_ok], -1)
+
+    def vectors_for(self, docs: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """
+        Vectors of `docs`, shape (len(docs), dim): the stored row where the doc
+        is in this build, embedded with the build's IDF where it was saved since.
+        """
+        out = np.empty((len(docs), self.vectors.shape[1]), dtype=np.float32)
+        if not docs:
+            return out
+        rows = self.rows([str(d.get("_id", d.get("id"))) for d in docs])
+        stored = rows >= 0
+        out[stored] = self.vectors[rows[stored]]
+        fresh = np.flatnonzero(~stored)
+        if len(fresh):
+            out[fresh] = self.embedder.transform([docs[i] for i in fresh])
+        return out
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        nprobe: int = OUTFIT_INDEX_NPROBE,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[str, float]]:
+        """(id, cosine similarity) of the approximate k nearest vectors, best first."""
+        exclude = set(exclude)
+        want = k + len(exclude)
+        if k <= 0 or not len(self):
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        nlist = len(self.centroids)
+        csim = self.centroids @ q
+        probe = np.argpartition(-csim, nprobe - 1)[:nprobe] if nprobe < nlist else np.arange(nlist)
+
+        spans = [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in probe]
+        spans = [(a, b) for a, b in spans if b > a]
+        if not spans:
+            return []
+        sims = np.concatenate([self.vectors[a:b] @ q for a, b in spans])
+        rows = np.concatenate([np.arange(a, b) for a, b in spans])
+        if len(sims) > want:
+            part = np.argpartition(-sims, want - 1)[:want]
+            sims, rows = sims[part], rows[part]
+        order = np.argsort(-sims, kind="stable")
+        out = []
+        for r, s in zip(rows[order], sims[order]):
+            oid = str(self.ids[r])
+            if oid not in exclude:
+                out.append((oid, float(s)))
+        return out[:k]
+
+    def similar(self, doc: Mapping[str, Any], k: int = 10, **kw) -> List[Tuple[str, float]]:
+        """Nearest neighbours of an outfit doc, never including the doc itself."""
+        own = doc.get("_id", doc.get("id"))
+        return self.search(self.embedder.embed(doc), k, exclude=[str(own)] if own is not None else (), **kw)
+
+
+class OutfitIndexes:
+    """Live index per source, reopened when its CURRENT build changes."""
+
+    def __init__(self, root: Path = OUTFIT_INDEX_DIR):
+        self.root = Path(root)
+        self._open: Dict[str, Tuple[str, VectorIndex]] = {}
+
+    def get(self, source: str) -> Optional[VectorIndex]:
+        try:
+            name = (self.root / source / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+        cached = self._open.get(source)
+        if cached and cached[0] == name:
+            return cached[1]
+        try:
+            index = VectorIndex(self.root / source / name)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not open outfit index {source}/{name}: {e}")
+            return cached[1] if cached else None
+        self._open[source] = (name, index)
+        return index
+
+
+indexes = OutfitIndexes()
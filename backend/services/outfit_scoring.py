@@ -0,0 +1,281 @@
+# services/outfit_scoring.py
+"""
+Vectorized outfit scoring.
+
+`OutfitScorer` encodes a catalog once into NumPy arrays (style/body-type
+bitmasks, occasion codes, confidence and "versatile" flags); scoring a user
+is then a handful of array ops over the whole catalog plus an `argpartition`
+top-k. It implements exactly the rules of
+`recommendation_engine.score_outfit`:
+
+    50 base, +20 any current style, +15 occasion covered by help_occasions,
+    +10 body type ("All" or listed), +10 confidence > 90 if the user wants to
+    "Look more confident", +5 "versatile" description if they want to
+    "Save time"; capped at 100.
+
+Before scoring, `top_k` retrieves candidates from inverted indexes (style
+type, occasion, body type, season postings): only outfits that can earn the
+style or occasion bonus are scored, and the full scan is the fallback when
+fewer than k of them beat what any other outfit could score.
+
+Outfits whose fields aren't plain strings/lists/numbers (where the scalar
+rules have quirks such as substring matches or raising -> 50) are flagged
+at encode time and scored with `score_outfit` itself, so results are
+identical for any catalog.
+"""
+import threading
+from numbers import Real
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.recommendation_engine import ProfileFeatures, score_outfit
+
+_WORD = 64
+_EMPTY = np.zeros(0, dtype=np.int32)
+# posting key for outfits without a usable `seasons` list (never filtered out)
+_ANY_SEASON = "\0any"
+_MASK = (1 << _WORD) - 1
+
+
+def _is_str_list(v: Any) -> bool:
+    return isinstance(v, (list, tuple)) and all(isinstance(x, str) for x in v)
+
+
+def _regular(outfit: Dict[str, Any]) -> bool:
+    conf = outfit.get('confidence', 0)
+    return (
+        _is_str_list(outfit.get('style_types', []))
+        and _is_str_list(outfit.get('body_types', ['All']))
+        and isinstance(outfit.get('occasion', ''), str)
+        and isinstance(conf, Real) and not isinstance(conf, complex)
+        and isinstance(outfit.get('description', ''), str)
+    )
+
+
+def _postings(rows: Iterable[Iterable[str]]) -> Dict[str, np.ndarray]:
+    lists: Dict[str, List[int]] = {}
+    for i, row in enumerate(rows):
+        for term in set(row):
+            lists.setdefault(term, []).append(i)
+    return {term: np.array(ix, dtype=np.int32) for term, ix in lists.items()}
+
+
+class _Vocab:
+    """Term -> bit position; rows are packed into ceil(n/64) uint64 words."""
+    def __init__(self, rows: Sequence[Sequence[str]]):
+        self.index: Dict[str, int] = {}
+        for row in rows:
+            for term in row:
+                self.index.setdefault(term, len(self.index))
+        self.words = max(1, -(-len(self.index) // _WORD))
+
+    def encode_rows(self, rows: Sequence[Sequence[str]]) -> np.ndarray:
+        # build each row as a Python int, then split into 64-bit words
+        masks = []
+        for row in rows:
+            m = 0
+            for term in row:
+                m |= 1 << self.index[term]
+            masks.append(m)
+        out = np.empty((len(rows), self.words), dtype=np.uint64)
+        for w in range(self.words):
+            out[:, w] = np.fromiter(((m >> (w * _WORD)) & _MASK for m in masks), dtype=np.uint64, count=len(rows))
+        return out
+
+    def encode_query(self, terms) -> np.ndarray:
+        q = np.zeros(self.words, dtype=np.uint64)
+        for term in terms:
+            b = self.index.get(term)
+            if b is not None:
+                q[b // _WORD] |= np.uint64(1) << np.uint64(b % _WORD)
+        return q
+
+
+class OutfitScorer:
+    """Immutable, encoded view of one outfit catalog."""
+    def __init__(self, outfits: Sequence[Dict[str, Any]]):
+        self.outfits = outfits
+        n = len(outfits)
+        regular = np.fromiter((_regular(o) for o in outfits), dtype=bool, count=n)
+        self.irregular = np.flatnonzero(~regular)
+        reg = [o if ok else {} for o, ok in zip(outfits, regular)]
+
+        styles = [o.get('style_types', []) for o in reg]
+        self._styles = _Vocab(styles)
+        self.style_bits = self._styles.encode_rows(styles)
+
+        bodies = [o.get('body_types', ['All']) for o in reg]
+        self.body_all = np.fromiter(('All' in b for b in bodies), dtype=bool, count=n)
+        self._bodies = _Vocab(bodies)
+        self.body_bits = self._bodies.encode_rows(bodies)
+
+        occasions = [o.get('occasion', '') for o in reg]
+        self._occasions = {occ: i for i, occ in enumerate(dict.fromkeys(occasions))}
+        self.occasion_code = np.fromiter((self._occasions[o] for o in occasions), dtype=np.int32, count=n)
+
+        self.confident = np.fromiter((o.get('confidence', 0) > 90 for o in reg), dtype=bool, count=n)
+        self.versatile = np.fromiter(('versatile' in o.get('description', '').lower() for o in reg), dtype=bool, count=n)
+
+        # inverted indexes: term -> sorted int32 catalog indexes
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {
+            'style_types': _postings(styles),
+            'occasion': _postings([o] for o in occasions),
+            'body_types': _postings(bodies),
+            'seasons': _postings(
+                o['seasons'] if _is_str_list(o.get('seasons')) else [_ANY_SEASON] for o in outfits
+            ),
+        }
+
+    def __len__(self) -> int:
+        return len(self.outfits)
+
+    def scores(self, features: ProfileFeatures, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """int16 score per outfit (or per catalog index in `idx`), catalog order."""
+        pick = (lambda a: a) if idx is None else (lambda a: a[idx])
+        score = np.full(len(self) if idx is None else len(idx), 50, dtype=np.int16)
+        if not len(score):
+            return score
+
+        q = self._styles.encode_query(features.current_styles)
+        score += 20 * (pick(self.style_bits) & q).any(axis=1)
+
+        occ_ok = np.zeros(len(self._occasions), dtype=bool)
+        for occ in features.occasions:
+            code = self._occasions.get(occ)
+            if code is not None:
+                occ_ok[code] = True
+        score += 15 * occ_ok[pick(self.occasion_code)]
+
+        if features.body_type:
+            q = self._bodies.encode_query([features.body_type])
+            score += 10 * (pick(self.body_all) | (pick(self.body_bits) & q).any(axis=1))
+
+        if 'Look more confident' in features.goals:
+            score += 10 * pick(self.confident)
+        if 'Save time' in features.goals:
+            score += 5 * pick(self.versatile)
+
+        np.minimum(score, 100, out=score)
+        if len(self.irregular):
+            if idx is None:
+                positions = rows = self.irregular
+            else:
+                positions = np.flatnonzero(np.isin(idx, self.irregular))
+                rows = idx[positions]
+            for pos, i in zip(positions, rows):
+                score[pos] = score_outfit(self.outfits[i], features)
+        return score
+
+    # ---- candidate retrieval (inverted indexes) ----
+    def candidates(self, features: ProfileFeatures, season: Optional[str] = None) -> np.ndarray:
+        """
+        Catalog indexes that can earn the style (+20) or occasion (+15) bonus:
+        the union of the style and occasion postings, plus irregular outfits;
+        narrowed to `season` (or "All"-season outfits) when given.
+        """
+        hit = np.zeros(len(self), dtype=bool)
+        for style in features.current_styles:
+            hit[self.postings['style_types'].get(style, _EMPTY)] = True
+        for occ in features.occasions:
+            hit[self.postings['occasion'].get(occ, _EMPTY)] = True
+        hit[self.irregular] = True
+        if season is not None:
+            hit &= self.season_mask(season)
+        return np.flatnonzero(hit)
+
+    def season_mask(self, season: str) -> np.ndarray:
+        seasons = self.postings['seasons']
+        mask = np.zeros(len(self), dtype=bool)
+        for term in (season, 'All', _ANY_SEASON):
+            mask[seasons.get(term, _EMPTY)] = True
+        return mask
+
+    def _outsider_bound(self, features: ProfileFeatures) -> int:
+        """Best score an outfit outside `candidates` can reach (no style/occasion bonus)."""
+        bound = 50
+        if features.body_type:
+            bound += 10
+        if 'Look more confident' in features.goals:
+            bound += 10
+        if 'Save time' in features.goals:
+            bound += 5
+        return min(bound, 100)
+
+    def top_k(
+        self,
+        features: ProfileFeatures,
+        k: int = 6,
+        min_score: int = 50,
+        season: Optional[str] = None,
+        use_index: bool = True,
+    ) -> List[Tuple[int, int]]:
+        """
+        (catalog index, score) of the k best outfits scoring above `min_score`,
+        best first; ties keep catalog order (like a stable sort).
+
+        With `use_index`, only the indexed candidates are scored first; if at
+        least k of them beat anything a non-candidate could score, that is
+        the exact answer. Otherwise (few candidates) it falls back to a full scan.
+        """
+        if k <= 0 or not len(self):
+            return []
+        if use_index:
+            cand = self.candidates(features, season)
+            if len(cand) >= k:
+                score = self.scores(features, cand)
+                strong = score > max(min_score, self._outsider_bound(features))
+                if np.count_nonzero(strong) >= k:
+                    return self._rank(cand[strong], score[strong], k)
+
+        if season is None:
+            idx, score = np.arange(len(self)), self.scores(features)
+        else:
+            idx = np.flatnonzero(self.season_mask(season))
+            score = self.scores(features, idx)
+        keep = score > min_score
+        return self._rank(idx[keep], score[keep], k)
+
+    def _rank(self, idx: np.ndarray, score: np.ndarray, k: int) -> List[Tuple[int, int]]:
+        if not len(idx):
+            return []
+        # unique sort key: higher score first, then lower index
+        key = score.astype(np.int64) * (len(self) + 1) - idx
+        if len(idx) > k:
+            part = np.argpartition(-key, k - 1)[:k]
+            idx, score, key = idx[part], score[part], key[part]
+        order = np.argsort(-key)
+        return [(int(i), int(s)) for i, s in zip(idx[order], score[order])]
+
+    def recommend(self, features: ProfileFeatures, k: int = 6, season: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Same output as the scalar loop: outfit dicts with `match_score`, best first."""
+        return [{**self.outfits[i], 'match_score': s} for i, s in self.top_k(features, k, season=season)]
+
+
+# last two catalogs: the live one and, during a catalog swap, its successor.
+# Catalog rebuilds call scorer_for from a worker thread while requests call it
+# on the event loop, hence the lock.
+_recent: List[Tuple[Sequence[Dict[str, Any]], OutfitScorer]] = []
+_recent_lock = threading.Lock()
+
+
+def _cached(outfits: Sequence[Dict[str, Any]]) -> Optional[OutfitScorer]:
+    for cached, scorer in _recent:
+        if cached is outfits:
+            return scorer
+    return None
+
+
+def scorer_for(outfits: Sequence[Dict[str, Any]]) -> OutfitScorer:
+    """Encoded scorer for `outfits`, reused while the same catalog object is passed in."""
+    with _recent_lock:
+        scorer = _cached(outfits)
+    if scorer is not None:
+        return scorer
+    built = OutfitScorer(outfits)  # encode outside the lock
+    with _recent_lock:
+        scorer = _cached(outfits)  # another thread may have won the race
+        if scorer is None:
+            scorer = built
+            _recent[:] = [(outfits, scorer)] + _recent[:1]
+    return scorer
@@ -1,6 +1,16 @@
 from database import get_collection
-from models.outfit import Outfit
+from models.outfit import Outfit, OutfitItem
 from bson import ObjectId
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from services import json_stream
+from services.pagination import keyset_filter, keyset_sort, page
+
+# page size cap for streamed responses (buffered ones stay at 200)
+STREAM_MAX_LIMIT = 5000
+
+# optional OutfitItem fields the model fills in (category/price/url: None)
+_ITEM_DEFAULTS = {n: f.default for n, f in OutfitItem.model_fields.items() if not f.is_required()}
 
 async def create_outfit(outfit_data: dict):
     """
@@ -15,7 +25,9 @@ async def create_outfit(outfit_data: dict):
     Raises:
         Exception: If there is an error during database operations.
     """
-    coll = await get_collection("outfits")
+    coll = get_collection("outfits")
+    # updated_at lets the recommendation catalog snapshot pick up changes incrementally
+    outfit_data.setdefault("updated_at", datetime.utcnow())
     result = await coll.insert_one(outfit_data)
     if not result.inserted_id:
         raise Exception("Insertion failed: No ID returned.")
@@ -34,22 +46,55 @@ async def get_outfit(outfit_id: str):
     Returns:
         Outfit or None: An instance of the Outfit model if found, otherwise None.
     """
-    coll = await get_collection("outfits")
+    coll = get_collection("outfits")
     outfit = await coll.find_one({"_id": ObjectId(outfit_id)})
     if outfit:
         return Outfit(**outfit)
     return None
 
-async def get_all_outfits():
-    coll = await get_collection("outfits")
-    cursor = coll.find({})
-    outfits = []
-    async for outfit in cursor:
-        outfits.append(Outfit(**outfit))
-    return outfits
+async def list_outfits(limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Outfit], Optional[str]]:
+    """
+    One page of the catalog in (created_at, _id) order, plus the cursor for
+    the next page (None on the last). Raises InvalidCursor for a malformed cursor.
+    """
+    docs, next_cursor = await list_outfit_docs(limit=limit, cursor=cursor)
+    return [Outfit(**d) for d in docs], next_cursor
+
+async def list_outfit_docs(
+    limit: int = 50, cursor: Optional[str] = None, projection: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """list_outfits' page as raw documents (Outfit defaults filled), reading only `projection`'s fields when given."""
+    coll = get_collection("outfits")
+    limit = min(200, max(1, limit))
+    found = coll.find(keyset_filter(cursor, 1), projection).sort(keyset_sort(1)).limit(limit + 1)
+    docs, next_cursor = page(await found.to_list(length=None), limit)
+    return [_with_defaults(d, projection) for d in docs], next_cursor
+
+def stream_outfits(
+    limit: int = 50, cursor: Optional[str] = None, projection: Optional[Dict[str, int]] = None
+) -> AsyncIterator[bytes]:
+    """
+    list_outfits' page as JSON bytes encoded from the cursor as it's read
+    (limit up to STREAM_MAX_LIMIT). Raises InvalidCursor before anything is streamed.
+    """
+    coll = get_collection("outfits")
+    limit = min(STREAM_MAX_LIMIT, max(1, limit))
+    found = coll.find(keyset_filter(cursor, 1), projection).sort(keyset_sort(1)).limit(limit + 1).batch_size(min(limit + 1, 500))
+    return json_stream.json_page(found, limit, lambda doc: _with_defaults(doc, projection))
+
+def _with_defaults(doc: dict, projection: Optional[Dict[str, int]] = None) -> dict:
+    """Fill the fields Outfit would default (only projected ones, if any), so streamed and buffered pages match."""
+    defaults = {"style_types": [], "body_types": [], "seasons": [], "is_active": True, "updated_at": doc.get("created_at")}
+    for f, v in defaults.items():
+        if projection is None or f in projection:
+            doc.setdefault(f, v)
+    if (projection is None or "items" in projection) and isinstance(doc.get("items"), list):
+        doc["items"] = [{**_ITEM_DEFAULTS, **i} if isinstance(i, dict) else i for i in doc["items"]]
+    return doc
 
 async def update_outfit(outfit_id: str, outfit_data: dict):
-    coll = await get_collection("outfits")
+    coll = get_collection("outfits")
+    outfit_data = {**outfit_data, "updated_at": datetime.utcnow()}
     result = await coll.update_one({"_id": ObjectId(outfit_id)}, {"$set": outfit_data})
     if result.modified_count:
         outfit = await coll.find_one({"_id": ObjectId(outfit_id)})
@@ -57,6 +102,6 @@ async def update_outfit(outfit_id: str, outfit_data: dict):
     return None
 
 async def delete_outfit(outfit_id: str):
-    coll = await get_collection("outfits")
+    coll = get_collection("outfits")
     result = await coll.delete_one({"_id": ObjectId(outfit_id)})
     return result.deleted_count > 0
\ No newline at end of file
@@ -0,0 +1,64 @@
+# services/pagination.py
+"""
+Opaque keyset cursors over (created_at, _id).
+
+A page query filters on "strictly after the last row of the previous page"
+instead of skipping, so it costs an index seek no matter how deep the page
+is. The cursor is the last row's (created_at, _id) in url-safe base64 JSON,
+and it records whether the _id was an ObjectId or a string. user_outfits
+stores its ids as strings, and BSON compares values of different types by type, not value.
+Clients treat the cursor as opaque and pass back `next_cursor` as `cursor`.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    created, oid = doc.get("created_at"), doc["_id"]
+    raw = json.dumps(
+        {"t": created.isoformat() if created else None, "i": str(oid), "o": isinstance(oid, ObjectId)},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], Union[ObjectId, str]]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created = datetime.fromisoformat(raw["t"]) if raw.get("t") else None
+        return created, ObjectId(raw["i"]) if raw.get("o") else str(raw["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+
+
+def keyset_sort(direction: int) -> List[Tuple[str, int]]:
+    return [("created_at", direction), ("_id", direction)]
+
+
+def keyset_filter(cursor: Optional[str], direction: int) -> Dict[str, Any]:
+    """Query clause selecting rows after `cursor` in (created_at, _id) `direction` order."""
+    if not cursor:
+        return {}
+    created, oid = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [
+        {"created_at": {op: created}},
+        {"created_at": created, "_id": {op: oid}},
+    ]}
+
+
+def page(docs: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Split a `limit + 1` fetch into (page rows, next_cursor or None on the last page)."""
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
@@ -0,0 +1,105 @@
+# services/quiz_funnel.py
+"""
+Materialized quiz funnel counters.
+
+One small doc per (UTC day, source) in `quiz_funnel`, bumped with a single
+upserted `$inc` from the quiz write paths:
+
+    {_id: "2025-01-31:landing", day: "2025-01-31", source: "landing",
+     started: 120, steps: {"0": 110, "1": 95, ...}, completed: 60}
+
+`steps.<n>` counts sessions that got past step n for the first time that
+day, so dashboards read a handful of docs instead of scanning `quiz_sessions`.
+"""
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+COLL = "quiz_funnel"
+DEFAULT_SOURCE = "direct"
+_SOURCE_RE = re.compile(r"^[a-z0-9_\-]{1,32}$")
+
+
+def normalize_source(source: Optional[str]) -> str:
+    """Bounded set of counter keys: anything odd is bucketed as "other"."""
+    if not source:
+        return DEFAULT_SOURCE
+    source = source.strip().lower()
+    return source if _SOURCE_RE.match(source) else "other"
+
+
+async def record(
+    db: AsyncIOMotorDatabase,
+    source: Optional[str],
+    *,
+    started: int = 0,
+    steps: Iterable[int] = (),
+    completed: int = 0,
+) -> None:
+    """Atomically bump today's counters; never raises (analytics must not break the quiz)."""
+    inc: Dict[str, int] = {}
+    if started:
+        inc["started"] = started
+    for n in steps:
+        inc[f"steps.{n}"] = inc.get(f"steps.{n}", 0) + 1
+    if completed:
+        inc["completed"] = completed
+    if not inc:
+        return
+
+    now = datetime.utcnow()
+    day = now.date().isoformat()
+    source = normalize_source(source)
+    try:
+        await db[COLL].update_one(
+            {"_id": f"{day}:{source}"},
+            {
+                "$inc": inc,
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"day": day, "source": source},
+            },
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Failed to record quiz funnel counters {inc}: {e}")
+
+
+async def get_funnel(
+    db: AsyncIOMotorDatabase,
+    *,
+    start: date,
+    end: date,
+    source: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Per-day counters plus totals for [start, end] (inclusive), optionally for one source."""
+    query: Dict[str, Any] = {"day": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+    if source:
+        query["source"] = normalize_source(source)
+
+    days: List[Dict[str, Any]] = []
+    totals: Dict[str, Any] = {"started": 0, "steps": {}, "completed": 0}
+    async for doc in db[COLL].find(query, {"_id": 0, "updated_at": 0}).sort([("day", 1), ("source", 1)]):
+        row = {
+            "day": doc["day"],
+            "source": doc["source"],
+            "started": doc.get("started", 0),
+            "steps": {str(k): v for k, v in (doc.get("steps") or {}).items()},
+            "completed": doc.get("completed", 0),
+        }
+        days.append(row)
+        totals["started"] += row["started"]
+        totals["completed"] += row["completed"]
+        for k, v in row["steps"].items():
+            totals["steps"][k] = totals["steps"].get(k, 0) + v
+
+    return {"start": start.isoformat(), "end": end.isoformat(), "source": source, "days": days, "totals": totals}
+
+
+def default_range(days: int = 30) -> tuple:
+    end = datetime.utcnow().date()
+    return end - timedelta(days=days - 1), end
@@ -0,0 +1,80 @@
+# services/quiz_questions.py
+"""
+The quiz structure served by GET /api/quiz/questions.
+
+It only changes with a deploy, so it is loaded from data/quiz_questions.json
+and encoded once at import: the JSON bytes, a gzip (and, when the optional
+`brotli` package is installed, a br) variant, and a strong ETag per variant.
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+QUIZ_QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "quiz_questions.json"
+QUIZ_QUESTIONS_MAX_AGE = int(os.getenv("QUIZ_QUESTIONS_MAX_AGE", "3600"))
+
+
+class QuizQuestionsPayload:
+    """Pre-encoded representations of one quiz structure, keyed by content-coding."""
+    def __init__(self, structure: Dict[str, Any]):
+        self.structure = structure
+        # same compact encoding FastAPI's JSONResponse would produce
+        body = json.dumps(structure, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[str, Tuple[bytes, str]] = {
+            "identity": (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+        self.cache_control = f"public, max-age={QUIZ_QUESTIONS_MAX_AGE}"
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[str, bytes, str]:
+        """(coding, body, etag) for the best variant the client accepts."""
+        accepted = _accepted_codings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and coding in accepted:
+                return (coding, *self.variants[coding])
+        return ("identity", *self.variants["identity"])
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """True if If-None-Match names any of our variants (weak comparison)."""
+        if not if_none_match:
+            return False
+        tags = {t.strip() for t in if_none_match.split(",")}
+        if "*" in tags:
+            return True
+        return bool({t[2:] if t.startswith("W/") else t for t in tags} & self.etags)
+
+
+def _accepted_codings(accept_encoding: Optional[str]) -> set:
+    out = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            out.add(coding.strip().lower())
+    return out
+
+
+def load_quiz_questions(path: Path = QUIZ_QUESTIONS_FILE) -> QuizQuestionsPayload:
+    with open(path, encoding="utf-8") as f:
+        return QuizQuestionsPayload(json.load(f))
+
+
+quiz_questions = load_quiz_questions()
@@ -1,18 +1,46 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.quiz import QuizSession, QuizStepSubmission, QuizResponses, StyleProfile
 from services.recommendation_engine import RecommendationEngine
+from services import quiz_funnel
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from services.maintenance import batched_delete
+from services.user_service import apply_quiz_to_user
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# steps are numbered 0..LAST_STEP (six steps, see GET /api/quiz/questions)
+LAST_STEP = 5
+# Incomplete quiz sessions expire this long after their last write
+# (TTL index on expires_at, partial on is_completed: false)
+QUIZ_SESSION_TTL_HOURS = float(os.getenv("QUIZ_SESSION_TTL_HOURS", "24"))
+QUIZ_CLEANUP_INTERVAL_SECONDS = float(os.getenv("QUIZ_CLEANUP_INTERVAL_SECONDS", "3600"))
+
+def _expires_at(now: datetime) -> datetime:
+    return now + timedelta(hours=QUIZ_SESSION_TTL_HOURS)
+
+def _answers_error(answers: Dict[str, Any]) -> Optional[str]:
+    """Why one step's answers can't be stored as QuizResponses fields, or None."""
+    unknown = sorted(set(answers) - set(QuizResponses.model_fields))
+    if unknown:
+        return f"Unknown answers: {', '.join(unknown)}"
+    try:
+        QuizResponses.model_validate(answers)
+    except ValidationError as e:
+        first = e.errors()[0]
+        return f"{first['loc'][0]}: {first['msg']}"
+    return None
+
 class QuizService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.recommendation_engine = RecommendationEngine()
         
-    async def start_quiz_session(self, cookie_session_id: str) -> Dict[str, Any]:
+    async def start_quiz_session(self, cookie_session_id: str, source: Optional[str] = None) -> Dict[str, Any]:
         """
         Ensure a quiz_session doc exists for the given cookie session_id.
         If one exists and not completed, resume it; otherwise create a new doc keyed by session_id.
@@ -29,13 +57,18 @@ class QuizService:
             logger.warning(f"Starting new quiz session: {cookie_session_id}")
             # Create a new quiz session bound to the cookie sid
             now = datetime.utcnow()
-            quiz_session = QuizSession(session_id=cookie_session_id)  # <-- use provided id
+            quiz_session = QuizSession(
+                session_id=cookie_session_id,  # <-- use provided id
+                source=quiz_funnel.normalize_source(source),
+                expires_at=_expires_at(now),
+            )
             doc = quiz_session.dict(by_alias=True)
             # ensure timestamps even if model already has them
             doc.setdefault("created_at", now)
             doc.setdefault("updated_at", now)
 
             await self.db.quiz_sessions.insert_one(doc)
+            await quiz_funnel.record(self.db, quiz_session.source, started=1)
             logger.info(f"Started new quiz session: {cookie_session_id}")
 
             return {
@@ -51,34 +84,75 @@ class QuizService:
         """
         Save step answers for the bound cookie session.
         """
+        return await self.submit_quiz_steps(
+            submission.session_id,
+            [(submission.step_number, submission.answers)],
+        )
+
+    async def submit_quiz_steps(self, session_id: str, steps: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Save one or more steps' answers in a single conditional update.
+        Every step (number and answers) is validated before anything is
+        written; later steps win when two steps set the same answer.
+        """
         try:
-            # session lookup
-            session = await self.db.quiz_sessions.find_one({"session_id": submission.session_id})
-            if not session:
-                raise Exception("Quiz session not found")
+            errors = {}
+            for i, (step_number, answers) in enumerate(steps):
+                if step_number < 0 or step_number > LAST_STEP:
+                    error = "Invalid step number"
+                else:
+                    error = _answers_error(answers)
+                if error:
+                    errors["general" if len(steps) == 1 else f"steps.{i}"] = error
+            if errors:
+                logger.warning(f"Rejected quiz steps for session {session_id}: {errors}")
+                return {
+                    "next_step": None,
+                    "is_complete": False,
+                    "validation_errors": errors,
+                    "message": "Failed to submit step"
+                }
 
-            if submission.step_number < 0 or submission.step_number > 5:
-                raise Exception("Invalid step number")
-            
             # build $set update
-            update_data = {f"responses.{k}": v for k, v in submission.answers.items()}
-            update_data["current_step"] = submission.step_number + 1
-            update_data["updated_at"] = datetime.utcnow()
+            update_data = {}
+            for _, answers in steps:
+                update_data.update({f"responses.{k}": v for k, v in answers.items()})
+            last_step = max(step_number for step_number, _ in steps)
+            now = datetime.utcnow()
+            update_data["current_step"] = last_step + 1
+            update_data["updated_at"] = now
+            update_data["expires_at"] = _expires_at(now)
 
-            await self.db.quiz_sessions.update_one(
-                {"session_id": submission.session_id},
-                {"$set": update_data}
+            # no pre-read: the pre-image (projected) tells us whether the session
+            # exists and which steps it reaches for the first time (funnel)
+            before = await self.db.quiz_sessions.find_one_and_update(
+                {"session_id": session_id},
+                {
+                    "$set": update_data,
+                    "$max": {"furthest_step": last_step + 1},
+                    "$unset": {"analysis": ""},  # stale once answers change
+                },
+                projection={"furthest_step": 1, "current_step": 1, "source": 1},
+                return_document=ReturnDocument.BEFORE,
             )
+            if before is None:
+                raise Exception("Quiz session not found")
+
+            # funnel credit only for submitted steps this session hadn't passed yet
+            # (a sparse batch skips the steps in between)
+            furthest = before.get("furthest_step", before.get("current_step", 0))
+            first_passed = sorted({n for n, _ in steps if n >= furthest})
+            await quiz_funnel.record(self.db, before.get("source"), steps=first_passed)
 
-            is_complete = submission.step_number >= 5
-            next_step = None if is_complete else submission.step_number + 1
+            is_complete = last_step >= LAST_STEP
+            next_step = None if is_complete else last_step + 1
 
-            logger.info(f"Quiz step {submission.step_number} submitted for session {submission.session_id}")
+            logger.info(f"Quiz steps {[n for n, _ in steps]} submitted for session {session_id}")
             return {
                 "next_step": next_step,
                 "is_complete": is_complete,
                 "validation_errors": None,
-                "message": "Step submitted successfully"
+                "message": "Step submitted successfully" if len(steps) == 1 else "Steps submitted successfully"
             }
         except Exception as e:
             logger.error(f"Error submitting quiz step: {str(e)}")
@@ -89,35 +163,53 @@ class QuizService:
                 "message": "Failed to submit step"
             }
     
-    async def complete_quiz(self, session_id: str) -> Dict[str, Any]:
+    async def complete_quiz(self, session_id: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Mark as completed and generate recommendations for this cookie session_id.
+        For a signed-in user the answers are also folded into their style vector
+        and daily-suggestion preferences.
         """
         try:
             session = await self.db.quiz_sessions.find_one({"session_id": session_id})
             if not session:
                 raise Exception("Quiz session not found")
 
-            await self.db.quiz_sessions.update_one(
-                {"session_id": session_id},
+            quiz_responses = QuizResponses(**session.get("responses", {}))
+            analysis = await self.recommendation_engine.analyze_profile(quiz_responses)
+            analysis_doc = analysis.to_doc()
+
+            # only the first completion flips the flag (and counts in the funnel)
+            now = datetime.utcnow()
+            result = await self.db.quiz_sessions.update_one(
+                {"session_id": session_id, "is_completed": {"$ne": True}},
                 {"$set": {
                     "is_completed": True,
-                    "completed_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }}
+                    "completed_at": now,
+                    "updated_at": now,
+                    "analysis": analysis_doc,
+                }, "$unset": {"expires_at": ""}}
             )
+            if result.modified_count:
+                await quiz_funnel.record(self.db, session.get("source"), completed=1)
+            else:
+                # re-completion (e.g. answers edited afterwards): refresh the stored analysis
+                await self.db.quiz_sessions.update_one(
+                    {"session_id": session_id},
+                    {"$set": {"analysis": analysis_doc, "updated_at": now}}
+                )
 
-            quiz_responses = QuizResponses(**session.get("responses", {}))
-            logger.debug(f"Quiz responses for session {session_id}: {quiz_responses.dict()}")
-            recommendations = await self.recommendation_engine.generate_recommendations(quiz_responses)
-            style_profile = await self.recommendation_engine.analyze_style_profile(quiz_responses)
-            confidence_score = await self.recommendation_engine.calculate_confidence_score(quiz_responses)
+            if user_id:
+                try:
+                    await apply_quiz_to_user(user_id, quiz_responses)
+                except Exception as e:
+                    # the vector is rebuilt on the next quiz/profile change; don't fail completion
+                    logger.error(f"Failed to apply quiz answers to user {user_id}: {e}")
 
             logger.info(f"Quiz completed for session {session_id}")
             return {
-                "recommendations": recommendations,
-                "confidence_score": confidence_score,
-                "style_profile": style_profile
+                "recommendations": analysis.recommendations,
+                "confidence_score": analysis.confidence_score,
+                "style_profile": analysis.style_profile
             }
         except Exception as e:
             logger.error(f"Error completing quiz: {str(e)}")
@@ -159,10 +251,13 @@ class QuizService:
             if not session.get("is_completed", False):
                 raise Exception("Quiz not completed yet")
 
-            quiz_responses = QuizResponses(**session.get("responses", {}))
-
-            # 1. Analyze user responses to create a structured profile
-            style_profile = await self.recommendation_engine.analyze_style_profile(quiz_responses)
+            # 1. Structured profile: stored by complete_quiz, else analyze now
+            stored = (session.get("analysis") or {}).get("style_profile")
+            if stored:
+                style_profile = StyleProfile(**stored)
+            else:
+                quiz_responses = QuizResponses(**session.get("responses", {}))
+                style_profile = await self.recommendation_engine.analyze_style_profile(quiz_responses)
 
             # 2. Use the profile to get recommendations from Gemini
             recommendations = await self.recommendation_engine.get_gemini_recommendations(style_profile)
@@ -173,15 +268,22 @@ class QuizService:
             logger.error(f"Error getting quiz results: {str(e)}")
             raise Exception("Failed to get quiz results")
     
-    async def cleanup_old_sessions(self):
-        """Clean up quiz sessions older than 24 hours"""
+    async def cleanup_old_sessions(self) -> int:
+        """
+        Delete abandoned sessions the TTL index can't see: incomplete docs
+        written before `expires_at` existed. Batched and rate limited; run
+        periodically by the maintenance scheduler.
+        """
         try:
-            cutoff_date = datetime.utcnow() - timedelta(hours=24)
-            result = await self.db.quiz_sessions.delete_many(
-                {"created_at": {"$lt": cutoff_date}, "is_completed": False}
+            cutoff_date = datetime.utcnow() - timedelta(hours=QUIZ_SESSION_TTL_HOURS)
+            deleted = await batched_delete(
+                self.db.quiz_sessions,
+                {"is_completed": False, "expires_at": None, "created_at": {"$lt": cutoff_date}},
             )
             
-            logger.info(f"Cleaned up {result.deleted_count} old quiz sessions")
+            logger.info(f"Cleaned up {deleted} old quiz sessions")
+            return deleted
             
         except Exception as e:
-            logger.error(f"Error cleaning up old sessions: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error cleaning up old sessions: {str(e)}")
+            return 0
@@ -0,0 +1,188 @@
+# services/recs_events.py
+"""
+Push notifications for recommendation updates.
+
+Subscribers (long-poll / SSE handlers) wait on a per-rec queue instead of
+re-reading `recommendations` on a timer. Two feeds publish into it:
+
+  * a Mongo change stream on `recommendations` (replica sets / Atlas), which
+    sees writes from every process, including out-of-process recs workers;
+  * direct `publish()` calls from the writers in this process.
+
+Both may fire for the same write; consumers de-duplicate on `updated_at`.
+Without a live change stream (standalone mongod, RECS_CHANGE_STREAMS=off)
+writes from out-of-process workers never reach the bus, so `wait_for_change`
+also re-reads the doc every RECS_POLL_FALLBACK_SECONDS while it waits.
+"""
+import asyncio
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from database import get_collection
+
+logger = logging.getLogger(__name__)
+
+RECS = "recommendations"
+# "auto": use change streams when the server supports them; "off": in-process only
+RECS_CHANGE_STREAMS = os.getenv("RECS_CHANGE_STREAMS", "auto").lower()
+
+# Event = the post-image doc when the change stream supplied one, else None (re-read)
+Event = Optional[Dict[str, Any]]
+
+# server error codes: change streams need a replica set / sharded cluster
+CHANGE_STREAMS_UNSUPPORTED = {40573}
+# the resume token fell off the oplog or can't be used; reopen from "now"
+RESUME_TOKEN_LOST = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+RECS_CHANGE_STREAM_MAX_BACKOFF_SECONDS = float(os.getenv("RECS_CHANGE_STREAM_MAX_BACKOFF_SECONDS", "30"))
+# re-read interval for waiters while no change stream is live
+RECS_POLL_FALLBACK_SECONDS = float(os.getenv("RECS_POLL_FALLBACK_SECONDS", "1"))
+
+
+class RecsEventBus:
+    """In-process fan-out of "rec X changed" events. Latest event wins per subscriber."""
+    def __init__(self):
+        self._subs: Dict[str, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, rec_id: str) -> Iterator[asyncio.Queue]:
+        q: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subs.setdefault(rec_id, set()).add(q)
+        try:
+            yield q
+        finally:
+            subs = self._subs.get(rec_id)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    self._subs.pop(rec_id, None)
+
+    def publish(self, rec_id: str, doc: Event = None) -> None:
+        for q in self._subs.get(rec_id, ()):
+            if q.full():
+                # subscriber hasn't consumed the previous event; only the newest matters
+                q.get_nowait()
+            q.put_nowait(doc)
+
+    def has_subscribers(self, rec_id: str) -> bool:
+        return rec_id in self._subs
+
+
+bus = RecsEventBus()
+
+
+def publish(rec_id, doc: Event = None) -> None:
+    """Notify local subscribers that `rec_id` changed (call after each write)."""
+    bus.publish(str(rec_id), doc)
+
+
+class RecsChangeStream:
+    """Feeds `bus` from a change stream on `recommendations`; no-op on standalone servers."""
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.live = False  # a stream is open: every process's writes reach the bus
+
+    def start(self) -> None:
+        if RECS_CHANGE_STREAMS == "off":
+            logger.info(f"Recommendation change stream disabled; waiters poll every {RECS_POLL_FALLBACK_SECONDS}s")
+            return
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        coll = get_collection(RECS)
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace"]}}}]
+        resume_token = None
+        failures = 0
+        while True:
+            try:
+                async with coll.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                ) as stream:
+                    logger.info("Recommendation change stream started")
+                    self.live = True
+                    failures = 0
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        rec_id = str(change["documentKey"]["_id"])
+                        if bus.has_subscribers(rec_id):
+                            bus.publish(rec_id, change.get("fullDocument"))
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(
+                        "Change streams unavailable (standalone mongod?): updates from out-of-process "
+                        f"recs workers reach waiters by polling every {RECS_POLL_FALLBACK_SECONDS}s: {e}"
+                    )
+                    return
+                if e.code in RESUME_TOKEN_LOST and resume_token is not None:
+                    # changes missed meanwhile reach waiters on their next poll
+                    logger.warning(f"Recommendation change stream can't resume, reopening without a token: {e}")
+                    resume_token = None
+                    continue
+                failures += 1
+                logger.warning(f"Recommendation change stream failed, retrying: {e}")
+                await asyncio.sleep(self._backoff(failures))
+            except PyMongoError as e:
+                failures += 1
+                logger.warning(f"Recommendation change stream interrupted, resuming: {e}")
+                await asyncio.sleep(self._backoff(failures))
+            finally:
+                self.live = False
+
+    @staticmethod
+    def _backoff(failures: int) -> float:
+        return min(RECS_CHANGE_STREAM_MAX_BACKOFF_SECONDS, 2 ** (failures - 1))
+
+
+change_stream = RecsChangeStream()
+
+
+async def wait_for_change(
+    updates: asyncio.Queue,
+    reread: Callable[[], Awaitable[Event]],
+    seen: Any,
+    timeout: float,
+) -> Event:
+    """
+    Next version of a rec from its `updates` subscription: the published doc,
+    or a re-read one (None if it's gone). While no change stream is live the
+    doc is also re-read every RECS_POLL_FALLBACK_SECONDS and returned once its
+    `updated_at` differs from `seen`. Raises asyncio.TimeoutError after `timeout`.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        polling = not change_stream.live
+        try:
+            event = await asyncio.wait_for(
+                updates.get(), timeout=min(remaining, RECS_POLL_FALLBACK_SECONDS) if polling else remaining
+            )
+        except asyncio.TimeoutError:
+            if not polling:
+                raise
+            doc = await reread()
+            if doc is None or doc.get("updated_at") != seen:
+                return doc
+            continue
+        return event or await reread()
@@ -1,15 +1,23 @@
 # services/recs_processor.py
 import asyncio
+import logging
+import os
 from datetime import datetime
 from bson import ObjectId
 from typing import List
-from db import get_collection
+from database import get_collection
 from models.recs import Recommendation, ItemWithLinks, ProductLink
 from services.search_service import find_links_for_item
+from services.recs_events import publish
+
+logger = logging.getLogger(__name__)
 
 RECS = "recommendations"
+# max concurrent link searches per recommendation
+RECS_ITEM_CONCURRENCY = int(os.getenv("RECS_ITEM_CONCURRENCY", "4"))
 
 async def process_recommendation(rec_id: ObjectId, user_id: ObjectId):
+    """In-process entry point (BackgroundTasks): errors are recorded on the doc, never raised."""
     coll = get_collection(RECS)
     doc = await coll.find_one({"_id": rec_id, "user_id": user_id})
     if not doc:
@@ -17,36 +25,85 @@ async def process_recommendation(rec_id: ObjectId, user_id: ObjectId):
 
     rec = Recommendation.model_validate(doc)
     try:
-        # fetch links concurrently (throttle with a semaphore if needed)
-        results = await asyncio.gather(*[
-            find_links_for_item(item) for item in rec.items
-        ])
-
-        # attach results to items
-        for i, links in enumerate(results):
-            # keep top 6 unique links per item
-            unique, seen = [], set()
-            for l in links:
-                key = canonical_key(l.url)
-                if key in seen: continue
-                seen.add(key)
-                unique.append(l)
-                if len(unique) >= 6: break
-            rec.items[i].links = unique
-
-        await coll.update_one(
-            {"_id": rec.id},
-            {"$set": {
-                "items": [i.model_dump() for i in rec.items],
-                "status": "complete",
-                "updated_at": datetime.utcnow(),
-            }}
-        )
+        await enrich_recommendation(rec)
     except Exception as e:
         await coll.update_one(
             {"_id": rec.id},
             {"$set": {"status": "error", "meta.error": str(e), "updated_at": datetime.utcnow()}}
         )
+        publish(rec.id)
+
+async def enrich_recommendation(rec: Recommendation) -> None:
+    """
+    Fetch links for each item with bounded concurrency, writing every item's
+    links (positional `$set` on `items.<i>`) as soon as its search returns.
+    Items that already completed (e.g. before a lease was lost) are skipped.
+    `meta.items_done` / `meta.items_failed` move only when an item's status
+    changes, so retried recs (recs worker) don't count an item twice.
+
+    The rec ends up "complete" if at least one item found links or every item
+    finished; failed items keep their own `status="error"`. Raises only when
+    every attempted item failed, so callers (e.g. the recs worker) can retry.
+    """
+    coll = get_collection(RECS)
+    sem = asyncio.Semaphore(RECS_ITEM_CONCURRENCY)
+    todo = [i for i, item in enumerate(rec.items) if item.status != "complete"]
+
+    async def run(i: int) -> bool:
+        prev = rec.items[i].status
+        async with sem:
+            try:
+                links = _top_unique(await find_links_for_item(rec.items[i]))
+            except Exception as e:
+                logger.warning(f"Link search failed for rec {rec.id} item {i}: {e}")
+                update = {"$set": {
+                    f"items.{i}.status": "error",
+                    f"items.{i}.error": str(e),
+                    "updated_at": datetime.utcnow(),
+                }}
+                counts = {} if prev == "error" else {"meta.items_failed": 1}
+                ok = False
+            else:
+                update = {"$set": {
+                    f"items.{i}.links": [l.model_dump(mode="json") for l in links],
+                    f"items.{i}.status": "complete",
+                    f"items.{i}.error": None,
+                    "updated_at": datetime.utcnow(),
+                }}
+                counts = {"meta.items_done": 1}
+                if prev == "error":
+                    counts["meta.items_failed"] = -1
+                ok = True
+        # counters only move if the item is still in the state this attempt started from
+        res = await coll.update_one(
+            {"_id": rec.id, f"items.{i}.status": prev},
+            {**update, "$inc": counts} if counts else update,
+        )
+        if res.matched_count == 0:
+            await coll.update_one({"_id": rec.id}, update)
+        publish(rec.id)
+        return ok
+
+    results = await asyncio.gather(*[run(i) for i in todo])
+    if todo and not any(results):
+        raise RuntimeError(f"Link search failed for all {len(todo)} items")
+
+    await coll.update_one(
+        {"_id": rec.id},
+        {"$set": {"status": "complete", "updated_at": datetime.utcnow()}}
+    )
+    publish(rec.id)
+
+def _top_unique(links: List[ProductLink], limit: int = 6) -> List[ProductLink]:
+    # keep top 6 unique links per item
+    unique, seen = [], set()
+    for l in links:
+        key = canonical_key(str(l.url))
+        if key in seen: continue
+        seen.add(key)
+        unique.append(l)
+        if len(unique) >= limit: break
+    return unique
 
 def canonical_key(url: str) -> str:
     # strip utm params etc. (tune as needed)
@@ -0,0 +1,221 @@
+# services/recs_worker.py
+"""
+Durable worker pool for the `recommendations` collection.
+
+A recommendation document *is* the job: `POST /api/recs` inserts it with
+status "pending" and any worker process can pick it up. Workers claim jobs with
+an atomic `find_one_and_update` lease, extend the lease while they work
+(heartbeat), retry failures with exponential backoff and dead-letter jobs that
+keep failing. Crashed workers simply stop heartbeating; their lease expires and
+another worker re-claims the job.
+
+Run it next to the API with `python cli.py recs-worker --concurrency 8`.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+
+from database import get_collection
+from models.recs import Recommendation
+from services.recs_processor import enrich_recommendation, RECS
+from services.recs_events import publish
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER = "recommendations_dead"
+
+RECS_WORKER_CONCURRENCY = int(os.getenv("RECS_WORKER_CONCURRENCY", "4"))
+RECS_LEASE_SECONDS = float(os.getenv("RECS_LEASE_SECONDS", "60"))
+RECS_POLL_SECONDS = float(os.getenv("RECS_POLL_SECONDS", "2"))
+RECS_MAX_ATTEMPTS = int(os.getenv("RECS_MAX_ATTEMPTS", "5"))
+RECS_BACKOFF_BASE_SECONDS = float(os.getenv("RECS_BACKOFF_BASE_SECONDS", "5"))
+RECS_BACKOFF_MAX_SECONDS = float(os.getenv("RECS_BACKOFF_MAX_SECONDS", "600"))
+
+# Lease bookkeeping lives on the recommendation doc itself
+LEASE_FIELDS = ("lease_owner", "lease_expires_at")
+
+
+def _claimable_filter(now: datetime) -> Dict[str, Any]:
+    # `{"field": None}` also matches docs where the field is missing
+    return {
+        "status": "pending",
+        "$and": [
+            {"$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]},
+            {"$or": [{"next_attempt_at": None}, {"next_attempt_at": {"$lte": now}}]},
+        ],
+    }
+
+
+def backoff_seconds(attempt: int, base: float = RECS_BACKOFF_BASE_SECONDS, cap: float = RECS_BACKOFF_MAX_SECONDS) -> float:
+    """Exponential backoff with full jitter for the given (1-based) attempt."""
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempt - 1))))
+
+
+class RecsWorker:
+    """
+    Claims pending recommendations and processes them with `concurrency`
+    independent tasks. One instance per process; scale by running more processes.
+    """
+    def __init__(
+        self,
+        *,
+        concurrency: int = RECS_WORKER_CONCURRENCY,
+        lease_seconds: float = RECS_LEASE_SECONDS,
+        poll_seconds: float = RECS_POLL_SECONDS,
+        max_attempts: int = RECS_MAX_ATTEMPTS,
+        worker_id: Optional[str] = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Ask all slots to finish their current job and exit."""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(f"Recs worker {self.worker_id} starting with {self.concurrency} slots")
+        await asyncio.gather(*[self._slot(n) for n in range(self.concurrency)])
+        logger.info(f"Recs worker {self.worker_id} stopped")
+
+    async def _slot(self, n: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                doc = await self.claim()
+            except Exception as e:
+                logger.error(f"[slot {n}] claim failed: {e}")
+                doc = None
+
+            if doc is None:
+                # idle: jittered sleep so slots don't poll in lockstep
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(),
+                        timeout=self.poll_seconds * random.uniform(0.5, 1.5),
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.handle(doc)
+            except Exception as e:
+                # e.g. a failed _fail/_release write: the lease expires and the job is retried
+                logger.error(f"[slot {n}] handling rec {doc.get('_id')} failed: {e}")
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically lease the oldest claimable recommendation, if any."""
+        coll = get_collection(RECS)
+        now = datetime.utcnow()
+        return await coll.find_one_and_update(
+            _claimable_filter(now),
+            {
+                "$set": {
+                    "lease_owner": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "claimed_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def handle(self, doc: Dict[str, Any]) -> None:
+        rec_id = doc["_id"]
+        attempt = int(doc.get("attempts") or 1)
+        try:
+            rec = Recommendation.model_validate(doc)
+        except ValidationError as e:
+            # retrying can't fix a malformed doc: dead-letter it now
+            logger.error(f"Rec {rec_id} is malformed: {e}")
+            await self._fail(doc, attempt, e, permanent=True)
+            return
+        lease_lost = asyncio.Event()
+        job = asyncio.create_task(enrich_recommendation(rec))
+        beat = asyncio.create_task(self._heartbeat(rec_id, job, lease_lost))
+        try:
+            await job
+        except asyncio.CancelledError:
+            if lease_lost.is_set():
+                logger.warning(f"Lease lost on rec {rec_id}; another worker owns it now")
+                return
+            raise
+        except Exception as e:
+            logger.warning(f"Rec {rec_id} attempt {attempt}/{self.max_attempts} failed: {e}")
+            await self._fail(doc, attempt, e)
+            return
+        finally:
+            beat.cancel()
+
+        await self._release(rec_id)
+        logger.info(f"Rec {rec_id} processed on attempt {attempt}")
+
+    async def _heartbeat(self, rec_id, job: asyncio.Task, lease_lost: asyncio.Event) -> None:
+        coll = get_collection(RECS)
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            res = await coll.update_one(
+                {"_id": rec_id, "lease_owner": self.worker_id},
+                {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+            )
+            if res.matched_count == 0:
+                lease_lost.set()
+                job.cancel()
+                return
+
+    async def _release(self, rec_id) -> None:
+        coll = get_collection(RECS)
+        await coll.update_one(
+            {"_id": rec_id, "lease_owner": self.worker_id},
+            {"$unset": {f: "" for f in LEASE_FIELDS + ("next_attempt_at",)}},
+        )
+
+    async def _fail(self, doc: Dict[str, Any], attempt: int, err: Exception, permanent: bool = False) -> None:
+        coll = get_collection(RECS)
+        now = datetime.utcnow()
+        owned = {"_id": doc["_id"], "lease_owner": self.worker_id}
+        unset_lease = {f: "" for f in LEASE_FIELDS}
+
+        if permanent or attempt >= self.max_attempts:
+            await get_collection(DEAD_LETTER).insert_one({
+                "rec_id": doc["_id"],
+                "user_id": doc.get("user_id"),
+                "attempts": attempt,
+                "error": str(err),
+                "doc": doc,
+                "failed_at": now,
+            })
+            await coll.update_one(owned, {
+                "$set": {
+                    "status": "error",
+                    "meta.error": str(err),
+                    "meta.dead_lettered": True,
+                    "updated_at": now,
+                },
+                "$unset": unset_lease,
+            })
+            publish(doc["_id"])
+            logger.error(f"Rec {doc['_id']} dead-lettered after {attempt} attempts")
+            return
+
+        await coll.update_one(owned, {
+            "$set": {
+                "next_attempt_at": now + timedelta(seconds=backoff_seconds(attempt)),
+                "meta.last_error": str(err),
+                "updated_at": now,
+            },
+            "$unset": unset_lease,
+        })
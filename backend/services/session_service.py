@@ -1,26 +1,291 @@
+import asyncio
+import base64
+import hashlib
+import hmac
 import logging
-import os, secrets
+import os, secrets, time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import HTTPException
+from pymongo import UpdateOne
 from database import get_collection
 from models.session import SessionDoc, DEFAULT_TTL_DAYS
 from bson import ObjectId
 from typing import Any, Dict
 
+logger = logging.getLogger(__name__)
+
 COLL = "sessions"
 COOKIE_NAME = "sid"
 SESSION_TTL_DAYS = int(os.getenv("SESSION_TTL_DAYS", str(DEFAULT_TTL_DAYS)))
 
+# In-process SessionDoc cache. Logged-in sessions only change through this module
+# (attach_user), so they can be cached for longer. Anonymous ones (and "no doc yet"
+# misses) turn stale when another worker attaches a user to them, so they're only
+# cached with SESSION_CACHE_SYNC: attach_user then bumps a counter in
+# `cache_versions` and appends the sid to a short log there. Every worker polls
+# it and drops the logged sids (everything, if it fell behind the log).
+# No entry outlives its session's `expires_at`.
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+SESSION_CACHE_ANON_TTL_SECONDS = float(os.getenv("SESSION_CACHE_ANON_TTL_SECONDS", "10"))
+SESSION_CACHE_MAX = int(os.getenv("SESSION_CACHE_MAX", "10000"))
+SESSION_CACHE_SYNC = os.getenv("SESSION_CACHE_SYNC", "false").lower() == "true"
+SESSION_CACHE_SYNC_SECONDS = float(os.getenv("SESSION_CACHE_SYNC_SECONDS", "2"))
+SESSION_CACHE_SYNC_LOG = int(os.getenv("SESSION_CACHE_SYNC_LOG", "1000"))
+CACHE_VERSIONS = "cache_versions"
+# Write-behind touches: persist last_seen_at/expires_at at most once per interval per sid
+SESSION_TOUCH_INTERVAL_SECONDS = float(os.getenv("SESSION_TOUCH_INTERVAL_SECONDS", "300"))
+SESSION_TOUCH_FLUSH_SECONDS = float(os.getenv("SESSION_TOUCH_FLUSH_SECONDS", "10"))
+# Issue HMAC-signed anonymous session tokens instead of inserting a doc per new visitor.
+# The doc is only written once something is stored on the session (see persist_session).
+SESSION_STATELESS_ANON = os.getenv("SESSION_STATELESS_ANON", "false").lower() == "true"
+ANON_TOKEN_PREFIX = "a1"
+
+# cache marker for "looked up, no doc" (unpersisted anonymous tokens)
+_MISS = object()
+
+
+class _SessionCache:
+    """Small LRU of SessionDoc keyed by sid, with per-entry expiry."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, SessionDoc]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, sid: str):
+        """Cached SessionDoc, None if known to have no doc, or _MISS if not cached."""
+        hit = self._data.get(sid)
+        if hit is None:
+            return _MISS
+        expires, doc = hit
+        if expires < time.monotonic():
+            self._data.pop(sid, None)
+            return _MISS
+        self._data.move_to_end(sid)
+        return doc
+
+    def put(self, doc: SessionDoc) -> None:
+        if doc.user_id:
+            self._store(doc.session_id, doc, SESSION_CACHE_TTL_SECONDS)
+        elif SESSION_CACHE_SYNC:
+            self._store(doc.session_id, doc, SESSION_CACHE_ANON_TTL_SECONDS)
+
+    def put_missing(self, sid: str) -> None:
+        if SESSION_CACHE_SYNC:
+            self._store(sid, None, SESSION_CACHE_ANON_TTL_SECONDS)
+
+    def _store(self, sid: str, doc: Optional[SessionDoc], ttl: float) -> None:
+        if doc is not None:
+            ttl = min(ttl, (doc.expires_at - datetime.utcnow()).total_seconds())
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data[sid] = (time.monotonic() + ttl, doc)
+        self._data.move_to_end(sid)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, sid: str) -> None:
+        self._data.pop(sid, None)
+
+    async def user_changed(self, sid: str) -> None:
+        """`sid` gained (or lost) a user: drop it here and, with sync, on every other worker."""
+        self.invalidate(sid)
+        if SESSION_CACHE_SYNC:
+            try:
+                await get_collection(CACHE_VERSIONS).update_one(
+                    {"_id": COLL},
+                    {"$inc": {"v": 1}, "$push": {"sids": {"$each": [sid], "$slice": -SESSION_CACHE_SYNC_LOG}}},
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.error(f"Failed to bump session cache version: {e}")
+
+    def start(self) -> None:
+        if SESSION_CACHE_SYNC and self._task is None:
+            self._task = asyncio.create_task(self._sync())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sync_once(self) -> None:
+        """Drop the sids whose user changed on any worker since the last poll."""
+        doc = await get_collection(CACHE_VERSIONS).find_one({"_id": COLL}) or {}
+        v, sids = doc.get("v", 0), doc.get("sids", [])
+        if self._version is not None and v != self._version:
+            moved = v - self._version
+            if 0 < moved <= len(sids):
+                for sid in sids[-moved:]:
+                    self.invalidate(sid)
+            else:
+                self._data.clear()  # fell behind the log (or the counter was reset)
+        self._version = v
+
+    async def _sync(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                logger.warning(f"Session cache version poll failed: {e}")
+            await asyncio.sleep(SESSION_CACHE_SYNC_SECONDS)
+
+
+class _TouchBuffer:
+    """
+    Coalesces touch_session() calls. A sid is queued at most once per
+    SESSION_TOUCH_INTERVAL_SECONDS; queued touches are written in one
+    unordered bulk_write every SESSION_TOUCH_FLUSH_SECONDS.
+    """
+    def __init__(self):
+        self._pending: Dict[str, datetime] = {}
+        self._last_queued: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, sid: str) -> None:
+        now = time.monotonic()
+        last = self._last_queued.get(sid)
+        if last is not None and now - last < SESSION_TOUCH_INTERVAL_SECONDS:
+            return
+        self._last_queued[sid] = now
+        self._pending[sid] = datetime.utcnow()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        ttl = timedelta(days=SESSION_TTL_DAYS)
+        ops = [
+            UpdateOne(
+                {"session_id": sid},
+                {"$max": {"last_seen_at": seen, "expires_at": seen + ttl}},
+            )
+            for sid, seen in batch.items()
+        ]
+        try:
+            await get_collection(COLL).bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(ops)} session touches: {e}")
+        self._forget_stale()
+        return len(ops)
+
+    def _forget_stale(self) -> None:
+        cutoff = time.monotonic() - SESSION_TOUCH_INTERVAL_SECONDS
+        self._last_queued = {sid: t for sid, t in self._last_queued.items() if t >= cutoff}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(SESSION_TOUCH_FLUSH_SECONDS)
+            await self.flush()
+
+
+session_cache = _SessionCache(SESSION_CACHE_MAX)
+touch_buffer = _TouchBuffer()
+
 def _new_session_id() -> str:
     # 32 bytes urlsafe token
     return secrets.token_urlsafe(32)
 
+# ---- Signed anonymous tokens: "a1.<nonce>.<iat>.<exp>.<sig>" ----
+def _signing_key() -> bytes:
+    # read lazily: routes import this module before server.py loads .env
+    key = os.getenv("SESSION_SIGNING_KEY") or os.getenv("SECRET_KEY")
+    if not key:
+        raise RuntimeError("SESSION_SIGNING_KEY / SECRET_KEY missing")
+    return key.encode()
+
+def _sign(payload: str) -> str:
+    mac = hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(mac).rstrip(b"=").decode()
+
+def _issue_anon_token(iat: int, exp: int) -> str:
+    payload = f"{ANON_TOKEN_PREFIX}.{secrets.token_urlsafe(16)}.{iat}.{exp}"
+    return f"{payload}.{_sign(payload)}"
+
+def _verify_anon_token(token: str) -> Optional[Tuple[int, int]]:
+    """(iat, exp) if `token` is an anonymous token we signed, else None. Expiry not checked."""
+    parts = token.split(".")
+    if len(parts) != 5 or parts[0] != ANON_TOKEN_PREFIX:
+        return None
+    try:
+        iat, exp = int(parts[2]), int(parts[3])
+        expected = _sign(".".join(parts[:4]))
+    except (ValueError, RuntimeError):
+        return None
+    if not hmac.compare_digest(expected, parts[4]):
+        return None
+    return iat, exp
+
+def is_anon_token(sid: str) -> bool:
+    return sid.startswith(ANON_TOKEN_PREFIX + ".")
+
+def new_anonymous_session(ua: Optional[str] = None, ip: Optional[str] = None) -> SessionDoc:
+    """A signed, not-yet-stored session; no Mongo round trip."""
+    iat = int(time.time())
+    exp = iat + SESSION_TTL_DAYS * 86400
+    return SessionDoc(
+        session_id=_issue_anon_token(iat, exp),
+        ua=ua,
+        ip=ip,
+        created_at=datetime.utcfromtimestamp(iat),
+        last_seen_at=datetime.utcfromtimestamp(iat),
+        expires_at=datetime.utcfromtimestamp(exp),
+        persisted=False,
+    )
+
+def _session_from_token(sid: str, iat: int, exp: int) -> SessionDoc:
+    return SessionDoc(
+        session_id=sid,
+        created_at=datetime.utcfromtimestamp(iat),
+        last_seen_at=datetime.utcnow(),
+        expires_at=datetime.utcfromtimestamp(exp),
+        persisted=False,
+    )
+# -----------------------------------------------------------------
+
 async def find_by_sid(sid: str) -> Optional[SessionDoc]:
-    coll = get_collection(COLL)
-    logging.info(f"Finding session with sid: {sid}")
-    doc = await coll.find_one({"session_id": sid})
-    return SessionDoc(**doc) if doc else None
+    claims = None
+    if is_anon_token(sid):
+        # reject forged/garbled tokens without touching Mongo
+        claims = _verify_anon_token(sid)
+        if claims is None:
+            return None
+
+    cached = session_cache.get(sid)
+    if cached is _MISS:
+        coll = get_collection(COLL)
+        logging.info(f"Finding session with sid: {sid}")
+        doc = await coll.find_one({"session_id": sid})
+        cached = SessionDoc(**doc) if doc else None
+        if cached is not None:
+            session_cache.put(cached)
+        elif claims is not None:
+            session_cache.put_missing(sid)
+
+    if cached is None and claims is not None and claims[1] > time.time():
+        # valid anonymous token that nothing has been written to yet
+        return _session_from_token(sid, *claims)
+    return cached
 
 async def create_session(ua: Optional[str] = None, ip: Optional[str] = None) -> SessionDoc:
     coll = get_collection(COLL)
@@ -35,27 +300,45 @@ async def create_session(ua: Optional[str] = None, ip: Optional[str] = None) ->
         expires_at=now + timedelta(days=SESSION_TTL_DAYS),
     )
     await coll.insert_one(doc.model_dump(by_alias=True))
+    session_cache.put(doc)
     return doc
 
-async def touch_session(sid: str) -> None:
+async def persist_session(sess: SessionDoc) -> None:
+    """
+    Make sure `sess` has a `sessions` doc (no-op for stored sessions).
+    Call before writing anything keyed by an anonymous session's id.
+    """
+    if sess.persisted:
+        return
+    await _upsert(sess.session_id, {})
+    sess.persisted = True
+
+async def _upsert(sid: str, fields: Dict[str, Any]) -> None:
+    """$set `fields`, creating the doc for a still-unstored anonymous session."""
     coll = get_collection(COLL)
-    now = datetime.utcnow()
-    await coll.update_one(
-        {"session_id": sid},
-        {"$set": {"last_seen_at": now, "expires_at": now + timedelta(days=SESSION_TTL_DAYS)}}
-    )
+    update: Dict[str, Any] = {}
+    if fields:
+        update["$set"] = fields
+    claims = _verify_anon_token(sid) if is_anon_token(sid) else None
+    if claims is not None:
+        base = _session_from_token(sid, *claims).model_dump(by_alias=True)
+        update["$setOnInsert"] = {k: v for k, v in base.items() if k not in fields}
+        await coll.update_one({"session_id": sid}, update, upsert=True)
+    elif fields:
+        await coll.update_one({"session_id": sid}, update)
+    session_cache.invalidate(sid)
+
+async def touch_session(sid: str) -> None:
+    """Record activity; persisted in bulk by `touch_buffer` (see _TouchBuffer)."""
+    touch_buffer.touch(sid)
 
 async def attach_user(sid: str, user_id: str) -> None:
-    coll = get_collection(COLL)
-    await coll.update_one(
-        {"session_id": sid},
-        {"$set": {"user_id": ObjectId(user_id)}}
-    )
+    await _upsert(sid, {"user_id": ObjectId(user_id)})
+    await session_cache.user_changed(sid)
 
 async def set_session_fields(sid: str, fields: Dict[str, Any]) -> None:
     """Set arbitrary fields on the session document in Mongo."""
-    coll = get_collection(COLL)
-    await coll.update_one({"session_id": sid}, {"$set": fields})
+    await _upsert(sid, fields)
 
 async def pop_session_field(sid: str, field_name: str) -> Optional[Any]:
     """Atomically read & remove a field (e.g. redirect_to) from a session."""
@@ -66,4 +349,5 @@ async def pop_session_field(sid: str, field_name: str) -> Optional[Any]:
         projection={field_name: 1},
         return_document=False,  # return pre-image
     )
+    session_cache.invalidate(sid)
     return (doc or {}).get(field_name)
@@ -0,0 +1,122 @@
+# services/style_vector.py
+"""
+Per-user style vector: the scoring features (styles, colors, catalog
+occasions, body type, budget, goals) precomputed on the user document.
+
+Two sources feed it, and on every write the newer one wins field by field:
+
+  * quiz completion (`from_quiz`) — answered quiz fields replace the vector's;
+  * profile edits (`from_user`) — the edited `style.*` / `lifestyle.*` fields
+    replace the vector's, so clearing a preference clears it here too. Body
+    type only comes from the quiz, so a profile edit keeps whatever the quiz
+    recorded.
+
+Consumers build `ProfileFeatures` with `features_for` straight from the
+stored vector, so scoring no longer parses quiz responses or profile sections.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from models.quiz import QuizResponses
+from models.user import StyleVector
+from services.recommendation_engine import OCCASION_MAPPING, ProfileFeatures
+
+# user fields a vector is derived from (projection for the rebuild read)
+STYLE_VECTOR_SOURCE_FIELDS = {"style": 1, "lifestyle": 1, "style_vector": 1, "updated_at": 1}
+
+_SIGNALS = ("styles", "interested", "colors", "avoid_colors", "occasions", "body_type", "budget", "goals")
+
+
+def _catalog_occasions(labels: Iterable[str]) -> List[str]:
+    """Quiz occasion labels -> catalog occasions; catalog values pass through."""
+    out: Dict[str, None] = {}
+    for label in labels or ():
+        for occ in OCCASION_MAPPING.get(label, (label,)):
+            out[occ] = None
+    return list(out)
+
+
+_LIST_SIGNALS = {f for f in _SIGNALS if f not in ("body_type", "budget")}
+
+
+def _merge(base: Optional[StyleVector], updates: Dict[str, Any], completeness: Optional[float] = None) -> StyleVector:
+    """Every key in `updates` replaces the base's, including empty values (a cleared preference)."""
+    data = base.model_dump() if base else {}
+    data.update({k: ([] if v is None and k in _LIST_SIGNALS else v) for k, v in updates.items()})
+    data.pop("computed_at", None)
+    vec = StyleVector(**data, computed_at=datetime.utcnow())
+    if completeness is None and base is None:
+        completeness = sum(1 for f in _SIGNALS if getattr(vec, f)) / len(_SIGNALS)
+    if completeness is not None:
+        vec.completeness = completeness
+    return vec
+
+
+def from_quiz(responses: QuizResponses, base: Optional[StyleVector] = None) -> StyleVector:
+    features = ProfileFeatures.from_responses(responses)
+    answers = {
+        "styles": list(responses.current_style or ()),
+        "interested": list(responses.interested_styles or ()),
+        "colors": list(responses.favorite_colors or ()),
+        "avoid_colors": list(responses.avoid_colors or ()),
+        "occasions": _catalog_occasions(responses.help_occasions),
+        "body_type": responses.body_type,
+        "goals": list(responses.goals or ()),
+    }
+    # unanswered questions keep whatever the vector already has
+    answered = {k: v for k, v in answers.items() if v not in (None, [], "")}
+    return _merge(base, answered, completeness=features.completeness)
+
+
+# user doc path -> vector field it feeds
+_USER_SOURCES = {
+    "style.current": "styles",
+    "style.interested": "interested",
+    "style.favorite_colors": "colors",
+    "style.avoid_colors": "avoid_colors",
+    "style.goals": "goals",
+    "style.budget": "budget",
+    "lifestyle.priority_occasions": "occasions",
+}
+
+
+def _touched(path: str, changed: Iterable[str]) -> bool:
+    return any(path == k or path.startswith(k + ".") or k.startswith(path + ".") for k in changed)
+
+
+def from_user(doc: Mapping[str, Any], changed: Iterable[str]) -> StyleVector:
+    """
+    Vector for a user doc (projected with STYLE_VECTOR_SOURCE_FIELDS) after a
+    profile edit; only the fields under the `changed` paths replace the vector's.
+    """
+    changed = list(changed)
+    updates: Dict[str, Any] = {}
+    for path, field in _USER_SOURCES.items():
+        if not _touched(path, changed):
+            continue
+        section, key = path.split(".")
+        value = (doc.get(section) or {}).get(key)
+        updates[field] = _catalog_occasions(value) if field == "occasions" else value
+    base = doc.get("style_vector")
+    return _merge(StyleVector(**base) if base else None, updates)
+
+
+def features_for(vec: StyleVector) -> ProfileFeatures:
+    """ProfileFeatures from a stored vector, without re-parsing any answers."""
+    return ProfileFeatures(
+        quiz=QuizResponses(
+            current_style=vec.styles or None,
+            interested_styles=vec.interested or None,
+            favorite_colors=vec.colors or None,
+            avoid_colors=vec.avoid_colors or None,
+            body_type=vec.body_type,
+            goals=vec.goals or None,
+        ),
+        current_styles=frozenset(vec.styles),
+        interested_styles=frozenset(vec.interested),
+        occasions=frozenset(vec.occasions),
+        body_type=vec.body_type or None,
+        goals=frozenset(vec.goals),
+        goal_count=len(vec.goals),
+        completeness=vec.completeness,
+    )
@@ -1,15 +1,28 @@
 # services/user_outfit_service.py
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from bson import ObjectId
+import numpy as np
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.user_outfit import UserOutfit
 from models.objectid import PyObjectId
 from database import get_database
+from services.catalog_service import _compact
+from services.outfit_embeddings import VectorIndex, indexes
+from services.pagination import keyset_filter, keyset_sort, page
+from services import json_stream
 import logging
 
 logger = logging.getLogger(__name__)
 COLL = "user_outfits"
+# page size cap for streamed responses (buffered ones stay at 200)
+STREAM_MAX_LIMIT = 5000
+# most recent saved outfits of one owner ranked by "more like this" (scope="saved")
+SIMILAR_SAVED_MAX = 5000
+
+def _either_id(ids: List[str]) -> Dict[str, Any]:
+    """Match ids stored as strings (UserOutfit dumps PyObjectId to str) or as ObjectId."""
+    return {"$in": ids + [ObjectId(i) for i in ids if ObjectId.is_valid(i)]}
 
 class UserOutfitService:
     def __init__(self, db: Optional[AsyncIOMotorDatabase] = None):
@@ -63,30 +76,81 @@ class UserOutfitService:
         session_id: Optional[str] = None,
         favorite: Optional[bool] = None,
         limit: int = 50,
-        skip: int = 0
-    ) -> List[UserOutfit]:
+        skip: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[UserOutfit], Optional[str]]:
+        """
+        Newest first, keyset-paginated on (created_at, _id): pass the returned
+        next_cursor back as `cursor` for the following page (None on the last).
+        `skip` is kept for old clients and ignored when a cursor is given.
+        Raises InvalidCursor for a malformed cursor.
+        """
+        data, next_cursor = await self.list_outfit_docs(
+            user_id=user_id, session_id=session_id, favorite=favorite, limit=limit, skip=skip, cursor=cursor
+        )
+        return [UserOutfit.model_validate(d) for d in data], next_cursor
+
+    async def list_outfit_docs(
+        self,
+        *,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        favorite: Optional[bool] = None,
+        limit: int = 50,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        projection: Optional[Dict[str, int]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """list_outfits' page as raw documents, reading only `projection`'s fields when given."""
+        found = self._history(user_id, session_id, favorite, skip, cursor, projection)
+        if found is None:
+            return [], None
+        limit = min(200, max(1, limit))
+        data, next_cursor = page(await found.limit(limit + 1).to_list(length=None), limit)
+        logger.info(f"list_outfits found {len(data)} items")
+        logger.debug(f"list_outfits data: {data}")
+        return data, next_cursor
+
+    def stream_outfits(
+        self,
+        *,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        favorite: Optional[bool] = None,
+        limit: int = 50,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        projection: Optional[Dict[str, int]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Same page as list_outfits, encoded straight from the Mongo cursor as
+        it's read (no models, no in-memory list); limit goes up to STREAM_MAX_LIMIT.
+        Raises InvalidCursor before anything is streamed.
+        """
+        found = self._history(user_id, session_id, favorite, skip, cursor, projection)
+        limit = min(STREAM_MAX_LIMIT, max(1, limit))
+        if found is None:
+            return json_stream.empty_page()
+        return json_stream.json_page(found.limit(limit + 1).batch_size(min(limit + 1, 500)), limit)
+
+    def _history(self, user_id, session_id, favorite, skip, cursor, projection=None):
+        """Unlimited cursor over one owner's history in keyset order; None without an owner."""
         q: Dict[str, Any] = {}
         if user_id:
             q["user_id"] = user_id
         elif session_id:
             q["session_id"] = session_id
         else:
-            return []
+            return None
 
         if favorite is not None:
             q["favorite"] = bool(favorite)
+        q.update(keyset_filter(cursor, -1))
 
-        cursor = (
-            self.db[COLL]
-            .find(q)
-            .sort("created_at", -1)
-            .skip(max(0, skip))
-            .limit(min(200, max(1, limit)))
-        )
-        data = await cursor.to_list(length=None)
-        logger.info(f"list_outfits query: {q}, found {len(data)} items")
-        logger.debug(f"list_outfits data: {data}")
-        return [UserOutfit.model_validate(d) for d in data]
+        found = self.db[COLL].find(q, projection).sort(keyset_sort(-1))
+        if skip > 0 and not cursor:
+            found = found.skip(skip)
+        return found
 
     async def set_favorite(self, *, user_id: str, outfit_id: str, favorite: bool) -> bool:
         res = await self.db[COLL].update_one(
@@ -101,6 +165,75 @@ class UserOutfitService:
         )
         return res.deleted_count == 1
 
+    async def similar(
+        self,
+        *,
+        outfit_id: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        scope: str = "catalog",
+        limit: int = 10,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        "More like this" for one saved outfit: nearest catalog outfits
+        (scope="catalog") or the owner's other saved outfits (scope="saved"),
+        each with a `similarity`. None if the outfit isn't the caller's;
+        raises LookupError if the index for `scope` hasn't been built.
+        """
+        if not ObjectId.is_valid(outfit_id) or not (user_id or session_id):
+            return None
+        owner: Dict[str, Any] = {"user_id": _either_id([user_id])} if user_id else {"session_id": session_id}
+        doc = await self.db[COLL].find_one({"_id": _either_id([outfit_id]), **owner}, {"outfit": 1, "title": 1})
+        if doc is None:
+            return None
+
+        source = "outfits" if scope == "catalog" else COLL
+        index = indexes.get(source)
+        if index is None:
+            raise LookupError(f"outfit index '{source}' has not been built")
+        limit = min(50, max(1, limit))
+        if scope == "saved":
+            return await self._similar_saved(doc, owner, index, limit)
+
+        hits = index.similar(doc, limit)
+        query: Dict[str, Any] = {"_id": _either_id([oid for oid, _ in hits]), "is_active": {"$ne": False}}
+        found = {str(d["_id"]): d async for d in self.db[source].find(query)}
+        out = []
+        for oid, score in hits:
+            if score <= 0:
+                break  # nothing in common
+            d = found.get(oid)
+            if d is None:
+                continue
+            # catalog hits in the same shape recommendations return them
+            item = dict(_compact(d))
+            item["similarity"] = round(score, 4)
+            out.append(item)
+        return out
+
+    async def _similar_saved(self, doc: Dict[str, Any], owner: Dict[str, Any], index: VectorIndex,
+                             limit: int) -> List[Dict[str, Any]]:
+        # The saved-outfit index is shared by every owner, so a global nearest-
+        # neighbour search is mostly other people's outfits. Rank the owner's
+        # own (most recent SIMILAR_SAVED_MAX) exactly against the query instead.
+        cursor = (
+            self.db[COLL].find({**owner, "_id": {"$ne": doc["_id"]}})
+            .sort(keyset_sort(-1))
+            .limit(SIMILAR_SAVED_MAX)
+        )
+        docs = await cursor.to_list(None)
+        if not docs:
+            return []
+        sims = index.vectors_for(docs) @ index.embedder.embed(doc)
+        out = []
+        for i in np.argsort(-sims, kind="stable")[:limit]:
+            if sims[i] <= 0:
+                break  # nothing in common
+            item = UserOutfit.model_validate(docs[i]).model_dump(by_alias=True)
+            item["similarity"] = round(float(sims[i]), 4)
+            out.append(item)
+        return out
+
     async def migrate_session_to_user(self, *, session_id: str, user_id: str) -> int:
         res = await self.db[COLL].update_many(
             {"session_id": session_id, "user_id": None},
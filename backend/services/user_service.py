@@ -1,20 +1,120 @@
 # services/user_service.py
-from typing import Optional, Dict, Any
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 from bson import ObjectId
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from database import get_collection
-from models.user import User
+from models.user import StyleVector, User, UserSummary, USER_SUMMARY_FIELDS
+from models.quiz import QuizResponses
+from services import style_vector
+from services.recommendation_engine import ProfileFeatures
 
 import os
 import httpx
+import jwt
 import logging
+from services.google_jwks import google_jwks, http_client, JWKSUnavailable
 
 USERS = "users"
+CACHE_VERSIONS = "cache_versions"
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-process read-through cache of validated User models
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "5000"))
+# Optional cross-worker invalidation: every user write bumps a counter doc in
+# `cache_versions`; each worker polls it and drops its cache when it moves.
+USER_CACHE_SYNC = os.getenv("USER_CACHE_SYNC", "false").lower() == "true"
+USER_CACHE_SYNC_SECONDS = float(os.getenv("USER_CACHE_SYNC_SECONDS", "2"))
+
+
+class _UserCache:
+    """
+    LRU of User keyed by str(_id) with a TTL and an optional shared version
+    counter. Entries also carry the ProfileFeatures built from the user's
+    style vector, so scoring a cached user skips feature extraction.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, User, Optional[ProfileFeatures]]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _entry(self, user_id: str) -> Optional[Tuple[float, User, Optional[ProfileFeatures]]]:
+        hit = self._data.get(user_id)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            self._data.pop(user_id, None)
+            return None
+        self._data.move_to_end(user_id)
+        return hit
+
+    def get(self, user_id: str) -> Optional[User]:
+        hit = self._entry(user_id)
+        return hit[1] if hit else None
+
+    def get_features(self, user_id: str) -> Optional[ProfileFeatures]:
+        """Scoring features built from the cached user's style vector (None on miss or no vector)."""
+        hit = self._entry(user_id)
+        return hit[2] if hit else None
+
+    def put(self, user: User) -> None:
+        if self.maxsize <= 0:
+            return
+        key = str(user.id)
+        features = style_vector.features_for(user.style_vector) if user.style_vector else None
+        self._data[key] = (time.monotonic() + USER_CACHE_TTL_SECONDS, user, features)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def invalidate(self, user_id: str) -> None:
+        self._data.pop(str(user_id), None)
+        if USER_CACHE_SYNC:
+            try:
+                await get_collection(CACHE_VERSIONS).update_one(
+                    {"_id": USERS}, {"$inc": {"v": 1}}, upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to bump user cache version: {e}")
+
+    def start(self) -> None:
+        if USER_CACHE_SYNC and self._task is None:
+            self._task = asyncio.create_task(self._sync())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync(self) -> None:
+        coll = get_collection(CACHE_VERSIONS)
+        while True:
+            try:
+                doc = await coll.find_one({"_id": USERS})
+                v = (doc or {}).get("v", 0)
+                if self._version is not None and v != self._version:
+                    self._data.clear()
+                self._version = v
+            except Exception as e:
+                logger.warning(f"User cache version poll failed: {e}")
+            await asyncio.sleep(USER_CACHE_SYNC_SECONDS)
+
+
+user_cache = _UserCache(USER_CACHE_MAX)
+
 def _oid(user_id: str) -> ObjectId:
     try:
         return ObjectId(user_id)
@@ -33,11 +133,39 @@ def _flatten(prefix: str, data: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 async def get_user_by_id(user_id: str) -> User:
+    """The user, served from the cache when warm; callers get their own copy to modify."""
+    cached = user_cache.get(str(user_id))
+    if cached is not None:
+        return cached.model_copy(deep=True)
     coll = get_collection(USERS)
     doc = await coll.find_one({"_id": _oid(user_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="User not found")
-    return User(**doc)
+    user = User(**doc)
+    user_cache.put(user)
+    return user.model_copy(deep=True)
+
+async def get_user_summary(user_id: str) -> Optional[UserSummary]:
+    """
+    id/name/email/avatar only: served from the user cache when warm, otherwise
+    one projected read without validating the full User. None if missing.
+    """
+    cached = user_cache.get(str(user_id))
+    if cached is not None:
+        return UserSummary(_id=str(cached.id), email=cached.email, name=cached.name, avatar_url=cached.avatar_url)
+    if not ObjectId.is_valid(str(user_id)):
+        return None
+    doc = await get_collection(USERS).find_one({"_id": ObjectId(str(user_id))}, USER_SUMMARY_FIELDS)
+    if not doc:
+        return None
+    doc["_id"] = str(doc["_id"])
+    return UserSummary.model_validate(doc)
+
+async def get_user_fields(user_id: str, projection: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """Only `projection`'s fields of a user, as stored (no User validation). None if missing."""
+    if not ObjectId.is_valid(str(user_id)):
+        return None
+    return await get_collection(USERS).find_one({"_id": ObjectId(str(user_id))}, projection)
 
 async def get_user_by_email(email: str) -> Optional[User]:
     coll = get_collection(USERS)
@@ -56,13 +184,76 @@ async def create_user(payload: Dict[str, Any]) -> str:
     res = await coll.insert_one(user.model_dump(by_alias=True))
     return str(res.inserted_id)
 
+def _touches_style(fields: Dict[str, Any]) -> bool:
+    return any(k.split(".", 1)[0] in ("style", "lifestyle") for k in fields)
+
 async def update_user_fields(user_id: str, fields: Dict[str, Any]) -> None:
-    """$set arbitrary (already flattened) fields; touches updated_at."""
+    """$set arbitrary (already flattened) fields; touches updated_at (and the style vector if style/lifestyle changed)."""
     if not fields:
         return
     coll = get_collection(USERS)
     fields["updated_at"] = datetime.utcnow()
-    await coll.update_one({"_id": _oid(user_id)}, {"$set": fields})
+    if _touches_style(fields):
+        doc = await coll.find_one_and_update(
+            {"_id": _oid(user_id)}, {"$set": fields},
+            projection=style_vector.STYLE_VECTOR_SOURCE_FIELDS,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc:
+            await _store_style_vector(coll, doc, style_vector.from_user(doc, fields))
+    else:
+        await coll.update_one({"_id": _oid(user_id)}, {"$set": fields})
+    await user_cache.invalidate(user_id)
+
+async def _store_style_vector(coll, doc: Dict[str, Any], vec: StyleVector) -> None:
+    # conditional on the stamp we derived from: if another write landed in
+    # between, that write stores its own (newer) vector
+    await coll.update_one(
+        {"_id": doc["_id"], "updated_at": doc.get("updated_at")},
+        {"$set": {"style_vector": vec.model_dump()}},
+    )
+
+# quiz answers -> Notifications fields (daily suggestions opt-in)
+_QUIZ_FREQUENCY = {"Yes": "daily", "No": "weekly", "Only on special occasions": "special"}
+_QUIZ_CHANNELS = {"In-app": "in_app", "Email": "email", "WhatsApp": "whatsapp"}
+
+def _quiz_notification_fields(responses: QuizResponses) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {}
+    if responses.daily_suggestions in _QUIZ_FREQUENCY:
+        fields["notifications.frequency"] = _QUIZ_FREQUENCY[responses.daily_suggestions]
+    if responses.delivery_preference in _QUIZ_CHANNELS:
+        fields["notifications.channels"] = [_QUIZ_CHANNELS[responses.delivery_preference]]
+    return fields
+
+async def apply_quiz_to_user(user_id: str, responses: QuizResponses) -> Optional[StyleVector]:
+    """
+    Fold completed quiz answers into the user: the style vector plus the
+    daily-suggestions / delivery preferences. None if the user doesn't exist.
+    """
+    coll = get_collection(USERS)
+    now = datetime.utcnow()
+    doc = await coll.find_one_and_update(
+        {"_id": _oid(user_id)}, {"$set": {"updated_at": now, **_quiz_notification_fields(responses)}},
+        projection=style_vector.STYLE_VECTOR_SOURCE_FIELDS,
+        return_document=ReturnDocument.AFTER,
+    )
+    if not doc:
+        return None
+    base = doc.get("style_vector")
+    vec = style_vector.from_quiz(responses, StyleVector(**base) if base else None)
+    await _store_style_vector(coll, doc, vec)
+    await user_cache.invalidate(user_id)
+    return vec
+
+async def get_style_features(user_id: str) -> Optional[ProfileFeatures]:
+    """Scoring features from the (cached) user's stored style vector; None until one exists."""
+    features = user_cache.get_features(str(user_id))
+    if features is not None:
+        return features
+    user = await get_user_by_id(user_id)
+    if user.style_vector is None:
+        return None
+    return user_cache.get_features(str(user_id)) or style_vector.features_for(user.style_vector)
 
 async def patch_section(user_id: str, section: str, data: Dict[str, Any]) -> None:
     """PATCH a top-level section (profile/style/lifestyle/notifications)."""
@@ -82,11 +273,15 @@ GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_URL = "https://openidconnect.googleapis.com/v1/userinfo"
 
 
-async def upsert_user_from_google_userinfo(ui: Dict[str, Any]) -> User:
+async def upsert_user_from_google_userinfo(ui: Dict[str, Any]) -> Dict[str, Any]:
     """
     Upsert a user using Google OpenID userinfo dict.
-    Prefers match by providers.google.sub, else (if verified) by email.
-    Returns a User model.
+
+    One atomic find_one_and_update(upsert=True) keyed on `auth.google.sub`
+    (unique index, see database.create_indexes) covers both returning and new
+    Google users. Only when that insert collides with an existing account's
+    email do we fall back to a second atomic op attaching Google to it
+    (verified emails only). Returns the raw user doc (dict with "_id").
     """
     if not ui or "sub" not in ui:
         raise HTTPException(400, "Invalid Google userinfo")
@@ -96,147 +291,115 @@ async def upsert_user_from_google_userinfo(ui: Dict[str, Any]) -> User:
     email_verified = bool(ui.get("email_verified"))
     name = ui.get("name") or ui.get("given_name") or "New User"
     picture = ui.get("picture")
+    if not email:
+        raise HTTPException(400, "Google account has no email")
 
     coll = get_collection(USERS)
-
-    # Ensure helpful indexes (no-op if already exist)
-    try:
-        await coll.create_index("email", unique=False)
-        await coll.create_index("auth.providers.google.sub", unique=True, sparse=True)
-    except Exception:
-        pass
-
     now = datetime.utcnow()
-
-    # 1) Try by google sub
-    doc = await coll.find_one({"auth.google.sub": ui["sub"]})
-    logger.info(f"Found user by google.sub: {doc}")
-    if doc:
-        # Update profile surface + google provider info
-        await coll.update_one(
-            {"_id": doc["_id"]},
-            {"$set": {
-                # "name": name if name else doc.get("name"),
-                # "email": email if email else doc.get("email"),
-                # "avatar_url": picture or doc.get("avatar_url"),
-                # "email_verified": email_verified or doc.get("email_verified", False),
-                "auth.providers": "google",         # <- keep providers a string
-                "auth.google": {                    # <- all google info lives here
-                    "sub": sub,
-                    "email": email,
-                    "email_verified": email_verified,
-                    "name": name,
-                    "picture": picture,
-                    "last_login_at": now,
-                },
-                "last_login_at": now,
-                "updated_at": now,
-            }}
-        )
-        doc = await coll.find_one({"_id": doc["_id"]})
-        logger.info(f"We are returning updated user doc: {doc}")
-        logger.info("User type at session issue: %s", type(doc))
-        user_model = User.model_validate(doc)
-        return user_model.model_dump(by_alias=True)  # returns dict with "_id"
-
-    # 2) Try to attach to existing account by verified email
-    if email and email_verified:
-      by_email = await coll.find_one({"email": email})
-      logger.info(f"Found user by email: {by_email}")
-      if by_email:
-        await coll.update_one(
-          {"_id": by_email["_id"]},
-          {"$set": {
-            "name": name if name else by_email.get("name"),
-            "avatar_url": picture or by_email.get("avatar_url"),
-            "email_verified": True,
-            # NEW: Set the provider string and the nested google object
-            "auth.providers": "google", 
-            "auth.google": {
-                "sub": sub,
-                "email": email,
-                "email_verified": True,
-                "name": name,
-                "picture": picture,
-                "last_login_at": now,
-            },
-            "last_login_at": now,
-            "updated_at": now,
-          }}
-        )
-        doc = await coll.find_one({"_id": by_email["_id"]})
-        logger.info("User type at session issue: %s", type(doc))
-        user_model = User.model_validate(doc)
-        return user_model.model_dump(by_alias=True)  # returns dict with "_id"
-
-    # 3) Create new user
-    payload: Dict[str, Any] = {
-        "name": name,
+    google = {
+        "sub": sub,
         "email": email,
         "email_verified": email_verified,
-        "avatar_url": picture,
-        "auth": {
-            "providers": "google",  # CORRECT: The provider is a simple string
-            "google": {             # NEW: This is the nested Google data
-                "sub": sub,
-                "email": email,
-                "email_verified": email_verified,
-                "name": name,
-                "picture": picture,
-                "last_login_at": now,
-            }
-        },
-        "created_at": now,
-        "updated_at": now,
+        "name": name,
+        "picture": picture,
+        "last_login_at": now,
+    }
+    login_fields = {
+        "auth.providers": "google",         # <- keep providers a string
+        "auth.google": google,              # <- all google info lives here
         "last_login_at": now,
+        "updated_at": now,
     }
 
+    # Fields only a brand-new user gets; `auth` is set per-path so it doesn't
+    # conflict with the auth.* paths in login_fields.
+    defaults = User(name=name, email=email, email_verified=email_verified, avatar_url=picture,
+                    created_at=now).model_dump(by_alias=True, exclude={"id", "auth", "updated_at", "last_login_at"})
+    defaults["auth.password_hash"] = None
+    defaults["auth.oauth_id"] = None
 
-    # Validate and insert
-    user = User.model_validate(payload)
-    res = await coll.insert_one(user.model_dump(by_alias=True))
-    created = await coll.find_one({"_id": res.inserted_id})
-    validated = User.model_validate(created)
-    return validated.model_dump(by_alias=True)  # returns dict with "_id"
+    try:
+        # 1) returning Google user, or a new one
+        doc = await coll.find_one_and_update(
+            {"auth.google.sub": sub},
+            {"$set": login_fields, "$setOnInsert": defaults},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # 2) email already belongs to an account without this Google sub: attach if verified
+        if not email_verified:
+            raise HTTPException(409, "An account with this email already exists")
+        attach = {
+            **login_fields,
+            "auth.google": {**google, "email_verified": True},
+            "name": name,
+            "email_verified": True,
+        }
+        if picture:
+            attach["avatar_url"] = picture   # otherwise keep the existing avatar
+        doc = await coll.find_one_and_update(
+            {"email": email},
+            {"$set": attach},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not doc:
+            raise HTTPException(409, "Could not link Google account")
 
+    await user_cache.invalidate(doc["_id"])
+    return doc
 
-async def get_or_create_user_from_google(*, code: str, redirect_uri: str) -> User:
+
+async def get_or_create_user_from_google(*, code: str, redirect_uri: str) -> Dict[str, Any]:
     """
     Full Google OAuth flow:
-      - Exchange code for tokens
-      - Fetch userinfo
+      - Exchange code for tokens (pooled client)
+      - Verify the returned id_token locally against cached Google JWKS
+        (falls back to the userinfo endpoint only if keys can't be fetched)
       - Upsert user
-    Returns User model.
+    Returns the user doc (dict with "_id").
     """
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(500, "Google OAuth not configured")
 
+    client = http_client()
+
     # Exchange code -> tokens
-    async with httpx.AsyncClient(timeout=15) as client:
-        token_resp = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "code": code,
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "redirect_uri": redirect_uri,
-                "grant_type": "authorization_code",
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    token_resp = await client.post(
+        GOOGLE_TOKEN_URL,
+        data={
+            "code": code,
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "redirect_uri": redirect_uri,
+            "grant_type": "authorization_code",
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    try:
+        token_resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Google token exchange failed: {e.response.text}")
+        raise HTTPException(400, f"Google token exchange failed: {e.response.text}") from e
+
+    token_payload = token_resp.json()
+    access_token = token_payload.get("access_token")
+    id_token = token_payload.get("id_token")
+    if not access_token and not id_token:
+        raise HTTPException(400, "Google token exchange did not return tokens")
+
+    ui: Optional[Dict[str, Any]] = None
+    if id_token:
         try:
-            logger.info(f"Google token exchange successful: {token_resp.json()}")
-            token_resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Google token exchange failed: {e.response.text}")
-            logger.error(f"data: {token_resp.data}")
-            raise HTTPException(400, f"Google token exchange failed: {e.response.text}") from e
+            ui = await google_jwks.verify_id_token(id_token, audience=GOOGLE_CLIENT_ID)
+        except JWKSUnavailable as e:
+            logger.warning(f"Google JWKS unavailable, falling back to userinfo: {e}")
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(400, f"Invalid Google id_token: {e}") from e
 
-        token_payload = token_resp.json()
-        access_token = token_payload.get("access_token")
+    if ui is None:
         if not access_token:
             raise HTTPException(400, "Google token exchange did not return access_token")
-
         # Fetch userinfo (OpenID)
         ui_resp = await client.get(
             GOOGLE_USERINFO_URL,
@@ -246,8 +409,7 @@ async def get_or_create_user_from_google(*, code: str, redirect_uri: str) -> Use
             ui_resp.raise_for_status()
         except httpx.HTTPStatusError as e:
             raise HTTPException(400, f"Google userinfo fetch failed: {e.response.text}") from e
-
         ui = ui_resp.json()
 
-    # Upsert & return User
+    # Upsert & return user doc
     return await upsert_user_from_google_userinfo(ui)
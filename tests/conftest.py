@@ -0,0 +1,88 @@
+"""
+Shared fixtures. Tests run against an in-memory Mongo (mongomock-motor) that
+is installed as the app's database, so services and routes use it unchanged.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import database  # noqa: E402
+from services.session_service import session_cache, touch_buffer  # noqa: E402
+from services.user_service import user_cache  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    mock = mongomock_motor.AsyncMongoMockClient()["bestyle_test"]
+    database.db_instance.database = mock
+    session_cache._data.clear()
+    touch_buffer._pending.clear()
+    touch_buffer._last_queued.clear()
+    user_cache._data.clear()
+    yield mock
+    database.db_instance.database = None
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion (the repo has no async test plugin)."""
+    return lambda coro: asyncio.run(coro)
+
+
+@pytest.fixture
+def app(db):
+    from server import app
+    yield app
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+    return TestClient(app)
+
+
+@pytest.fixture
+def login(app):
+    """login(user_id) makes every request run in a session bound to that user."""
+    from bson import ObjectId
+    from dependencies.session_dep import get_or_create_session
+    from models.session import SessionDoc
+
+    def _login(user_id=None, session_id="test-session"):
+        user_id = ObjectId(user_id) if user_id else ObjectId()
+        app.dependency_overrides[get_or_create_session] = lambda: SessionDoc(session_id=session_id, user_id=user_id)
+        return user_id
+    return _login
+
+
+def bcrypt_context(rounds: int):
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds,
+                        bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+
+
+@pytest.fixture
+def cheap_bcrypt(monkeypatch):
+    """Cost-4 bcrypt so signup/login tests stay fast."""
+    from services import auth_service
+    monkeypatch.setattr(auth_service, "pwd", bcrypt_context(4))
+
+
+def catalog_outfit(title="Look", created_at=None, **extra):
+    """A valid `outfits` document (ObjectId _id, like the catalog stores them)."""
+    from datetime import datetime
+    from bson import ObjectId
+    return {
+        "_id": ObjectId(), "title": title, "occasion": "Work", "description": "Sharp and polished.",
+        "confidence": 90, "color": "#223344", "items": [{"name": "Blazer", "brand": "Acme"}],
+        "style_types": ["Minimalist"], "is_active": True,
+        "created_at": created_at or datetime(2026, 1, 1), "updated_at": created_at or datetime(2026, 1, 1),
+        **extra,
+    }
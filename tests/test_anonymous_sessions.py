@@ -0,0 +1,41 @@
+import pytest
+from bson import ObjectId
+
+from services.session_service import (
+    attach_user, find_by_sid, is_anon_token, new_anonymous_session, persist_session,
+)
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    monkeypatch.setenv("SESSION_SIGNING_KEY", "test-signing-key")
+
+
+def test_signed_token_is_a_session_without_a_doc(db, run):
+    sess = new_anonymous_session(ua="pytest")
+    assert is_anon_token(sess.session_id) and not sess.persisted
+
+    found = run(find_by_sid(sess.session_id))
+    assert found.session_id == sess.session_id and not found.persisted
+    assert run(db.sessions.count_documents({})) == 0
+
+
+def test_forged_token_is_rejected(db, run):
+    sid = new_anonymous_session().session_id
+    forged = sid[:-2] + ("AA" if not sid.endswith("AA") else "BB")
+    assert run(find_by_sid(forged)) is None
+
+
+def test_first_write_persists_the_token(db, run):
+    sess = new_anonymous_session()
+    user_id = ObjectId()
+
+    async def go():
+        await persist_session(sess)
+        assert sess.persisted
+        assert await db.sessions.count_documents({"session_id": sess.session_id}) == 1
+        await attach_user(sess.session_id, str(user_id))
+        return await find_by_sid(sess.session_id)
+
+    found = run(go())
+    assert found.persisted and found.user_id == user_id
@@ -0,0 +1,36 @@
+import pytest
+
+pytestmark = pytest.mark.usefixtures("cheap_bcrypt")
+
+
+def _signup_and_login(client):
+    body = {"email": "ada@example.com", "password": "pw"}
+    assert client.post("/api/auth/signup", json={**body, "name": "Ada"}).status_code == 200
+    client.cookies.clear()  # fresh browser: log in on a new session
+    res = client.post("/api/auth/login", json=body)
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_me_after_login(client, db):
+    user = _signup_and_login(client)
+    res = client.get("/api/auth/me")
+    assert res.status_code == 200
+    assert res.json()["_id"] == user["_id"] and res.json()["email"] == "ada@example.com"
+
+
+def test_me_requires_login(client, db):
+    assert client.get("/api/auth/me").status_code == 401
+
+
+def test_verify_returns_projected_summary(client, db):
+    user = _signup_and_login(client)
+    res = client.get("/api/auth/verify")
+    assert res.status_code == 200
+    assert res.json() == {"valid": True, "user": {
+        "_id": user["_id"], "email": "ada@example.com", "name": "Ada", "avatar_url": None,
+    }}
+
+
+def test_verify_without_cookie(client, db):
+    assert client.get("/api/auth/verify").json() == {"valid": False, "user": None}
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from bson import ObjectId
+
+from routes import outfit_routes
+
+OUTFIT = {"title": "Linen set", "occasion": "Weekend", "description": "Relaxed.", "confidence": 88,
+          "color": "#eeddcc", "items": [{"name": "Linen shirt", "brand": "Acme"}]}
+
+
+def ndjson(*rows):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows).encode()
+
+
+@pytest.fixture
+def admin(login, db, run, monkeypatch):
+    user_id = ObjectId()
+    run(db.users.insert_one({"_id": user_id, "email": "ops@example.com"}))
+    monkeypatch.setattr(outfit_routes, "CATALOG_ADMIN_EMAILS", {"ops@example.com"})
+    login(user_id)
+    return user_id
+
+
+def test_import_and_export_are_for_catalog_admins_only(client, login, db, run, monkeypatch):
+    monkeypatch.setattr(outfit_routes, "CATALOG_ADMIN_EMAILS", {"ops@example.com"})
+    assert client.post("/api/outfits/import", content=ndjson(OUTFIT)).status_code == 401
+    assert client.get("/api/outfits/export").status_code == 401
+
+    other = ObjectId()
+    run(db.users.insert_one({"_id": other, "email": "ada@example.com"}))
+    login(other)
+    assert client.post("/api/outfits/import", content=ndjson(OUTFIT)).status_code == 403
+    assert client.get("/api/outfits/export").status_code == 403
+    assert run(db.outfits.count_documents({})) == 0
+
+
+def test_import_reports_bad_lines_by_number(client, db, run, admin):
+    body = ndjson(
+        OUTFIT,
+        "{not json",
+        "",  # skipped, but still advances the line number
+        [1, 2],
+        {**OUTFIT, "confidence": "high"},
+        {**OUTFIT, "title": "Second"},
+    )
+    report = client.post("/api/outfits/import", params={"chunk_size": 1}, content=body).json()
+    assert report["received"] == 5 and report["inserted"] == 2 and report["failed"] == 3
+    assert [e["line"] for e in report["errors"]] == [2, 4, 5]
+    assert report["errors"][1]["error"] == "expected a JSON object"
+    assert report["errors"][2]["error"].startswith("confidence:")
+    assert run(db.outfits.count_documents({})) == 2
+
+
+def test_export_round_trips_through_import(client, db, run, admin):
+    client.post("/api/outfits/import", content=ndjson(OUTFIT, {**OUTFIT, "title": "Second"},
+                                                      {**OUTFIT, "title": "Hidden", "is_active": False}))
+    res = client.get("/api/outfits/export", params={"batch_size": 1})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines() if line]
+    assert sorted(r["title"] for r in rows) == ["Linen set", "Second"]
+
+    # rows carry their _id, so re-importing the export updates in place
+    report = client.post("/api/outfits/import", content=res.content).json()
+    assert report == {"received": 2, "inserted": 0, "updated": 2, "failed": 0,
+                      "errors": [], "errors_truncated": False}
+    assert run(db.outfits.count_documents({})) == 3
+
+
+def test_error_list_is_truncated(client, admin):
+    report = client.post("/api/outfits/import", params={"max_errors": 1}, content=ndjson("x", "y", "z")).json()
+    assert report["failed"] == 3 and report["errors"] == [{"line": 1, "error": report["errors"][0]["error"]}]
+    assert report["errors_truncated"] is True
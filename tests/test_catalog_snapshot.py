@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from services import catalog_service
+from services.catalog_service import CatalogService
+
+T0 = datetime(2026, 1, 1)
+
+
+def outfit(title, minutes, **extra):
+    return {"_id": ObjectId(), "title": title, "occasion": "Work", "style_types": ["Minimalist"],
+            "created_at": T0 + timedelta(minutes=minutes), **extra}
+
+
+@pytest.fixture
+def catalog(app, monkeypatch):
+    from routes import outfit_routes
+    svc = CatalogService()
+    monkeypatch.setattr(catalog_service, "catalog", svc)
+    monkeypatch.setattr(outfit_routes, "catalog", svc)
+    return svc
+
+
+def titles(snap):
+    return [o["title"] for o in snap.outfits]
+
+
+def test_load_keeps_active_outfits_in_creation_order(catalog, db, run):
+    run(db.outfits.insert_many([outfit("b", 2), outfit("a", 1), outfit("off", 3, is_active=False)]))
+    snap = run(catalog.load())
+    assert titles(snap) == ["a", "b"]
+    assert catalog.current() is snap and snap.scorer.outfits is snap.outfits
+    assert snap.stamp == T0 + timedelta(minutes=2)
+    with pytest.raises(TypeError):
+        snap.outfits[0]["title"] = "changed"  # read-only mappings
+
+
+def test_refresh_applies_changes_and_deactivations(catalog, db, run):
+    a, b = outfit("a", 1), outfit("b", 2)
+    run(db.outfits.insert_many([a, b]))
+    first = run(catalog.load())
+    assert run(catalog.refresh()) is first  # nothing changed
+
+    async def change():
+        later = T0 + timedelta(hours=1)
+        await db.outfits.update_one({"_id": a["_id"]}, {"$set": {"title": "a2", "updated_at": later}})
+        await db.outfits.update_one({"_id": b["_id"]}, {"$set": {"is_active": False, "updated_at": later}})
+        await db.outfits.insert_one(outfit("c", 90))
+        return await catalog.refresh()
+
+    snap = run(change())
+    assert titles(snap) == ["a2", "c"]
+    assert titles(first) == ["a", "b"]  # readers of the old snapshot are unaffected
+
+
+def test_refresh_reloads_after_hard_delete(catalog, db, run):
+    a, b = outfit("a", 1), outfit("b", 2)
+    run(db.outfits.insert_many([a, b]))
+    run(catalog.load())
+    run(db.outfits.delete_one({"_id": a["_id"]}))
+    assert titles(run(catalog.refresh())) == ["b"]
+
+
+def test_catalog_stats_route(catalog, client, db, run):
+    assert client.get("/api/outfits/catalog/stats").json() == {"loaded": False, "outfits": 0}
+    run(db.outfits.insert_many([outfit("a", 1), outfit("b", 2)]))
+    run(catalog.load())
+    stats = client.get("/api/outfits/catalog/stats").json()
+    assert stats["loaded"] is True and stats["outfits"] == 2 and stats["measured_at"]
+    assert stats["scoring_array_bytes"] > 0 and stats["bytes_per_outfit"] > 0
+
+
+def test_refresh_sees_a_write_in_the_stamps_own_millisecond(catalog, db, run):
+    a, b = outfit("a", 1), outfit("b", 2)
+    run(db.outfits.insert_many([a, b]))
+    first = run(catalog.load())
+    assert run(catalog.refresh()) is first  # re-reading b at the stamp isn't a change
+
+    # updated after the snapshot read but with the very same stamp
+    run(db.outfits.update_one({"_id": a["_id"]}, {"$set": {"title": "a2", "updated_at": first.stamp}}))
+    assert titles(run(catalog.refresh())) == ["a2", "b"]
+
+
+def test_memory_is_measured_on_full_loads_only(catalog, db, run, monkeypatch):
+    calls = []
+    measure = catalog_service._memory_stats
+    monkeypatch.setattr(catalog_service, "_memory_stats", lambda *a: calls.append(1) or measure(*a))
+    run(db.outfits.insert_one(outfit("a", 1)))
+    first = run(catalog.load())
+    run(db.outfits.insert_one(outfit("b", 90)))
+    snap = run(catalog.refresh())
+    assert len(snap) == 2 and calls == [1]
+    assert snap.memory is first.memory
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from services import daily_suggestions as daily
+from services.style_vector import from_user
+
+DAY = "2026-10-19"
+KEY = f"{daily.JOB}:{DAY}"
+
+
+@pytest.fixture(autouse=True)
+def thread_pool(monkeypatch):
+    """Score in threads instead of spawned processes (same initializer and tasks)."""
+    def pool(max_workers, mp_context, initializer, initargs):
+        return ThreadPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+    monkeypatch.setattr(daily, "ProcessPoolExecutor", pool)
+
+
+@pytest.fixture
+def users(db, run):
+    vec = from_user({"style": {"current": ["Minimalist", "Smart Casual"]}}, ["style"]).model_dump()
+    ids = [ObjectId() for _ in range(5)]
+    run(db.users.insert_many([
+        {"_id": i, "notifications": {"frequency": "daily"}, "style_vector": vec} for i in ids
+    ] + [{"_id": ObjectId(), "notifications": {"frequency": "weekly"}, "style_vector": vec}]))
+    return sorted(ids)
+
+
+def suggest(run, **kw):
+    return run(daily.run_daily_suggestions(day=DAY, chunk_size=2, workers=1, per_user=3, **kw))
+
+
+def test_run_is_idempotent_and_releases_the_lease(users, db, run):
+    stats = suggest(run)
+    assert stats["users"] == 5 and stats["written"] == 15
+    assert suggest(run)["skipped"] == "already done"
+    assert suggest(run, restart=True)["users"] == 5  # re-scored, upserted in place
+
+    rows = run(db.user_outfits.find({"source": "daily"}).to_list(None))
+    assert len(rows) == 15
+    assert {r["user_id"] for r in rows} == {str(i) for i in users}
+    ckpt = run(db[daily.CHECKPOINTS].find_one({"_id": KEY}))
+    assert ckpt["done"] is True and "lease_owner" not in ckpt
+
+
+def test_held_lease_skips_the_run(users, db, run):
+    run(db[daily.CHECKPOINTS].insert_one({
+        "_id": KEY, "lease_owner": "other", "lease_expires_at": datetime.utcnow() + timedelta(minutes=5),
+    }))
+    assert suggest(run)["skipped"] == "running elsewhere"
+    assert run(db.user_outfits.count_documents({})) == 0
+
+
+def test_expired_lease_is_taken_over_from_the_checkpoint(users, db, run):
+    # a crashed run got through the first two users
+    run(db[daily.CHECKPOINTS].insert_one({
+        "_id": KEY, "lease_owner": "crashed", "lease_expires_at": datetime.utcnow() - timedelta(seconds=1),
+        "last_user_id": users[1], "users": 2,
+    }))
+    stats = suggest(run)
+    assert stats["resumed"] is True and stats["users"] == 3
+    assert {r["user_id"] for r in run(db.user_outfits.find({}).to_list(None))} == {str(i) for i in users[2:]}
@@ -0,0 +1,55 @@
+import pytest
+
+from services.fieldsets import InvalidFields, projection
+from services.user_outfit_service import UserOutfitService
+from tests.conftest import catalog_outfit
+
+SUMMARY_KEYS = {"_id", "title", "occasion", "color", "confidence", "style_types", "created_at"}
+
+
+def test_projection_presets_paths_and_unknown_fields():
+    allowed, presets = ("title", "outfit", "color"), {"summary": ("title", "color")}
+    assert projection(None, allowed, presets) is None
+    assert projection(" summary ", allowed, presets) == {"_id": 1, "title": 1, "color": 1}
+    # a parent and its child path: the parent wins
+    assert projection("outfit.items,outfit,title", allowed, presets) == {"_id": 1, "outfit": 1, "title": 1}
+    with pytest.raises(InvalidFields, match="Unknown fields: password, auth.hash"):
+        projection("title,password,auth.hash", allowed, presets)
+
+
+def test_catalog_summary_rows(client, db, run):
+    run(db.outfits.insert_one(catalog_outfit("full")))
+    items = client.get("/api/outfits/", params={"fields": "summary"}).json()["items"]
+    assert set(items[0]) == SUMMARY_KEYS and items[0]["title"] == "full"
+
+
+def test_catalog_summary_tolerates_incomplete_docs(client, db, run):
+    partial = catalog_outfit("partial")
+    for f in ("occasion", "color", "confidence"):
+        partial.pop(f)
+    run(db.outfits.insert_many([catalog_outfit("full"), partial]))
+    res = client.get("/api/outfits/", params={"fields": "summary"})
+    assert res.status_code == 200
+    row = next(i for i in res.json()["items"] if i["title"] == "partial")
+    assert row["occasion"] is None and row["color"] is None and row["confidence"] is None
+
+
+def test_sparse_fields_read_only_what_was_asked(client, login, db, run):
+    run(db.outfits.insert_one(catalog_outfit("full")))
+    item = client.get("/api/outfits/", params={"fields": "title,items.name"}).json()["items"][0]
+    assert item == {"_id": item["_id"], "created_at": item["created_at"], "title": "full",
+                    "items": [{"name": "Blazer"}]}
+
+    user_id = login()
+    run(UserOutfitService(db).save_generated_outfits(
+        outfits=[{"title": "Mine", "items": [{"name": "Tee"}]}], user_id=str(user_id), session_id=None,
+    ))
+    item = client.get("/api/user/outfits/", params={"fields": "title,outfit.items"}).json()["items"][0]
+    assert set(item) == {"_id", "created_at", "title", "outfit"} and item["outfit"] == {"items": [{"name": "Tee"}]}
+
+
+@pytest.mark.parametrize("url", ["/api/outfits/", "/api/user/outfits/"])
+def test_unknown_fields_are_400(client, login, url):
+    login()
+    res = client.get(url, params={"fields": "title,nope"})
+    assert res.status_code == 400 and "nope" in res.json()["detail"]
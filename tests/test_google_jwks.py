@@ -0,0 +1,55 @@
+import json
+import time
+
+import jwt
+import pytest
+
+pytest.importorskip("cryptography")
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+from services.google_jwks import GoogleJWKS  # noqa: E402
+
+AUD = "client-id.apps.googleusercontent.com"
+
+
+@pytest.fixture
+def keys(tmp_path):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private.public_key()))
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [{**jwk, "kid": "k1", "alg": "RS256", "use": "sig"}]}))
+    return private, str(path)
+
+
+def _token(private, **claims):
+    now = int(time.time())
+    body = {"iss": "https://accounts.google.com", "aud": AUD, "sub": "g-1", "iat": now, "exp": now + 300, **claims}
+    return jwt.encode(body, private, algorithm="RS256", headers={"kid": "k1"})
+
+
+def test_verifies_locally_and_caches_keys(keys, run):
+    private, path = keys
+    jwks = GoogleJWKS(file=path)
+    loads = []
+    original = jwks._load
+
+    async def counting_load():
+        loads.append(1)
+        await original()
+    jwks._load = counting_load
+
+    async def go():
+        first = await jwks.verify_id_token(_token(private), audience=AUD)
+        second = await jwks.verify_id_token(_token(private, sub="g-2"), audience=AUD)
+        return first, second
+
+    first, second = run(go())
+    assert (first["sub"], second["sub"]) == ("g-1", "g-2")
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize("claims", [{"aud": "someone-else"}, {"iss": "https://evil.example"}, {"exp": 1}])
+def test_rejects_bad_claims(keys, run, claims):
+    private, path = keys
+    with pytest.raises(jwt.InvalidTokenError):
+        run(GoogleJWKS(file=path).verify_id_token(_token(private, **claims), audience=AUD))
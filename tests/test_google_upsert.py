@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+
+from services.user_service import upsert_user_from_google_userinfo
+
+
+@pytest.fixture
+def users(db, run):
+    run(db.users.create_index("email", unique=True))
+    run(db.users.create_index("auth.google.sub", unique=True, sparse=True))
+    return db.users
+
+
+def _ui(**kw):
+    return {"sub": "g-1", "email": "ada@example.com", "email_verified": True, "name": "Ada", **kw}
+
+
+def test_new_then_returning_user_is_one_doc(users, run):
+    first = run(upsert_user_from_google_userinfo(_ui()))
+    again = run(upsert_user_from_google_userinfo(_ui(name="Ada L.")))
+    assert first["_id"] == again["_id"]
+    assert run(users.count_documents({})) == 1
+    assert again["auth"]["google"]["name"] == "Ada L." and again["auth"]["providers"] == "google"
+    assert again["name"] == "Ada"  # profile fields are only set on insert
+
+
+def test_verified_email_attaches_to_existing_account(users, run):
+    run(users.insert_one({"email": "ada@example.com", "name": "Password Ada", "auth": {"password_hash": "x"}}))
+    doc = run(upsert_user_from_google_userinfo(_ui(picture="https://img.example/ada.png")))
+    assert run(users.count_documents({})) == 1
+    assert doc["auth"]["google"]["sub"] == "g-1" and doc["auth"]["password_hash"] == "x"
+    assert doc["avatar_url"] == "https://img.example/ada.png"
+
+
+def test_unverified_email_does_not_take_over_an_account(users, run):
+    run(users.insert_one({"email": "ada@example.com", "name": "Password Ada"}))
+    with pytest.raises(HTTPException) as err:
+        run(upsert_user_from_google_userinfo(_ui(email_verified=False)))
+    assert err.value.status_code == 409
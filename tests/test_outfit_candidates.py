@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from services.outfit_scoring import OutfitScorer
+from services.recommendation_engine import ProfileFeatures, score_outfit
+from tests.test_outfit_scoring import QUIZZES, catalog
+
+SEASONS = ["Spring", "Summer", "Fall", "Winter"]
+
+
+def seasonal_catalog(n, seed=11):
+    rng = random.Random(seed)
+    outfits = catalog(n, seed)
+    for o in outfits:
+        roll = rng.random()
+        if roll < 0.2:
+            o["seasons"] = ["All"]
+        elif roll < 0.8:
+            o["seasons"] = rng.sample(SEASONS, rng.randint(1, 2))
+        # else: no seasons field, which counts as any season
+    return outfits
+
+
+@pytest.mark.parametrize("quiz", QUIZZES)
+@pytest.mark.parametrize("k", [1, 6, 50])
+def test_index_top_k_equals_full_scan(quiz, k):
+    scorer = OutfitScorer(seasonal_catalog(500))
+    features = ProfileFeatures.from_responses(quiz)
+    assert scorer.top_k(features, k) == scorer.top_k(features, k, use_index=False)
+
+
+@pytest.mark.parametrize("quiz", QUIZZES)
+@pytest.mark.parametrize("season", ["Winter", "Summer", "Monsoon"])
+def test_season_filter_equals_filtered_scan(quiz, season):
+    outfits = seasonal_catalog(500)
+    scorer = OutfitScorer(outfits)
+    features = ProfileFeatures.from_responses(quiz)
+
+    got = scorer.top_k(features, 6, season=season)
+    assert got == scorer.top_k(features, 6, season=season, use_index=False)
+
+    in_season = [(i, score_outfit(o, features)) for i, o in enumerate(outfits)
+                 if season in o.get("seasons", ["All"]) or "All" in o.get("seasons", ["All"])]
+    expected = sorted((p for p in in_season if p[1] > 50), key=lambda p: -p[1])[:6]
+    assert got == expected
+
+
+def test_candidates_cover_style_and_occasion_postings():
+    outfits = seasonal_catalog(200)
+    scorer = OutfitScorer(outfits)
+    features = ProfileFeatures.from_responses(QUIZZES[1])
+    cand = set(scorer.candidates(features).tolist())
+    expected = {i for i, o in enumerate(outfits)
+                if features.current_styles & set(o["style_types"]) or o["occasion"] in features.occasions}
+    assert cand == expected
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from models.quiz import QuizResponses
+from services.outfit_scoring import OutfitScorer, scorer_for
+from services.recommendation_engine import CURATED_OUTFITS, ProfileFeatures, score_outfit
+
+STYLES = ["Minimalist", "Casual", "Smart Casual", "Formal", "Streetwear", "Sporty", "Trendy"]
+OCCASIONS = ["Work", "Casual", "Date", "Gym", "Party", "Business", "Evening"]
+BODY_TYPES = ["Slim", "Athletic", "Average", "Curvy", "Plus-size"]
+QUIZZES = [
+    QuizResponses(current_style=["Minimalist", "Smart Casual"], help_occasions=["Work/office", "Dates"],
+                  body_type="Athletic", goals=["Look more confident", "Save time"]),
+    QuizResponses(current_style=["Streetwear"], help_occasions=["Casual daily wear"], body_type="Curvy"),
+    QuizResponses(goals=["Save time"]),
+    QuizResponses(),
+]
+
+
+def catalog(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "occasion": rng.choice(OCCASIONS),
+            "description": rng.choice(["A versatile everyday look.", "Sharp and polished."]),
+            "confidence": rng.randint(80, 99),
+            "style_types": rng.sample(STYLES, rng.randint(1, 3)),
+            "body_types": ["All"] if rng.random() < 0.5 else rng.sample(BODY_TYPES, 2),
+        }
+        for i in range(n)
+    ]
+
+
+def scalar(outfits, features, k=6):
+    scored = [{**o, "match_score": s} for o in outfits if (s := score_outfit(o, features)) > 50]
+    scored.sort(key=lambda x: x["match_score"], reverse=True)
+    return scored[:k]
+
+
+@pytest.mark.parametrize("quiz", QUIZZES)
+def test_vector_scores_match_score_outfit(quiz):
+    outfits = catalog(300) + list(CURATED_OUTFITS)
+    features = ProfileFeatures.from_responses(quiz)
+    scorer = OutfitScorer(outfits)
+    assert scorer.scores(features).tolist() == [score_outfit(o, features) for o in outfits]
+    assert scorer.recommend(features) == scalar(outfits, features)
+
+
+def test_irregular_outfits_fall_back_to_score_outfit():
+    # a string style_types is matched by substring in the scalar rules
+    outfits = catalog(20) + [{"style_types": "Minimalist chic", "occasion": "Work"}, {"confidence": "high"}]
+    features = ProfileFeatures.from_responses(QUIZZES[0])
+    scorer = OutfitScorer(outfits)
+    assert len(scorer.irregular) == 2
+    assert scorer.scores(features).tolist() == [score_outfit(o, features) for o in outfits]
+
+
+def test_scorer_is_reused_for_the_same_catalog():
+    outfits = catalog(10)
+    assert scorer_for(outfits) is scorer_for(outfits)
+    assert scorer_for(list(outfits)) is not scorer_for(outfits)
+
+
+def test_list_occasion_only_loses_the_occasion_bonus():
+    features = ProfileFeatures.from_responses(QUIZZES[0])
+    outfit = {"occasion": ["Work"], "style_types": ["Minimalist"], "body_types": ["All"], "confidence": 95}
+    assert score_outfit(outfit, features) == 50 + 20 + 10 + 10
+    assert OutfitScorer([outfit]).scores(features).tolist() == [90]
+
+
+def test_scorer_for_is_safe_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    outfits = catalog(50)
+    with ThreadPoolExecutor(8) as pool:
+        scorers = list(pool.map(lambda _: scorer_for(outfits), range(32)))
+    assert all(s is scorers[0] for s in scorers)
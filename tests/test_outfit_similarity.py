@@ -0,0 +1,87 @@
+import pytest
+from bson import ObjectId
+
+from services import outfit_embeddings, user_outfit_service
+from services.outfit_embeddings import OutfitIndexes, build_index
+from services.user_outfit_service import COLL, UserOutfitService
+
+OUTFITS = [
+    {"title": "Navy linen summer suit", "description": "Light tailoring for warm offices",
+     "items": [{"name": "Navy linen blazer", "brand": "Suitsupply"}]},
+    {"title": "Navy linen weekend set", "description": "Relaxed linen for warm days",
+     "items": [{"name": "Navy linen shirt", "brand": "Suitsupply"}]},
+    {"title": "Black leather biker look", "description": "Edgy night out",
+     "items": [{"name": "Leather jacket", "brand": "AllSaints"}]},
+]
+
+
+@pytest.fixture
+def index_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_outfit_service, "indexes", OutfitIndexes(tmp_path))
+    return tmp_path
+
+
+def save(db, run, user_id, outfits):
+    svc = UserOutfitService(db)
+    return run(svc.save_generated_outfits(outfits=outfits, user_id=str(user_id), session_id="sid"))
+
+
+def test_saved_scope_finds_own_outfits_by_string_id(db, run, index_root):
+    me, other = ObjectId(), ObjectId()
+    mine = save(db, run, me, OUTFITS)
+    save(db, run, other, OUTFITS[:2])
+
+    docs = run(db[COLL].find({}).to_list(None))
+    assert all(isinstance(d["_id"], str) for d in docs)  # PyObjectId is stored as a string
+    build_index(COLL, docs, dim=64, root=index_root)
+
+    svc = UserOutfitService(db)
+    items = run(svc.similar(outfit_id=str(mine[0].id), user_id=str(me), scope="saved", limit=5))
+    # only the caller's other outfits, closest first
+    assert {i["_id"] for i in items} <= {str(o.id) for o in mine[1:]}
+    assert items[0]["_id"] == str(mine[1].id) and 0 < items[0]["similarity"] <= 1
+
+
+def test_other_owners_do_not_crowd_out_the_callers_outfits(db, run, index_root):
+    me = ObjectId()
+    mine = save(db, run, me, OUTFITS)
+    for _ in range(40):  # plenty of near-duplicates of the query saved by others
+        save(db, run, ObjectId(), OUTFITS[:1])
+    build_index(COLL, run(db[COLL].find({}).to_list(None)), dim=256, nlist=8, root=index_root)
+    later = save(db, run, me, [{**OUTFITS[0], "title": "Navy linen summer suit again"}])
+
+    items = run(UserOutfitService(db).similar(outfit_id=str(mine[0].id), user_id=str(me), scope="saved", limit=2))
+    # the outfit saved after the build is embedded on the spot and ranks first
+    assert [i["_id"] for i in items] == [str(later[0].id), str(mine[1].id)]
+
+
+def test_build_index_streams_its_input(tmp_path):
+    seen = []
+
+    def docs():
+        for n, d in enumerate(OUTFITS):
+            seen.append(n)
+            yield {**d, "id": f"o{n}"}
+
+    build_index("outfits", docs(), dim=64, root=tmp_path)
+    index = OutfitIndexes(tmp_path).get("outfits")
+    assert seen == [0, 1, 2] and sorted(index.ids.tolist()) == ["o0", "o1", "o2"]
+    assert index.rows(["o1", "nope"])[1] == -1 and str(index.ids[index.rows(["o1"])[0]]) == "o1"
+
+
+def test_missing_index_is_a_lookup_error(db, run, index_root):
+    me = ObjectId()
+    saved = save(db, run, me, OUTFITS[:1])
+    with pytest.raises(LookupError):
+        run(UserOutfitService(db).similar(outfit_id=str(saved[0].id), user_id=str(me), scope="saved"))
+
+
+def test_index_reopens_on_new_build(tmp_path):
+    live = OutfitIndexes(tmp_path)
+    build_index("outfits", [{"id": "a", "title": "navy suit"}], dim=16, root=tmp_path)
+    first = live.get("outfits")
+    assert len(first) == 1 and live.get("outfits") is first
+    build_index("outfits", [{"id": "a", "title": "navy suit"}, {"id": "b", "title": "red dress"}],
+                dim=16, root=tmp_path)
+    assert len(live.get("outfits")) == 2
+    assert outfit_embeddings.indexes is not live
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from services.pagination import InvalidCursor, decode_cursor, encode_cursor
+from services.user_outfit_service import UserOutfitService
+from tests.conftest import catalog_outfit
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.mark.parametrize("oid", [ObjectId(), str(ObjectId())])
+def test_cursor_round_trip_keeps_the_id_type(oid):
+    cursor = encode_cursor({"_id": oid, "created_at": T0})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (T0, oid)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", "eyJ0Ijoibm9wZSIsImkiOiJ4In0"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def _pages(client, url, **params):
+    ids, cursor = [], None
+    while True:
+        body = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        ids += [i["_id"] for i in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_catalog_pages_oldest_first_across_timestamp_ties(client, db, run):
+    # three outfits share a created_at: _id breaks the tie
+    docs = [catalog_outfit(f"o{n}", T0 + timedelta(minutes=n // 3)) for n in range(7)]
+    run(db.outfits.insert_many(docs))
+    expected = [str(d["_id"]) for d in sorted(docs, key=lambda d: (d["created_at"], d["_id"]))]
+    assert _pages(client, "/api/outfits/", limit=2) == expected
+    assert client.get("/api/outfits/", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_history_pages_newest_first(client, login, db, run):
+    user_id = login()
+    svc = UserOutfitService(db)
+    for n in range(5):
+        run(svc.save_generated_outfits(outfits=[{"title": f"o{n}"}], user_id=str(user_id), session_id=None))
+    docs = run(db.user_outfits.find({}).to_list(None))
+    expected = [d["_id"] for d in sorted(docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)]
+    assert _pages(client, "/api/user/outfits/", limit=2) == expected
+    assert client.get("/api/user/outfits/", params={"cursor": "bogus"}).status_code == 400
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from services import auth_service
+from services.auth_service import hash_password, login_user, signup_user, verify_password
+from tests.conftest import bcrypt_context
+
+pytestmark = pytest.mark.usefixtures("cheap_bcrypt")
+
+
+def test_hash_and_verify_off_the_loop(run):
+    async def go():
+        h = await hash_password("s3cret")
+        return h, await verify_password("s3cret", h), await verify_password("wrong", h)
+
+    h, good, bad = run(go())
+    assert h.startswith("$2b$04$")
+    assert good == (True, None) and bad[0] is False
+
+
+def test_login_rehashes_outdated_cost(db, run):
+    async def go():
+        await signup_user({"email": "Old@Example.com", "password": "pw"}, None)
+        await db.users.update_one({"email": "old@example.com"},
+                                  {"$set": {"auth.password_hash": bcrypt_context(5).hash("pw")}})
+        await login_user("old@example.com", "pw", None)
+        return (await db.users.find_one({"email": "old@example.com"}))["auth"]["password_hash"]
+
+    assert run(go()).startswith("$2b$04$")
+
+
+def test_full_queue_is_a_503(monkeypatch, run):
+    async def go():
+        monkeypatch.setattr(auth_service, "_hash_slots", asyncio.Semaphore(0))
+        monkeypatch.setattr(auth_service, "PASSWORD_HASH_QUEUE_TIMEOUT", 0.01)
+        await hash_password("pw")
+
+    with pytest.raises(HTTPException) as err:
+        run(go())
+    assert err.value.status_code == 503
@@ -0,0 +1,48 @@
+import pytest
+
+from models.quiz import QuizResponses
+from services.quiz_service import QuizService
+from services.recommendation_engine import RecommendationEngine
+
+ANSWERS = {"current_style": ["Minimalist", "Smart Casual"], "help_occasions": ["Work/office"],
+           "body_type": "Athletic", "goals": ["Look more confident"]}
+
+
+@pytest.fixture
+def quiz(db, run):
+    svc = QuizService(db)
+    run(svc.start_quiz_session("sid-1"))
+    run(svc.submit_quiz_steps("sid-1", [(0, ANSWERS)]))
+    return svc
+
+
+def test_analyze_profile_matches_the_separate_stages(run):
+    engine = RecommendationEngine()
+    quiz = QuizResponses(**ANSWERS)
+    analysis = run(engine.analyze_profile(quiz))
+    assert analysis.style_profile == run(engine.analyze_style_profile(quiz))
+    assert analysis.confidence_score == run(engine.calculate_confidence_score(quiz))
+    assert analysis.recommendations == run(engine.generate_recommendations(quiz))
+
+
+def test_completion_stores_analysis_and_results_reuse_it(quiz, db, run, monkeypatch):
+    completed = run(quiz.complete_quiz("sid-1"))
+    stored = run(db.quiz_sessions.find_one({"session_id": "sid-1"}))["analysis"]
+    assert stored["confidence_score"] == completed["confidence_score"]
+    assert stored["style_profile"] == completed["style_profile"].model_dump()
+
+    async def no_reanalysis(quiz_responses):
+        raise AssertionError("stored analysis not reused")
+
+    async def gemini(style_profile):
+        return {"profile": style_profile.model_dump()}
+
+    monkeypatch.setattr(quiz.recommendation_engine, "analyze_style_profile", no_reanalysis)
+    monkeypatch.setattr(quiz.recommendation_engine, "get_gemini_recommendations", gemini)
+    assert run(quiz.get_quiz_results("sid-1")) == {"profile": stored["style_profile"]}
+
+
+def test_step_submission_drops_stale_analysis(quiz, db, run):
+    run(quiz.complete_quiz("sid-1"))
+    run(quiz.submit_quiz_steps("sid-1", [(2, {"body_type": "Slim"})]))
+    assert "analysis" not in run(db.quiz_sessions.find_one({"session_id": "sid-1"}))
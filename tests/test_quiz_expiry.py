@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.maintenance import batched_delete
+from services.quiz_service import QuizService
+
+
+@pytest.fixture
+def quiz(db, monkeypatch):
+    svc = QuizService(db)
+
+    async def analysis(_):
+        class A:
+            recommendations, confidence_score, style_profile = [], 0, {}
+            def to_doc(self):
+                return {}
+        return A()
+    monkeypatch.setattr(svc.recommendation_engine, "analyze_profile", analysis)
+    return svc
+
+
+def test_expires_at_slides_and_is_cleared_on_completion(quiz, db, run):
+    async def go():
+        await quiz.start_quiz_session("sid-1")
+        started = (await db.quiz_sessions.find_one({"session_id": "sid-1"}))["expires_at"]
+        await quiz.submit_quiz_steps("sid-1", [(0, {"full_name": "Ada"})])
+        slid = (await db.quiz_sessions.find_one({"session_id": "sid-1"}))["expires_at"]
+        await quiz.complete_quiz("sid-1")
+        return started, slid, await db.quiz_sessions.find_one({"session_id": "sid-1"})
+
+    started, slid, done = run(go())
+    assert started > datetime.utcnow() and slid >= started
+    assert "expires_at" not in done and done["is_completed"] is True
+
+
+def test_cleanup_only_removes_legacy_abandoned_sessions(quiz, db, run):
+    old = datetime.utcnow() - timedelta(days=3)
+    run(db.quiz_sessions.insert_many([
+        {"session_id": "legacy", "is_completed": False, "created_at": old},
+        {"session_id": "done", "is_completed": True, "created_at": old},
+        {"session_id": "ttl", "is_completed": False, "created_at": old, "expires_at": datetime.utcnow()},
+        {"session_id": "fresh", "is_completed": False, "created_at": datetime.utcnow()},
+    ]))
+    assert run(quiz.cleanup_old_sessions()) == 1
+    left = {d["session_id"] for d in run(db.quiz_sessions.find({}).to_list(None))}
+    assert left == {"done", "ttl", "fresh"}
+
+
+def test_batched_delete_respects_batch_cap(db, run):
+    run(db.junk.insert_many([{"n": i} for i in range(25)]))
+    assert run(batched_delete(db.junk, {}, batch_size=10, pause_seconds=0, max_batches=2)) == 20
+    assert run(db.junk.count_documents({})) == 5
+
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from services import quiz_funnel
+
+
+def test_counters_roll_up_per_day_and_source(db, run):
+    async def go():
+        await quiz_funnel.record(db, "Landing", started=2)
+        await quiz_funnel.record(db, "landing", steps=[0, 1])
+        await quiz_funnel.record(db, "landing", steps=[0], completed=1)
+        await quiz_funnel.record(db, "weird source!", started=1)
+        today = datetime.utcnow().date()
+        return (await quiz_funnel.get_funnel(db, start=today, end=today),
+                await quiz_funnel.get_funnel(db, start=today, end=today, source="landing"))
+
+    everything, landing = run(go())
+    assert [d["source"] for d in everything["days"]] == ["landing", "other"]
+    assert everything["totals"] == {"started": 3, "steps": {"0": 2, "1": 1}, "completed": 1}
+    assert landing["totals"] == {"started": 2, "steps": {"0": 2, "1": 1}, "completed": 1}
+
+
+def test_quiz_flow_bumps_started_and_completed(db, run, monkeypatch):
+    from services.quiz_service import QuizService
+    svc = QuizService(db)
+
+    async def analysis(_):
+        class A:
+            recommendations, confidence_score, style_profile = [], 0, {}
+            def to_doc(self):
+                return {}
+        return A()
+    monkeypatch.setattr(svc.recommendation_engine, "analyze_profile", analysis)
+
+    async def go():
+        await svc.start_quiz_session("sid-1", source="ads")
+        await svc.start_quiz_session("sid-1", source="ads")  # resume: not a new start
+        await svc.submit_quiz_steps("sid-1", [(5, {"goals": ["Confidence"]})])
+        await svc.complete_quiz("sid-1")
+        await svc.complete_quiz("sid-1")  # re-completion isn't counted again
+        return await db.quiz_funnel.find_one({"source": "ads"})
+
+    doc = run(go())
+    assert (doc["started"], doc["steps"], doc["completed"]) == (1, {"5": 1}, 1)
+
+
+def test_funnel_is_for_analytics_admins_only(client, login, db, run, monkeypatch):
+    from bson import ObjectId
+    from routes import quiz_routes
+
+    assert client.get("/api/quiz/funnel").status_code == 401
+
+    admin, other = ObjectId(), ObjectId()
+    run(db.users.insert_many([{"_id": admin, "email": "ops@example.com"}, {"_id": other, "email": "ada@example.com"}]))
+    monkeypatch.setattr(quiz_routes, "ANALYTICS_ADMIN_EMAILS", {"ops@example.com"})
+    login(other)
+    assert client.get("/api/quiz/funnel").status_code == 403
+    login(admin)
+    res = client.get("/api/quiz/funnel")
+    assert res.status_code == 200 and res.json()["totals"]["started"] == 0
@@ -0,0 +1,23 @@
+import gzip
+import json
+
+from services.quiz_questions import quiz_questions
+
+
+def test_identity_and_gzip_variants(client):
+    plain = client.get("/api/quiz/questions", headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.json() == quiz_questions.structure
+    assert "public, max-age=" in plain.headers["cache-control"]
+
+    zipped = client.get("/api/quiz/questions", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    assert "accept-encoding" in zipped.headers["vary"].lower()
+    assert json.loads(gzip.decompress(quiz_questions.variants["gzip"][0])) == quiz_questions.structure
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get("/api/quiz/questions", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    res = client.get("/api/quiz/questions", headers={"Accept-Encoding": "identity", "If-None-Match": f"W/{etag}"})
+    assert res.status_code == 304 and res.content == b""
@@ -0,0 +1,44 @@
+import pytest
+
+from services.quiz_service import QuizService
+
+
+@pytest.fixture
+def quiz(db, run):
+    svc = QuizService(db)
+    run(svc.start_quiz_session("sid-1", source="landing"))
+    return svc
+
+
+def _funnel_steps(db, run):
+    docs = run(db.quiz_funnel.find({}).to_list(None))
+    return {k: v for d in docs for k, v in d.get("steps", {}).items()}
+
+
+def test_sparse_batch_credits_only_submitted_steps(quiz, db, run):
+    res = run(quiz.submit_quiz_steps("sid-1", [(0, {"full_name": "Ada"}), (3, {"occupation": "Engineer"})]))
+    assert res["validation_errors"] is None and res["next_step"] == 4
+    assert _funnel_steps(db, run) == {"0": 1, "3": 1}
+
+    # resubmitting a step already passed earns nothing; a new one does
+    run(quiz.submit_quiz_steps("sid-1", [(3, {"occupation": "Designer"}), (4, {"goals": ["Confidence"]})]))
+    assert _funnel_steps(db, run) == {"0": 1, "3": 1, "4": 1}
+    session = run(db.quiz_sessions.find_one({"session_id": "sid-1"}))
+    assert session["responses"]["occupation"] == "Designer" and session["furthest_step"] == 5
+
+
+@pytest.mark.parametrize("answers, error", [
+    ({"favorite_colors": "blue"}, "favorite_colors: Input should be a valid list"),
+    ({"shoe_size": "42"}, "Unknown answers: shoe_size"),
+])
+def test_bad_answers_reject_the_whole_batch(quiz, db, run, answers, error):
+    res = run(quiz.submit_quiz_steps("sid-1", [(0, {"full_name": "Ada"}), (2, answers)]))
+    assert res["validation_errors"] == {"steps.1": error}
+    session = run(db.quiz_sessions.find_one({"session_id": "sid-1"}))
+    assert session["current_step"] == 0 and session["responses"]["full_name"] is None
+    assert _funnel_steps(db, run) == {}
+
+
+def test_single_step_error_is_general(quiz, run):
+    res = run(quiz.submit_quiz_steps("sid-1", [(9, {})]))
+    assert res["validation_errors"] == {"general": "Invalid step number"}
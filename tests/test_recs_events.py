@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from models.recs import Recommendation
+from services import recs_events
+
+
+def _insert(db, run, user_id, **fields):
+    rec = Recommendation(user_id=user_id, items=[{"label": "Loafers"}], **fields)
+    run(db.recommendations.insert_one(rec.model_dump(by_alias=True)))
+    return rec
+
+
+def test_wait_requires_login(client):
+    assert client.get(f"/api/recs/{ObjectId()}/wait", params={"timeout": 0}).status_code == 401
+
+
+def test_wait_returns_finished_rec_immediately(client, login, db, run):
+    rec = _insert(db, run, login(), status="complete")
+    res = client.get(f"/api/recs/{rec.id}/wait", params={"timeout": 5})
+    assert res.status_code == 200 and res.json()["status"] == "complete"
+
+
+def test_wait_wakes_up_on_publish(app, login, db):
+    user_id = login()
+
+    async def go():
+        rec = Recommendation(user_id=user_id, items=[{"label": "Loafers"}])
+        await db.recommendations.insert_one(rec.model_dump(by_alias=True))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            waiting = asyncio.create_task(http.get(f"/api/recs/{rec.id}/wait", params={"timeout": 10}))
+            while not recs_events.bus.has_subscribers(str(rec.id)):
+                await asyncio.sleep(0.01)
+            await db.recommendations.update_one(
+                {"_id": rec.id}, {"$set": {"status": "complete", "updated_at": datetime.utcnow()}}
+            )
+            recs_events.publish(rec.id)
+            return await asyncio.wait_for(waiting, 5)
+
+    res = asyncio.run(go())
+    assert res.status_code == 200 and res.json()["status"] == "complete"
+
+
+def test_wait_times_out_with_current_copy(client, login, db, run):
+    rec = _insert(db, run, login())
+    since = (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+    res = client.get(f"/api/recs/{rec.id}/wait", params={"timeout": 0, "since": since})
+    assert res.status_code == 200 and res.json()["status"] == "pending"
+
+
+def test_events_stream_ends_when_rec_is_done(client, login, db, run):
+    rec = _insert(db, run, login(), status="complete")
+    res = client.get(f"/api/recs/{rec.id}/events")
+    assert res.status_code == 200
+    assert res.text.startswith("event: update\ndata: ")
+    assert '"status":"complete"' in res.text
+
+
+class _Stream:
+    def __init__(self, changes, error):
+        self.changes, self.error, self.resume_token = changes, error, None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.changes:
+            change = self.changes.pop(0)
+            self.resume_token = change["_id"]
+            return change
+        raise self.error
+
+
+class _Coll:
+    """watch() replays one scripted (changes, error) pair per call."""
+    def __init__(self, script):
+        self.script, self.resumed = script, []
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resumed.append(resume_after)
+        changes, error = self.script.pop(0)
+        return _Stream(changes, error)
+
+
+def _change(token, rec_id):
+    return {"_id": token, "documentKey": {"_id": rec_id}, "fullDocument": {"_id": rec_id}}
+
+
+def test_change_stream_recovers_from_lost_history_and_failures(monkeypatch):
+    rec_id = ObjectId()
+    coll = _Coll([
+        ([_change("t1", rec_id)], OperationFailure("not primary", code=10107)),
+        ([], OperationFailure("history lost", code=286)),
+        ([_change("t2", rec_id)], asyncio.CancelledError()),
+    ])
+    monkeypatch.setattr(recs_events, "get_collection", lambda name: coll)
+    monkeypatch.setattr(recs_events, "RECS_CHANGE_STREAM_MAX_BACKOFF_SECONDS", 0)
+
+    async def go():
+        with recs_events.bus.subscribe(str(rec_id)) as updates:
+            with pytest.raises(asyncio.CancelledError):
+                await recs_events.RecsChangeStream()._run()
+            return updates.get_nowait()
+
+    assert asyncio.run(go()) == {"_id": rec_id}
+    # a plain failure resumes from the token; lost history reopens without one
+    assert coll.resumed == [None, "t1", None]
+
+
+def test_change_stream_stops_without_replica_set(monkeypatch):
+    coll = _Coll([([], OperationFailure("replica sets only", code=40573))])
+    monkeypatch.setattr(recs_events, "get_collection", lambda name: coll)
+    asyncio.run(recs_events.RecsChangeStream()._run())
+    assert coll.resumed == [None]
+
+
+def test_wait_polls_without_a_change_stream(app, login, db, monkeypatch):
+    """An out-of-process worker's write (no publish) still ends the wait."""
+    monkeypatch.setattr(recs_events, "RECS_POLL_FALLBACK_SECONDS", 0.05)
+    user_id = login()
+
+    async def go():
+        rec = Recommendation(user_id=user_id, items=[{"label": "Loafers"}])
+        await db.recommendations.insert_one(rec.model_dump(by_alias=True))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            waiting = asyncio.create_task(http.get(f"/api/recs/{rec.id}/wait", params={"timeout": 10}))
+            while not recs_events.bus.has_subscribers(str(rec.id)):
+                await asyncio.sleep(0.01)
+            await db.recommendations.update_one(
+                {"_id": rec.id}, {"$set": {"status": "complete", "updated_at": datetime.utcnow()}}
+            )
+            return await asyncio.wait_for(waiting, 5)
+
+    assert not recs_events.change_stream.live
+    res = asyncio.run(go())
+    assert res.status_code == 200 and res.json()["status"] == "complete"
+
+
+def test_live_change_stream_disables_polling(monkeypatch):
+    monkeypatch.setattr(recs_events, "RECS_POLL_FALLBACK_SECONDS", 0.01)
+    monkeypatch.setattr(recs_events.change_stream, "live", True)
+    reads = []
+
+    async def reread():
+        reads.append(1)
+        return {"updated_at": "changed"}
+
+    async def go():
+        with pytest.raises(asyncio.TimeoutError):
+            await recs_events.wait_for_change(asyncio.Queue(), reread, "seen", 0.1)
+
+    asyncio.run(go())
+    assert reads == []
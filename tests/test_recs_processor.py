@@ -0,0 +1,53 @@
+import pytest
+from bson import ObjectId
+
+from models.recs import ProductLink, Recommendation
+from services import recs_processor
+
+
+@pytest.fixture
+def outcomes(monkeypatch):
+    """label -> list of per-attempt results (True: links found, False: search error)."""
+    plan = {}
+
+    async def find_links(item):
+        if not plan[item.label].pop(0):
+            raise RuntimeError("search down")
+        return [ProductLink(title=item.label, url="https://shop.example/x", source="test")]
+    monkeypatch.setattr(recs_processor, "find_links_for_item", find_links)
+    return plan
+
+
+def _attempt(db, rec_id):
+    async def go():
+        rec = Recommendation.model_validate(await db.recommendations.find_one({"_id": rec_id}))
+        try:
+            await recs_processor.enrich_recommendation(rec)
+        except RuntimeError:
+            pass
+        return await db.recommendations.find_one({"_id": rec_id})
+    return go()
+
+
+def test_retries_do_not_double_count(db, run, outcomes):
+    outcomes.update({"Shirt": [False, False, True], "Shoes": [False, False, False]})
+    rec = Recommendation(user_id=ObjectId(), items=[{"label": "Shirt"}, {"label": "Shoes"}])
+    run(db.recommendations.insert_one(rec.model_dump(by_alias=True)))
+
+    doc = run(_attempt(db, rec.id))
+    assert doc["meta"] == {"items_failed": 2}
+    doc = run(_attempt(db, rec.id))
+    assert doc["meta"] == {"items_failed": 2}
+    doc = run(_attempt(db, rec.id))
+    assert doc["meta"] == {"items_done": 1, "items_failed": 1}
+    assert doc["status"] == "complete"
+    assert [i["status"] for i in doc["items"]] == ["complete", "error"]
+
+
+def test_links_written_per_item(db, run, outcomes):
+    outcomes.update({"Shirt": [True]})
+    rec = Recommendation(user_id=ObjectId(), items=[{"label": "Shirt"}])
+    run(db.recommendations.insert_one(rec.model_dump(by_alias=True)))
+    doc = run(_attempt(db, rec.id))
+    assert doc["items"][0]["links"][0]["url"] == "https://shop.example/x"
+    assert doc["meta"] == {"items_done": 1}
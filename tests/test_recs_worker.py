@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from models.recs import ProductLink
+from services import recs_processor
+from services.recs_worker import DEAD_LETTER, RecsWorker
+
+ITEMS = [{"label": "White Oxford Shirt"}, {"label": "Navy Chinos"}]
+
+
+@pytest.fixture(autouse=True)
+def link_search(monkeypatch):
+    async def find_links(item):
+        return [ProductLink(title=item.label, url=f"https://shop.example/{len(item.label)}", source="test")]
+    monkeypatch.setattr(recs_processor, "find_links_for_item", find_links)
+
+
+def _create(client, login):
+    login()
+    res = client.post("/api/recs", json={"prompt": "office", "items": ITEMS})
+    assert res.status_code == 200
+    return ObjectId(res.json()["_id"])
+
+
+def test_create_requires_login(client):
+    assert client.post("/api/recs", json={"items": ITEMS}).status_code == 401
+
+
+def test_created_rec_is_claimed_then_done(client, login, db, run):
+    rec_id = _create(client, login)
+    worker = RecsWorker(worker_id="w1", lease_seconds=60)
+
+    async def go():
+        assert (await db.recommendations.find_one({"_id": rec_id}))["status"] == "pending"
+        doc = await worker.claim()
+        assert doc["_id"] == rec_id
+        assert doc["lease_owner"] == "w1" and doc["attempts"] == 1
+        assert await worker.claim() is None  # leased
+        await worker.handle(doc)
+        return await db.recommendations.find_one({"_id": rec_id})
+
+    done = run(go())
+    assert done["status"] == "complete"
+    assert "lease_owner" not in done and "lease_expires_at" not in done
+    assert [i["status"] for i in done["items"]] == ["complete", "complete"]
+    assert all(len(i["links"]) == 1 for i in done["items"])
+
+
+def test_expired_lease_is_reclaimed(client, login, db, run):
+    rec_id = _create(client, login)
+
+    async def go():
+        first = await RecsWorker(worker_id="w1").claim()
+        # w1 crashed: its lease ran out without a heartbeat
+        await db.recommendations.update_one(
+            {"_id": rec_id}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        return first, await RecsWorker(worker_id="w2").claim()
+
+    first, second = run(go())
+    assert first["_id"] == second["_id"] == rec_id
+    assert second["lease_owner"] == "w2" and second["attempts"] == 2
+
+
+def test_fail_backs_off_then_dead_letters(client, login, db, run):
+    rec_id = _create(client, login)
+    worker = RecsWorker(worker_id="w1", max_attempts=2)
+
+    async def go():
+        doc = await worker.claim()
+        await worker._fail(doc, 1, RuntimeError("boom"))
+        retry = await db.recommendations.find_one({"_id": rec_id})
+        assert retry["status"] == "pending" and retry["next_attempt_at"] is not None
+        await db.recommendations.update_one({"_id": rec_id}, {"$set": {"next_attempt_at": datetime.utcnow()}})
+        doc = await worker.claim()
+        await worker._fail(doc, 2, RuntimeError("boom again"))
+        return await db.recommendations.find_one({"_id": rec_id}), await db[DEAD_LETTER].find_one({"rec_id": rec_id})
+
+    rec, dead = run(go())
+    assert rec["status"] == "error" and rec["meta"]["dead_lettered"] is True
+    assert "lease_owner" not in rec
+    assert dead["attempts"] == 2 and dead["error"] == "boom again"
+
+
+def test_malformed_rec_is_dead_lettered_at_once(db, run):
+    rec_id = ObjectId()
+    run(db.recommendations.insert_one({
+        "_id": rec_id, "status": "pending", "items": "not a list", "created_at": datetime.utcnow(),
+    }))
+    worker = RecsWorker(worker_id="w1", max_attempts=5)
+
+    async def go():
+        await worker.handle(await worker.claim())
+        return await db.recommendations.find_one({"_id": rec_id}), await db[DEAD_LETTER].find_one({"rec_id": rec_id})
+
+    rec, dead = run(go())
+    assert rec["status"] == "error" and rec["meta"]["dead_lettered"] is True
+    assert dead["attempts"] == 1
+
+
+def test_slot_survives_a_failing_handle(db, run, monkeypatch):
+    worker = RecsWorker(worker_id="w1", poll_seconds=0.01)
+    docs = [{"_id": 1}, {"_id": 2}]
+    handled = []
+
+    async def claim():
+        return docs.pop(0) if docs else None
+
+    async def handle(doc):
+        handled.append(doc["_id"])
+        if doc["_id"] == 1:
+            raise RuntimeError("mongo write failed")
+        worker.stop()
+
+    monkeypatch.setattr(worker, "claim", claim)
+    monkeypatch.setattr(worker, "handle", handle)
+    run(worker._slot(0))
+    assert handled == [1, 2]
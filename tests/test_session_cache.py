@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from services import session_service
+from models.session import SessionDoc
+from services.session_service import attach_user, create_session, find_by_sid, session_cache
+
+
+def _login_elsewhere(db, sid, user_id):
+    """What attach_user does on another worker: write the binding and bump the version."""
+    async def go():
+        await db.sessions.update_one({"session_id": sid}, {"$set": {"user_id": user_id}})
+        await db.cache_versions.update_one(
+            {"_id": "sessions"}, {"$inc": {"v": 1}, "$push": {"sids": sid}}, upsert=True
+        )
+    return go()
+
+
+def test_login_on_another_worker_is_seen_without_sync(db, run):
+    user_id = ObjectId()
+
+    async def go():
+        sess = await create_session()
+        assert (await find_by_sid(sess.session_id)).user_id is None
+        await _login_elsewhere(db, sess.session_id, user_id)
+        return await find_by_sid(sess.session_id)
+
+    assert run(go()).user_id == user_id
+
+
+def test_sync_drops_changed_anonymous_entries(db, run, monkeypatch):
+    monkeypatch.setattr(session_service, "SESSION_CACHE_SYNC", True)
+    user_id = ObjectId()
+
+    async def go():
+        await session_cache.sync_once()
+        sess = await create_session()
+        assert (await find_by_sid(sess.session_id)).user_id is None
+        await _login_elsewhere(db, sess.session_id, user_id)
+        stale = await find_by_sid(sess.session_id)
+        await session_cache.sync_once()
+        return stale, await find_by_sid(sess.session_id)
+
+    stale, fresh = run(go())
+    assert stale.user_id is None  # cached until the poll notices the bump
+    assert fresh.user_id == user_id
+
+
+def test_attach_user_bumps_version_and_keeps_logged_in_cached(db, run, monkeypatch):
+    monkeypatch.setattr(session_service, "SESSION_CACHE_SYNC", True)
+    user_id = ObjectId()
+
+    async def go():
+        sess = await create_session()
+        await attach_user(sess.session_id, str(user_id))
+        assert (await find_by_sid(sess.session_id)).user_id == user_id
+        await db.sessions.delete_one({"session_id": sess.session_id})
+        return await find_by_sid(sess.session_id), await db.cache_versions.find_one({"_id": "sessions"})
+
+    cached, version = run(go())
+    assert cached.user_id == user_id
+    assert version["v"] == 1
+
+
+def test_sync_drops_logged_in_entry_moved_to_another_user(db, run, monkeypatch):
+    monkeypatch.setattr(session_service, "SESSION_CACHE_SYNC", True)
+    first, second = ObjectId(), ObjectId()
+
+    async def go():
+        await session_cache.sync_once()
+        sess = await create_session()
+        other = await create_session()
+        await attach_user(sess.session_id, str(first))
+        await attach_user(other.session_id, str(first))
+        await session_cache.sync_once()  # our own bumps
+        assert (await find_by_sid(sess.session_id)).user_id == first
+        assert (await find_by_sid(other.session_id)).user_id == first
+        await _login_elsewhere(db, sess.session_id, second)
+        await session_cache.sync_once()
+        return sess.session_id, other.session_id
+
+    sid, other_sid = run(go())
+    assert other_sid in session_cache._data  # untouched sids stay cached
+    assert sid not in session_cache._data
+    assert run(find_by_sid(sid)).user_id == second
+
+
+def test_falling_behind_the_log_clears_the_cache(db, run, monkeypatch):
+    monkeypatch.setattr(session_service, "SESSION_CACHE_SYNC", True)
+
+    async def go():
+        await session_cache.sync_once()
+        sess = await create_session()
+        await db.cache_versions.update_one({"_id": "sessions"}, {"$inc": {"v": 5}, "$push": {"sids": "x"}}, upsert=True)
+        await session_cache.sync_once()
+        return sess.session_id
+
+    assert run(go()) not in session_cache._data
+
+
+def test_entries_never_outlive_the_session(db):
+    past = SessionDoc(session_id="old", user_id=ObjectId(), expires_at=datetime.utcnow() - timedelta(seconds=1))
+    soon = SessionDoc(session_id="soon", user_id=ObjectId(), expires_at=datetime.utcnow() + timedelta(seconds=5))
+    session_cache.put(past)
+    session_cache.put(soon)
+    assert "old" not in session_cache._data
+    assert session_cache._data["soon"][0] - session_service.time.monotonic() <= 5
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.user_outfit_service import UserOutfitService
+from tests.conftest import catalog_outfit
+
+T0 = datetime(2026, 1, 1)
+
+
+def both(client, url, **params):
+    buffered = client.get(url, params=params)
+    streamed = client.get(url, params={**params, "stream": "true"})
+    assert buffered.status_code == streamed.status_code == 200
+    return buffered.json(), streamed.json()
+
+
+@pytest.mark.parametrize("fields", [None, "summary", "title,color"])
+def test_streamed_catalog_page_equals_buffered(client, db, run, fields):
+    # one legacy doc without the defaulted list fields / updated_at
+    legacy = catalog_outfit("legacy", T0)
+    for f in ("style_types", "updated_at", "is_active"):
+        legacy.pop(f)
+    run(db.outfits.insert_many([legacy] + [catalog_outfit(f"o{n}", T0 + timedelta(minutes=n)) for n in range(4)]))
+
+    params = {"limit": 3, **({"fields": fields} if fields else {})}
+    buffered, streamed = both(client, "/api/outfits/", **params)
+    assert streamed == buffered and buffered["next_cursor"]
+
+    rest_b, rest_s = both(client, "/api/outfits/", **params, cursor=buffered["next_cursor"])
+    assert rest_s == rest_b and rest_b["next_cursor"] is None and len(rest_b["items"]) == 2
+
+
+@pytest.mark.parametrize("fields", [None, "summary"])
+def test_streamed_history_page_equals_buffered(client, login, db, run, fields):
+    user_id = login()
+    svc = UserOutfitService(db)
+    run(svc.save_generated_outfits(
+        outfits=[{"title": f"o{n}", "occasion": "Work", "confidence": 80} for n in range(3)],
+        user_id=str(user_id), session_id=None,
+    ))
+    params = {"limit": 2, **({"fields": fields} if fields else {})}
+    buffered, streamed = both(client, "/api/user/outfits/", **params)
+    assert streamed == buffered and len(buffered["items"]) == 2 and buffered["next_cursor"]
+
+
+def test_streamed_page_rejects_bad_cursor_before_streaming(client):
+    assert client.get("/api/outfits/", params={"stream": "true", "cursor": "bogus"}).status_code == 400
@@ -0,0 +1,38 @@
+from bson import ObjectId
+
+from models.quiz import QuizResponses
+from models.user import StyleVector
+from services.style_vector import from_quiz, from_user
+from services.user_service import apply_quiz_to_user
+
+
+def _vector(db, run, user_id):
+    return StyleVector(**run(db.users.find_one({"_id": user_id}))["style_vector"])
+
+
+def test_clearing_a_preference_removes_it_from_the_vector(client, login, db, run):
+    user_id = login()
+    run(db.users.insert_one({"_id": user_id, "email": "vec@example.com"}))
+
+    client.patch("/api/user/style", json={"style": {"current": ["Minimalist"], "budget": "Mid"}})
+    vec = _vector(db, run, user_id)
+    assert vec.styles == ["Minimalist"] and vec.budget == "Mid"
+
+    assert client.patch("/api/user/style", json={"style": {"current": [], "budget": None}}).status_code == 200
+    vec = _vector(db, run, user_id)
+    assert vec.styles == [] and vec.budget is None
+
+
+def test_profile_edit_replaces_only_the_edited_fields():
+    base = from_quiz(QuizResponses(current_style=["Formal"], favorite_colors=["Navy"], body_type="Slim"))
+    doc = {"style": {"current": None, "favorite_colors": ["Olive"]}, "style_vector": base.model_dump()}
+    vec = from_user(doc, ["style.current"])
+    assert vec.styles == [] and vec.colors == ["Navy"] and vec.body_type == "Slim"
+
+
+def test_unanswered_quiz_questions_keep_profile_values(db, run):
+    user_id = ObjectId()
+    base = from_user({"style": {"current": ["Casual"], "goals": ["Save time"]}}, ["style"])
+    run(db.users.insert_one({"_id": user_id, "style_vector": base.model_dump()}))
+    vec = run(apply_quiz_to_user(str(user_id), QuizResponses(goals=["Look more confident"])))
+    assert vec.styles == ["Casual"] and vec.goals == ["Look more confident"]
@@ -0,0 +1,50 @@
+from bson import ObjectId
+
+from services import user_service
+from services.user_service import get_user_by_id, set_avatar_url, user_cache
+
+
+def _user(db, run):
+    user_id = ObjectId()
+    run(db.users.insert_one({"_id": user_id, "email": "cache@example.com", "name": "Cache"}))
+    return str(user_id)
+
+
+def test_reads_through_the_cache(db, run):
+    user_id = _user(db, run)
+
+    async def go():
+        first = await get_user_by_id(user_id)
+        await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"name": "Changed directly"}})
+        return first, await get_user_by_id(user_id)
+
+    first, second = run(go())
+    assert second == first and second.name == "Cache"
+
+
+def test_callers_get_independent_copies(db, run):
+    user_id = _user(db, run)
+
+    async def go():
+        first = await get_user_by_id(user_id)
+        first.name = "Mutated by a caller"
+        return await get_user_by_id(user_id)
+
+    assert run(go()).name == "Cache"
+
+
+def test_writes_invalidate(db, run):
+    user_id = _user(db, run)
+
+    async def go():
+        await get_user_by_id(user_id)
+        await set_avatar_url(user_id, "https://img.example/a.png")
+        return await get_user_by_id(user_id)
+
+    assert run(go()).avatar_url == "https://img.example/a.png"
+
+
+def test_invalidation_bumps_shared_version_with_sync(db, run, monkeypatch):
+    monkeypatch.setattr(user_service, "USER_CACHE_SYNC", True)
+    run(user_cache.invalidate(str(ObjectId())))
+    assert run(db.cache_versions.find_one({"_id": "users"}))["v"] == 1